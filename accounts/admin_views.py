@@ -1,9 +1,19 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Count
-from django.views.generic import ListView, DetailView
-
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect
+from django.views import View
+from django.views.generic import ListView, DetailView, TemplateView
+
+from taskmanager.instrumentation import metrics
+from tasks import cache as fragment_cache
+from tasks import analytics, counters, jobs
+from tasks.cards import task_cards
+from tasks.export import ADMIN_EXPORT_FIELDS, admin_export_queryset, export_response
 from tasks.models import Task
+from tasks.search import user_search
+from tasks.views import job_accepted
 
 User = get_user_model()
 
@@ -38,12 +48,13 @@ class AdminUserListView(LoginRequiredMixin, StaffOnlyMixin, ListView):
         """
         Возвращает QuerySet пользователей, который будет показан на странице.
         Здесь мы добавляем:
-        - annotate(tasks_count=Count("tasks")): считаем число задач пользователя на уровне SQL
+        - annotate(tasks_count=...): число задач пользователя из счётчиков TaskCounter
+          (подзапрос только для пользователей текущей страницы, без GROUP BY по задачам)
         - order_by("-date_joined"): новые пользователи сверху
         """
         qs = (
             User.objects.all()
-            .annotate(tasks_count=Count("tasks"))
+            .annotate(tasks_count=counters.tasks_count_annotation())
             .order_by("-date_joined")
         )
 
@@ -51,7 +62,8 @@ class AdminUserListView(LoginRequiredMixin, StaffOnlyMixin, ListView):
         q = self.request.GET.get("q", "").strip()
         if q:
             # Ищем по username частичным совпадением (регистр не важен)
-            qs = qs.filter(username__icontains=q)
+            # через триграммный FTS-индекс, см. tasks/search.py
+            qs = user_search.filter(qs, q)
 
         return qs
 
@@ -71,15 +83,137 @@ class AdminUserDetailView(LoginRequiredMixin, StaffOnlyMixin, DetailView):
     def get_context_data(self, **kwargs):
         """
         Добавляем в контекст дополнительные данные, кроме самого пользователя:
-        - tasks: последние 50 задач (для быстрого просмотра)
+        - tasks / cards: последние 50 задач (для быстрого просмотра), cards — готовые
+          значения для шаблона (tasks/cards.py)
         - tasks_total: общее число задач
+        - histogram: разбивка задач по статусам и приоритетам
         """
         ctx = super().get_context_data(**kwargs)
 
         # self.object — это текущий пользователь, которого открыл DetailView
         ctx["tasks"] = Task.objects.filter(owner=self.object).order_by("-created_at")[:50]
+        ctx["cards"] = task_cards(ctx["tasks"])
+
+        # Общее количество и разбивка — из счётчиков TaskCounter (до 9 строк)
+        histogram = counters.owner_histogram(self.object)
+        ctx["tasks_total"] = histogram["total"]
+        ctx["status_histogram"] = [
+            (label, histogram["status"][status]) for status, label in Task.Status.choices
+        ]
+        ctx["priority_histogram"] = [
+            (label, histogram["priority"][priority]) for priority, label in Task.Priority.choices
+        ]
+
+        return ctx
+
+
+class AdminTaskExportView(LoginRequiredMixin, StaffOnlyMixin, View):
+    """
+    Админская выгрузка задач всех пользователей (GET /accounts/admin/tasks/export/).
+
+    Параметры:
+    - format=csv|jsonl
+    - owner=<id пользователя> — только задачи одного пользователя (необязательно)
+    - q / status / priority — те же фильтры, что у списка задач
+
+    Выгрузка по всем пользователям идёт в порядке id (по первичному ключу,
+    без сортировки всей таблицы), поток строк — через values_list().iterator().
+
+    ?background=1 — файл готовит фоновое задание (tasks/jobs.py), ответ 202
+    со ссылкой для опроса состояния.
+    """
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get("format", "csv")
+        if fmt not in ("csv", "jsonl"):
+            return JsonResponse({"error": "format должен быть csv или jsonl"}, status=400)
+
+        if request.GET.get("background"):
+            job = jobs.enqueue(
+                "export_tasks",
+                {"scope": "all", "format": fmt, "params": request.GET.dict()},
+                owner=request.user,
+            )
+            return job_accepted({"format": fmt}, job)
+
+        qs = admin_export_queryset(request.GET)
+        return export_response(qs, ADMIN_EXPORT_FIELDS, fmt, filename="tasks_all")
+
+
+class AdminAnalyticsMixin(LoginRequiredMixin, StaffOnlyMixin):
+    """
+    Общее у страницы и JSON отчёта (tasks/analytics.py): параметры ?weeks=N&page=M,
+    показатели по всем пользователям и по пользователям страницы.
+    Всё читается из сводки TaskWeeklyStats; устаревшая сводка обновляется фоновым заданием.
+    """
+    per_page = 20
+
+    def get_report(self):
+        weeks = analytics.parse_weeks(self.request.GET.get("weeks", ""))
+        page, users = analytics.users_report(
+            weeks, page=self.request.GET.get("page") or 1, per_page=self.per_page
+        )
+        return {
+            "weeks": weeks,
+            "global": analytics.owner_report(analytics.GLOBAL, weeks),
+            "users": users,
+            "page_obj": page,
+            "refreshed_at": analytics.ensure_fresh(),
+        }
 
-        # Отдельный запрос для общего количества задач
-        ctx["tasks_total"] = Task.objects.filter(owner=self.object).count()
 
-        return ctx
\ No newline at end of file
+class AdminAnalyticsView(AdminAnalyticsMixin, TemplateView):
+    """
+    Страница отчёта для админов (GET /accounts/admin/analytics/?weeks=12):
+    по неделям — создано / выполнено, медиана времени выполнения, доля опозданий;
+    ниже — те же показатели за период по каждому пользователю (по 20 на страницу).
+    """
+    template_name = "adminpanel/analytics.html"
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        try:
+            ctx.update(self.get_report())
+        except ValueError as e:
+            raise Http404(str(e))
+        return ctx
+
+
+class AdminAnalyticsApiView(AdminAnalyticsMixin, View):
+    """
+    Тот же отчёт в JSON (GET /accounts/admin/analytics/api/?weeks=12&page=1).
+    """
+
+    def get(self, request, *args, **kwargs):
+        try:
+            report = self.get_report()
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        page = report.pop("page_obj")
+        report["page"] = {"number": page.number, "num_pages": page.paginator.num_pages}
+        return JsonResponse(report, json_dumps_params={"ensure_ascii": False})
+
+
+class AdminMetricsView(LoginRequiredMixin, StaffOnlyMixin, View):
+    """
+    Метрики запросов этого процесса (GET /accounts/admin/metrics/), JSON:
+    - views: гистограммы времени ответа, времени БД, рендера, числа SQL и повторов по каждому view
+    - fragment_cache: попадания/промахи кэша фрагментов списка задач
+    POST сбрасывает накопленные метрики.
+    """
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(
+            {
+                "sample_rate": getattr(settings, "REQUEST_METRICS_SAMPLE_RATE", 0.0),
+                "views": metrics.as_dict(),
+                "fragment_cache": fragment_cache.stats.as_dict(),
+            },
+            json_dumps_params={"ensure_ascii": False},
+        )
+
+    def post(self, request, *args, **kwargs):
+        metrics.reset()
+        fragment_cache.stats.reset()
+        return redirect("admin_metrics")
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # Кэш пользователя запроса (accounts/auth.py): сброс при изменении
+        # пользователя, заполнение при входе
+        from django.contrib.auth import get_user_model, user_logged_in
+        from django.db.models.signals import post_delete, post_save
+
+        from . import auth
+
+        User = get_user_model()
+        post_save.connect(auth.user_changed, sender=User, dispatch_uid="accounts_user_saved")
+        post_delete.connect(auth.user_changed, sender=User, dispatch_uid="accounts_user_deleted")
+        user_logged_in.connect(auth.user_logged_in, dispatch_uid="accounts_user_logged_in")
@@ -0,0 +1,100 @@
+"""
+Async-версии админских страниц пользователей (см. accounts/admin_views.py).
+Подключаются вместо синхронных при ASYNC_VIEWS=True, подробности — в tasks/async_views.py.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.views import View
+
+from tasks import counters
+from tasks.async_views import AsyncLoginRequiredMixin
+from tasks.cards import task_cards
+from tasks.models import Task
+from tasks.search import user_search
+
+from .admin_views import AdminUserListView
+
+User = get_user_model()
+
+
+class AsyncStaffOnlyMixin(AsyncLoginRequiredMixin):
+    """
+    Async-аналог LoginRequiredMixin + StaffOnlyMixin.
+    """
+
+    def test_user(self, user):
+        return user.is_staff or user.is_superuser
+
+
+class AsyncAdminUserListView(AsyncStaffOnlyMixin, View):
+    template_name = AdminUserListView.template_name
+    paginate_by = AdminUserListView.paginate_by
+
+    async def get(self, request, *args, **kwargs):
+        qs = (
+            User.objects.all()
+            .annotate(tasks_count=counters.tasks_count_annotation())
+            .order_by("-date_joined")
+        )
+        q = request.GET.get("q", "").strip()
+        if q:
+            # Проверка FTS-таблицы синхронная (один раз на процесс)
+            await sync_to_async(user_search.is_available)(qs.db)
+            qs = user_search.filter(qs, q)
+
+        paginator = Paginator(qs, self.paginate_by)
+        paginator.count = await qs.acount()
+        try:
+            page = paginator.page(request.GET.get("page") or 1)
+        except InvalidPage as e:
+            raise Http404(str(e))
+        page.object_list = [user async for user in page.object_list]
+
+        return TemplateResponse(
+            request,
+            self.template_name,
+            {
+                "users": page.object_list,
+                "object_list": page.object_list,
+                "page_obj": page,
+                "paginator": paginator,
+                "is_paginated": page.has_other_pages(),
+            },
+        )
+
+
+class AsyncAdminUserDetailView(AsyncStaffOnlyMixin, View):
+    template_name = "adminpanel/user_detail.html"
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            user = await User.objects.aget(pk=kwargs["pk"])
+        except User.DoesNotExist:
+            raise Http404("Пользователь не найден")
+
+        tasks = [
+            task async for task in Task.objects.filter(owner=user).order_by("-created_at")[:50]
+        ]
+        histogram = await counters.aowner_histogram(user)
+
+        return TemplateResponse(
+            request,
+            self.template_name,
+            {
+                "u": user,
+                "object": user,
+                "tasks": tasks,
+                "cards": task_cards(tasks),
+                "tasks_total": histogram["total"],
+                "status_histogram": [
+                    (label, histogram["status"][status]) for status, label in Task.Status.choices
+                ],
+                "priority_histogram": [
+                    (label, histogram["priority"][priority])
+                    for priority, label in Task.Priority.choices
+                ],
+            },
+        )
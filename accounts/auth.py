@@ -0,0 +1,144 @@
+"""
+Пользователь запроса из кэша (CachedAuthenticationMiddleware вместо
+django.contrib.auth.middleware.AuthenticationMiddleware).
+
+Стандартный middleware на каждый запрос авторизованного пользователя читает
+auth_user по id из сессии. Здесь пользователь берётся из кэша SESSION_CACHE_ALIAS
+(тот же, что у сессий) по ключу accounts:user:<id>:
+- промах — обычный django.contrib.auth.get_user() (запрос в БД), результат кладётся в кэш
+- попадание — та же проверка, что у Django: бэкенд из сессии разрешён и хэш сессии
+  (HASH_SESSION_KEY) совпадает с хэшем пароля; иначе — обычный путь, который сам
+  разлогинит сессию (или примет её по SECRET_KEY_FALLBACKS)
+- запись сбрасывается при любом сохранении и удалении пользователя (post_save /
+  post_delete): смена пароля через /accounts/password_change/, правка в админке,
+  is_active / is_staff; при входе пользователь сразу кладётся в кэш (user_logged_in)
+
+Изменения в обход save() (QuerySet.update()) кэш не сбрасывают — после них нужен
+invalidate_user(). ACCOUNTS_USER_CACHE_TIMEOUT=0 — кэш выключен, поведение как у Django;
+так и есть по умолчанию, если кэш "sessions" — locmem (свой у каждого процесса),
+см. settings.py. Если locmem включён явно, запись в других процессах доживает
+до ACCOUNTS_USER_CACHE_TIMEOUT секунд.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+KEY_PREFIX = "accounts:user:"
+
+
+def cache_timeout():
+    return getattr(settings, "ACCOUNTS_USER_CACHE_TIMEOUT", 60)
+
+
+def user_cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def user_key(user_id):
+    return f"{KEY_PREFIX}{user_id}"
+
+
+def cache_user(user):
+    if cache_timeout() and user.is_authenticated:
+        user_cache().set(user_key(user.pk), user, cache_timeout())
+
+
+def invalidate_user(user_id):
+    user_cache().delete(user_key(user_id))
+
+
+def _session_verified(user, backend_path, session_hash):
+    # Проверка из django.contrib.auth.get_user() без fallback-секретов:
+    # если она не прошла, решает обычный путь
+    return (
+        backend_path in settings.AUTHENTICATION_BACKENDS
+        and bool(session_hash)
+        and constant_time_compare(session_hash, user.get_session_auth_hash())
+    )
+
+
+def get_user(request):
+    """
+    Пользователь сессии: из кэша, если запись есть и сессия ей соответствует,
+    иначе — django.contrib.auth.get_user() с записью результата в кэш.
+    """
+    session = request.session
+    user_id = session.get(SESSION_KEY)
+    if not cache_timeout() or user_id is None:
+        return auth.get_user(request)
+
+    user = user_cache().get(user_key(user_id))
+    if user is not None and _session_verified(
+        user, session.get(BACKEND_SESSION_KEY), session.get(HASH_SESSION_KEY)
+    ):
+        return user
+
+    user = auth.get_user(request)
+    cache_user(user)
+    return user
+
+
+async def aget_user(request):
+    """
+    Async-версия get_user() для request.auser().
+    """
+    session = request.session
+    user_id = await session.aget(SESSION_KEY)
+    if not cache_timeout() or user_id is None:
+        return await auth.aget_user(request)
+
+    user = await user_cache().aget(user_key(user_id))
+    if user is not None and _session_verified(
+        user, await session.aget(BACKEND_SESSION_KEY), await session.aget(HASH_SESSION_KEY)
+    ):
+        return user
+
+    user = await auth.aget_user(request)
+    if cache_timeout() and user.is_authenticated:
+        await user_cache().aset(user_key(user.pk), user, cache_timeout())
+    return user
+
+
+def _request_user(request):
+    if not hasattr(request, "_cached_user"):
+        request._cached_user = get_user(request)
+    return request._cached_user
+
+
+async def _arequest_user(request):
+    if not hasattr(request, "_acached_user"):
+        request._acached_user = await aget_user(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware, у которого request.user и request.auser()
+    читают пользователя через кэш (get_user / aget_user).
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: _request_user(request))
+        request.auser = partial(_arequest_user, request)
+
+
+# --- сигналы (подключаются в AccountsConfig.ready) ---
+
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    # Параллельный запрос мог прочитать и закэшировать строку до коммита
+    transaction.on_commit(partial(invalidate_user, instance.pk))
+
+
+def user_logged_in(sender, request, user, **kwargs):
+    # Срабатывает после update_last_login (его приёмник подключён раньше),
+    # поэтому в кэш попадает пользователь с новым last_login
+    cache_user(user)
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.db import migrations
+
+# Триграммный FTS5-индекс по username: поиск подстроки (как icontains), но по индексу.
+# Таблица пользователей берётся из AUTH_USER_MODEL.
+# Триггеры и заполнение — как в tasks/triggers.py (USER_FTS) на момент миграции;
+# текущие определения восстанавливает post_migrate (ensure_triggers).
+
+TRIGGERS = {
+    "accounts_user_fts_ai": """
+        AFTER INSERT ON {user_table} BEGIN
+            INSERT INTO accounts_user_fts(rowid, username) VALUES (new.id, new.username);
+        END
+    """,
+    "accounts_user_fts_ad": """
+        AFTER DELETE ON {user_table} BEGIN
+            INSERT INTO accounts_user_fts(accounts_user_fts, rowid, username)
+            VALUES ('delete', old.id, old.username);
+        END
+    """,
+    "accounts_user_fts_au": """
+        AFTER UPDATE OF username ON {user_table} BEGIN
+            INSERT INTO accounts_user_fts(accounts_user_fts, rowid, username)
+            VALUES ('delete', old.id, old.username);
+            INSERT INTO accounts_user_fts(rowid, username) VALUES (new.id, new.username);
+        END
+    """,
+}
+
+
+def create_fts(apps, schema_editor):
+    # FTS5 есть только в SQLite; на других СУБД поиск работает через icontains
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            CREATE VIRTUAL TABLE accounts_user_fts USING fts5(
+                username,
+                content='{user_table}',
+                content_rowid='id',
+                tokenize='trigram'
+            )
+            """
+        )
+        for name, body in TRIGGERS.items():
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body.format(user_table=user_table)}")
+        cursor.execute("INSERT INTO accounts_user_fts(accounts_user_fts) VALUES ('rebuild')")
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute("DROP TABLE IF EXISTS accounts_user_fts")
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import migrations
+
+# Индекс по date_joined для списка пользователей в админке (order_by("-date_joined")):
+# без него SQLite читает всю таблицу и сортирует её во временном B-дереве.
+# Модель пользователя не наша (AUTH_USER_MODEL), поэтому индекс создаётся SQL-ом.
+# Миграция идёт после всех миграций auth: SQLite пересоздаёт таблицу при AlterField,
+# и индекс, созданный раньше, потерялся бы.
+
+
+def create_index(apps, schema_editor):
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS accounts_user_date_joined_idx ON {user_table} (date_joined)"
+    )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS accounts_user_date_joined_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_user_search'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
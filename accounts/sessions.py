@@ -0,0 +1,50 @@
+"""
+Сессии в БД с локальным кэшем (SESSION_ENGINE = "accounts.sessions").
+
+То же, что django.contrib.sessions.backends.cached_db: сессия пишется в
+django_session и в кэш SESSION_CACHE_ALIAS, читается из кэша, а при промахе —
+из БД. Отличие одно: копия в кэше живёт не дольше ACCOUNTS_SESSION_CACHE_TIMEOUT
+секунд, а не весь срок сессии.
+
+По умолчанию этот движок включается только с общим кэшем "sessions"
+(DJANGO_SESSION_CACHE_BACKEND), см. settings.py. Если включить его явно на locmem
+(свой кэш у каждого процесса), выход из аккаунта удаляет сессию из БД и из кэша
+своего процесса, а в кэше остальных процессов копия доживёт максимум до этого таймаута.
+"""
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+
+class _CappedTimeoutCache:
+    """
+    Обёртка над бэкендом кэша: set()/aset() не дольше max_timeout секунд.
+    Остальное (get, delete, `in` ...) — как у исходного кэша.
+    """
+
+    def __init__(self, cache, max_timeout):
+        self._cache = cache
+        self._max_timeout = max_timeout
+
+    def _cap(self, timeout):
+        return self._max_timeout if timeout is None else min(timeout, self._max_timeout)
+
+    def set(self, key, value, timeout=None, version=None):
+        return self._cache.set(key, value, self._cap(timeout), version)
+
+    async def aset(self, key, value, timeout=None, version=None):
+        return await self._cache.aset(key, value, self._cap(timeout), version)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def __getattr__(self, name):
+        return getattr(self._cache, name)
+
+
+class SessionStore(CachedDBStore):
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._cache = _CappedTimeoutCache(
+            self._cache, getattr(settings, "ACCOUNTS_SESSION_CACHE_TIMEOUT", 300)
+        )
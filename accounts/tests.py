@@ -1,3 +1,187 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts import auth
+
+from taskmanager.instrumentation import metrics
+from tasks.benchmarking import views_mode
+from tasks.models import Task
+
+User = get_user_model()
+
+
+@override_settings(REQUEST_METRICS_SAMPLE_RATE=1.0)
+class AdminMetricsViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", password="pass", is_staff=True)
+        cls.user = User.objects.create_user("user", password="pass")
+        Task.objects.create(owner=cls.user, title="Задача")
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_staff_only(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("admin_metrics")).status_code, 403)
+
+    def test_records_views(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("task_list"))
+        self.client.get(reverse("task_list"))
+
+        self.client.force_login(self.staff)
+        data = self.client.get(reverse("admin_metrics")).json()
+        task_list = data["views"]["TaskListView"]
+        self.assertEqual(task_list["duration_ms"]["count"], 2)
+        self.assertGreater(task_list["queries"]["max"], 0)
+        self.assertGreater(task_list["template_ms"]["max"], 0)
+        self.assertIn("fragment_cache", data)
+
+    def test_records_async_views(self):
+        # ORM async-view выполняется в потоке sync_to_async, а не в потоке event loop
+        self.async_client.force_login(self.user)
+        with views_mode(async_views=True):
+            async_to_sync(self.async_client.get)(reverse("task_list"))
+        task_list = metrics.as_dict()["AsyncTaskListView"]
+        self.assertGreater(task_list["queries"]["max"], 0)
+        self.assertGreater(task_list["db_ms"]["max"], 0)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0.0)
+    def test_sampling_disabled(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("task_list"))
+        self.assertEqual(metrics.as_dict(), {})
+
+    def test_reset(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse("admin_user_list"))
+        self.client.post(reverse("admin_metrics"))
+        self.assertNotIn("AdminUserListView", metrics.as_dict())
+
+
+@override_settings(SESSION_ENGINE="accounts.sessions", ACCOUNTS_USER_CACHE_TIMEOUT=60)
+class SessionAuthCacheTests(TestCase):
+    """
+    Сессии cached_db и пользователь запроса из кэша (accounts/sessions.py, accounts/auth.py):
+    авторизованный запрос не читает django_session и auth_user, а смена пароля
+    и правка пользователя сбрасывают кэш.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("user", password="old-pass-123")
+
+    def setUp(self):
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        self.client.force_login(self.user)
+
+    def auth_queries(self, client=None):
+        # SQL-запросы авторизации при открытии профиля
+        with CaptureQueriesContext(connection) as ctx:
+            response = (client or self.client).get(reverse("profile"))
+        self.assertEqual(response.status_code, 200)
+        return [
+            q["sql"] for q in ctx.captured_queries
+            if "django_session" in q["sql"] or '"auth_user"' in q["sql"]
+        ]
+
+    def test_no_auth_queries_after_login(self):
+        self.assertEqual(self.auth_queries(), [])
+
+    def test_cache_miss_reads_db_once(self):
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        self.assertEqual(len(self.auth_queries()), 2)
+        self.assertEqual(self.auth_queries(), [])
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+    def test_signed_cookies(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.auth_queries(), [])
+
+    @override_settings(
+        SESSION_ENGINE="django.contrib.sessions.backends.db", ACCOUNTS_USER_CACHE_TIMEOUT=0
+    )
+    def test_uncached_mode(self):
+        self.client.force_login(self.user)
+        self.assertEqual(len(self.auth_queries()), 2)
+
+    def test_password_change_logs_out_other_sessions(self):
+        other = self.client_class()
+        other.force_login(self.user)
+        self.assertEqual(self.auth_queries(other), [])
+
+        response = self.client.post(reverse("password_change"), {
+            "old_password": "old-pass-123",
+            "new_password1": "new-pass-456!",
+            "new_password2": "new-pass-456!",
+        })
+        self.assertRedirects(response, reverse("password_change_done"))
+
+        # Текущая сессия получила новый хэш и осталась, старая — разлогинена
+        self.assertEqual(self.client.get(reverse("profile")).status_code, 200)
+        self.assertEqual(other.get(reverse("profile")).status_code, 302)
+
+    def test_user_save_invalidates(self):
+        self.auth_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse("profile")).status_code, 302)
+
+    def test_async_user(self):
+        request = RequestFactory().get("/")
+        request.session = self.client.session
+        with self.assertNumQueries(0):
+            user = async_to_sync(auth.aget_user)(request)
+        self.assertEqual(user.pk, self.user.pk)
+
+
+# Переменные окружения, от которых зависят умолчания сессий
+SESSION_ENV = ("DJANGO_SESSION_ENGINE", "DJANGO_SESSION_CACHE_BACKEND", "DJANGO_ACCOUNTS_USER_CACHE_TIMEOUT")
+
+
+class SessionSettingsTests(TestCase):
+    """
+    Умолчания сессий в settings.py: кэш сессий и пользователя — только с общим кэшем.
+    """
+
+    def session_settings(self, **env):
+        # Настройки читаются при импорте модуля — проверяем в отдельном процессе
+        code = (
+            "import taskmanager.settings as s; "
+            "print(s.SESSION_ENGINE, s.ACCOUNTS_USER_CACHE_TIMEOUT)"
+        )
+        base = {name: value for name, value in os.environ.items() if name not in SESSION_ENV}
+        env = {**base, "DJANGO_SECRET_KEY": "x", **env}
+        result = subprocess.run(
+            [sys.executable, "-c", code], env=env, cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        )
+        return result.stdout.split()
+
+    def test_locmem_defaults_to_db(self):
+        self.assertEqual(self.session_settings(), ["django.contrib.sessions.backends.db", "0"])
+
+    def test_shared_cache_enables_cached_db(self):
+        self.assertEqual(
+            self.session_settings(
+                DJANGO_SESSION_CACHE_BACKEND="django.core.cache.backends.filebased.FileBasedCache",
+            ),
+            ["accounts.sessions", "60"],
+        )
+
+    def test_explicit_engine_wins(self):
+        self.assertEqual(
+            self.session_settings(DJANGO_SESSION_ENGINE="cached_db")[0], "accounts.sessions"
+        )
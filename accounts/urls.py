@@ -1,6 +1,17 @@
+from django.conf import settings
 from django.urls import path
 from .views import register_view, profile_view
-from .admin_views import AdminUserListView, AdminUserDetailView
+from .admin_views import (
+    AdminUserListView, AdminUserDetailView, AdminTaskExportView, AdminMetricsView,
+    AdminAnalyticsView, AdminAnalyticsApiView,
+)
+
+# Async-версии админских страниц для ASGI (DJANGO_ASYNC_VIEWS=1)
+if getattr(settings, "ASYNC_VIEWS", False):
+    from .async_admin_views import (
+        AsyncAdminUserListView as AdminUserListView,
+        AsyncAdminUserDetailView as AdminUserDetailView,
+    )
 
 urlpatterns = [
     # Регистрация: /accounts/register/
@@ -19,4 +30,15 @@ urlpatterns = [
     # <int:pk> — параметр маршрута: pk = первичный ключ пользователя
     # DetailView автоматически использует pk, чтобы найти пользователя в БД
     path("admin/users/<int:pk>/", AdminUserDetailView.as_view(), name="admin_user_detail"),
+
+    # Выгрузка задач всех пользователей: /accounts/admin/tasks/export/?format=csv
+    path("admin/tasks/export/", AdminTaskExportView.as_view(), name="admin_task_export"),
+
+    # Отчёт по задачам: создано / выполнено по неделям, время выполнения, опоздания
+    # /accounts/admin/analytics/?weeks=12 и то же в JSON: /accounts/admin/analytics/api/
+    path("admin/analytics/", AdminAnalyticsView.as_view(), name="admin_analytics"),
+    path("admin/analytics/api/", AdminAnalyticsApiView.as_view(), name="admin_analytics_api"),
+
+    # Метрики запросов этого процесса (JSON): /accounts/admin/metrics/
+    path("admin/metrics/", AdminMetricsView.as_view(), name="admin_metrics"),
 ]
\ No newline at end of file
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'taskmanager.settings')
 
 application = get_asgi_application()
+
+# Прогрев URL-резолвера, переводов и шаблонов до первого запроса (taskmanager/startup.py)
+from taskmanager.startup import prewarm  # noqa: E402
+
+prewarm()
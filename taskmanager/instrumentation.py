@@ -0,0 +1,293 @@
+"""
+Метрики запросов в пределах процесса: SQL, время БД, рендер шаблона.
+
+RequestMetricsMiddleware для выбранной доли запросов (сэмплирование,
+настройка REQUEST_METRICS_SAMPLE_RATE) замеряет:
+- общее время ответа,
+- число SQL-запросов и суммарное время в БД,
+- повторяющиеся запросы (тот же SQL с теми же параметрами — признак N+1),
+- время рендера TemplateResponse.
+
+SQL считает обёртка record_queries, которая ставится на каждое новое соединение
+(сигнал connection_created, tasks/apps.py) и пишет в QueryRecorder текущего запроса
+из contextvar. Соединения в Django свои у каждого потока: async-view ходит в БД
+из потока sync_to_async, а contextvar переезжает туда вместе с контекстом —
+поэтому запросы считаются и под ASGI.
+
+Замеры складываются в гистограммы по имени view (TaskListView, AdminUserListView, ...).
+Смотреть их — GET /accounts/admin/metrics/ (только staff), сбросить — POST туда же.
+При REQUEST_METRICS_LOG=True каждый замер дополнительно пишется одной
+JSON-строкой в логгер "taskmanager.requests".
+
+Несэмплированный запрос стоит одного вызова random() и ContextVar.get() на каждый
+SQL-запрос; сэмплированный — ещё perf_counter() и добавление в множество.
+Гистограммы свои у каждого процесса.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+
+logger = logging.getLogger("taskmanager.requests")
+
+# Верхние границы корзин гистограммы (мс); всё, что больше, — в последнюю корзину
+DURATION_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Для числа запросов — свои границы
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICS = {
+    "duration_ms": DURATION_BUCKETS_MS,
+    "db_ms": DURATION_BUCKETS_MS,
+    "template_ms": DURATION_BUCKETS_MS,
+    "queries": QUERY_BUCKETS,
+    "duplicate_queries": QUERY_BUCKETS,
+}
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами: count, sum, max и число значений в корзине.
+    Не потокобезопасна сама по себе — защищается блокировкой RequestMetrics.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, fraction):
+        """
+        Оценка перцентиля: верхняя граница корзины, в которую он попал.
+        """
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def as_dict(self):
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "max": round(self.max, 3),
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class RequestMetrics:
+    """
+    Гистограммы метрик по имени view (потокобезопасно).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, sample):
+        with self._lock:
+            histograms = self._views.get(view)
+            if histograms is None:
+                histograms = self._views[view] = {
+                    name: Histogram(bounds) for name, bounds in METRICS.items()
+                }
+            for name, value in sample.items():
+                if name in histograms:
+                    histograms[name].add(value)
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                view: {name: histogram.as_dict() for name, histogram in histograms.items()}
+                for view, histograms in sorted(self._views.items())
+            }
+
+
+metrics = RequestMetrics()
+
+# QueryRecorder замеряемого запроса (None — запрос не сэмплирован)
+_recorder = ContextVar("request_metrics_recorder", default=None)
+
+
+class QueryRecorder:
+    """
+    execute_wrapper: считает запросы, время в БД и повторы.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.duplicates = 0
+        self._seen = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            key = (sql, repr(params))
+            if key in self._seen:
+                self.duplicates += 1
+            else:
+                self._seen.add(key)
+
+
+def record_queries(execute, sql, params, many, context):
+    """
+    execute_wrapper каждого соединения: передаёт запрос QueryRecorder'у текущего
+    замера, вне замера — просто выполняет.
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    Обработчик connection_created: ставит record_queries на соединение.
+    Обёртка встаёт первой (внешней) и один раз — соединение может переоткрываться.
+    """
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_queries)
+
+
+def view_name(view_func):
+    """
+    Имя view для метрик: класс для CBV, иначе модуль.функция.
+    """
+    view_class = getattr(view_func, "view_class", None)
+    if view_class is not None:
+        return view_class.__name__
+    return f"{view_func.__module__}.{getattr(view_func, '__qualname__', view_func)}"
+
+
+class RequestMetricsMiddleware:
+    """
+    Ставится первым в MIDDLEWARE, чтобы в замер попали и запросы сессии/пользователя.
+    Работает и под WSGI, и под ASGI (не заставляет async-view уходить в поток).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        with self.measure(request) as finish:
+            response = self.get_response(request)
+        return finish(response)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        with self.measure(request) as finish:
+            response = await self.get_response(request)
+        return finish(response)
+
+    @staticmethod
+    def sampled():
+        rate = getattr(settings, "REQUEST_METRICS_SAMPLE_RATE", 0.0)
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    @contextmanager
+    def measure(self, request):
+        """
+        Делает QueryRecorder текущим (contextvar) на время запроса
+        и отдаёт функцию, которая записывает замер для готового ответа.
+        """
+        recorder = QueryRecorder()
+        request._metrics = {"view": None, "template_ms": 0.0}
+        started = time.perf_counter()
+
+        def finish(response):
+            self.record(request, response, recorder, (time.perf_counter() - started) * 1000)
+            return response
+
+        token = _recorder.set(recorder)
+        try:
+            yield finish
+        finally:
+            _recorder.reset(token)
+
+    def record(self, request, response, recorder, duration_ms):
+        view = request._metrics["view"]
+        if view is None:
+            # 404 до view, редиректы CommonMiddleware и т.п.
+            return
+
+        sample = {
+            "duration_ms": duration_ms,
+            "db_ms": recorder.duration * 1000,
+            "template_ms": request._metrics["template_ms"],
+            "queries": recorder.count,
+            "duplicate_queries": recorder.duplicates,
+        }
+        metrics.record(view, sample)
+
+        if getattr(settings, "REQUEST_METRICS_LOG", False):
+            logger.info(
+                json.dumps(
+                    {
+                        "view": view,
+                        "method": request.method,
+                        "path": request.path,
+                        "status": response.status_code,
+                        **{name: round(value, 3) for name, value in sample.items()},
+                    },
+                    ensure_ascii=False,
+                )
+            )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, "_metrics"):
+            request._metrics["view"] = view_name(view_func)
+
+    def process_template_response(self, request, response):
+        # Рендер TemplateResponse идёт сразу после этого хука;
+        # post_render_callback вызывается, когда он закончен
+        if hasattr(request, "_metrics"):
+            started = time.perf_counter()
+
+            def rendered(response):
+                request._metrics["template_ms"] += (time.perf_counter() - started) * 1000
+
+            response.add_post_render_callback(rendered)
+        return response
@@ -10,13 +10,17 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
-from dotenv import load_dotenv
 
 from pathlib import Path
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR / ".env")
+
+# python-dotenv импортируется, только если .env есть (на проде переменные задаёт окружение)
+if (BASE_DIR / ".env").exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(BASE_DIR / ".env")
 
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY")
 if not SECRET_KEY:
@@ -42,23 +46,39 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы в замеры попали все запросы к БД (см. taskmanager/instrumentation.py)
+    'taskmanager.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # request.user из кэша, см. accounts/auth.py
+    'accounts.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'taskmanager.urls'
 
+# Загрузчики шаблонов. По умолчанию (прод) — кэширующий загрузчик: шаблон читается
+# и компилируется один раз на процесс (при старте — taskmanager/startup.py), дальше
+# рендер идёт по готовому дереву узлов.
+# DJANGO_TEMPLATE_CACHE=0 — файл читается и разбирается при каждом рендере
+# (правка шаблонов без перезапуска; замер разницы — manage.py bench_render)
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if os.getenv("DJANGO_TEMPLATE_CACHE", "1") == "1":
+    TEMPLATE_LOADERS = [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
+        # Вместо APP_DIRS: загрузчики заданы явно (app_directories — внутри TEMPLATE_LOADERS)
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -71,6 +91,26 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'taskmanager.wsgi.application'
 
+# Профиль процесса:
+# DJANGO_PROCESS_PROFILE=full — всё приложение (по умолчанию)
+# DJANGO_PROCESS_PROFILE=api  — только JSON API (/api/tasks/..., /api/jobs/...) для воркеров,
+#   на которые балансировщик отправляет API: без админки, сообщений, статики и шаблонов,
+#   процесс стартует быстрее и занимает меньше памяти (замер — manage.py startup_profile)
+PROCESS_PROFILES = ("full", "api")
+PROCESS_PROFILE = os.getenv("DJANGO_PROCESS_PROFILE", "full")
+if PROCESS_PROFILE not in PROCESS_PROFILES:
+    raise RuntimeError(f"DJANGO_PROCESS_PROFILE должен быть одним из: {', '.join(PROCESS_PROFILES)}")
+
+if PROCESS_PROFILE == "api":
+    _WEB_ONLY_APPS = ("django.contrib.admin", "django.contrib.messages", "django.contrib.staticfiles")
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in _WEB_ONLY_APPS]
+    MIDDLEWARE = [m for m in MIDDLEWARE if m != "django.contrib.messages.middleware.MessageMiddleware"]
+    TEMPLATES = []
+    ROOT_URLCONF = "taskmanager.urls_api"
+
+# Прогрев URL-резолвера, переводов и шаблонов при старте wsgi.py / asgi.py (taskmanager/startup.py)
+STARTUP_PREWARM = os.getenv("DJANGO_STARTUP_PREWARM", "1") == "1"
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -82,6 +122,139 @@ DATABASES = {
     }
 }
 
+# Профиль SQLite (см. taskmanager/sqlite.py):
+# DJANGO_SQLITE_PROFILE=tuned   — постоянные соединения, WAL и PRAGMA ниже (по умолчанию)
+# DJANGO_SQLITE_PROFILE=default — исходная конфигурация: настройки Django и SQLite по умолчанию
+if os.getenv("DJANGO_SQLITE_PROFILE", "tuned") == "tuned":
+    DATABASES["default"].update({
+        # Постоянные соединения: не открывать файл БД и не применять PRAGMA на каждый запрос
+        "CONN_MAX_AGE": int(os.getenv("DJANGO_DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # Сколько секунд драйвер ждёт блокировку, прежде чем вернуть "database is locked"
+            "timeout": int(os.getenv("DJANGO_SQLITE_BUSY_TIMEOUT", "5000")) / 1000,
+        },
+    })
+    SQLITE_PRAGMAS = {
+        "journal_mode": os.getenv("DJANGO_SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("DJANGO_SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": int(os.getenv("DJANGO_SQLITE_BUSY_TIMEOUT", "5000")),
+        "mmap_size": int(os.getenv("DJANGO_SQLITE_MMAP_SIZE", str(128 * 1024 * 1024))),
+        "cache_size": int(os.getenv("DJANGO_SQLITE_CACHE_SIZE", "-20000")),
+        "temp_store": "MEMORY",
+    }
+    # Транзакции сразу берут блокировку записи (BEGIN IMMEDIATE): при конкурентной
+    # записи ожидание идёт через busy_timeout в начале транзакции, а не ошибка
+    # "database is locked" при попытке повысить блокировку чтения до записи
+    DATABASES["default"]["OPTIONS"]["transaction_mode"] = os.getenv(
+        "DJANGO_SQLITE_TRANSACTION_MODE", "IMMEDIATE"
+    )
+else:
+    SQLITE_PRAGMAS = {}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#
+# По умолчанию — locmem в памяти процесса, ограниченный MAX_ENTRIES (LRU).
+# Для нескольких воркеров нужен общий бэкенд, например:
+# DJANGO_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# DJANGO_CACHE_LOCATION=/var/tmp/taskmanager_cache
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", "taskmanager"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("DJANGO_CACHE_MAX_ENTRIES", "5000")),
+        },
+    },
+    # Сессии и пользователи запросов (accounts/sessions.py, accounts/auth.py) — отдельно,
+    # чтобы их не вытесняли фрагменты списков
+    "sessions": {
+        "BACKEND": os.getenv("DJANGO_SESSION_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("DJANGO_SESSION_CACHE_LOCATION", "taskmanager-sessions"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("DJANGO_SESSION_CACHE_MAX_ENTRIES", "10000")),
+        },
+    },
+}
+
+# Бэкенды кэша, у которых своя копия в каждом процессе: инвалидация в одном
+# воркере не видна в остальных
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+# Сессии:
+# DJANGO_SESSION_ENGINE=cached_db      — БД + кэш "sessions" (accounts/sessions.py)
+# DJANGO_SESSION_ENGINE=signed_cookies — данные сессии в подписанной cookie, БД не нужна;
+#                                        выход не отзывает скопированную cookie до истечения срока
+# DJANGO_SESSION_ENGINE=db             — только БД (как в Django по умолчанию)
+#
+# По умолчанию cached_db и кэш пользователя запроса включаются, только если кэш
+# "sessions" общий (DJANGO_SESSION_CACHE_BACKEND): с locmem у каждого воркера своя
+# копия, и выход или смена пароля в одном процессе не видны в других.
+# Тогда по умолчанию — db и без кэша пользователя; с одним процессом
+# cached_db можно включить и на locmem явно.
+_shared_session_cache = CACHES["sessions"]["BACKEND"] not in PROCESS_LOCAL_CACHE_BACKENDS
+SESSION_ENGINES = {
+    "cached_db": "accounts.sessions",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+    "db": "django.contrib.sessions.backends.db",
+}
+_session_engine = os.getenv("DJANGO_SESSION_ENGINE", "cached_db" if _shared_session_cache else "db")
+if _session_engine not in SESSION_ENGINES:
+    raise RuntimeError(f"DJANGO_SESSION_ENGINE должен быть одним из: {', '.join(SESSION_ENGINES)}")
+SESSION_ENGINE = SESSION_ENGINES[_session_engine]
+SESSION_CACHE_ALIAS = "sessions"
+
+# Сколько секунд копия сессии (cached_db) и пользователь запроса живут в кэше "sessions".
+# Если locmem включён явно, выход или смена пароля в одном процессе доходят
+# до остальных не позже этого срока. ACCOUNTS_USER_CACHE_TIMEOUT=0 — без кэша пользователя
+ACCOUNTS_SESSION_CACHE_TIMEOUT = int(os.getenv("DJANGO_ACCOUNTS_SESSION_CACHE_TIMEOUT", "300"))
+ACCOUNTS_USER_CACHE_TIMEOUT = int(os.getenv(
+    "DJANGO_ACCOUNTS_USER_CACHE_TIMEOUT", "60" if _shared_session_cache else "0"
+))
+
+# Кэш отрендеренных фрагментов списка задач (tasks/cache.py).
+# По умолчанию включён только с общим бэкендом: с locmem у каждого воркера своя
+# версия данных владельца, и список в другом процессе остаётся устаревшим.
+# С одним процессом (runserver, один воркер) его можно включить и на locmem:
+# DJANGO_TASKS_FRAGMENT_CACHE_ENABLED=1
+TASKS_FRAGMENT_CACHE = os.getenv("DJANGO_TASKS_FRAGMENT_CACHE", "default")
+TASKS_FRAGMENT_CACHE_ENABLED = os.getenv(
+    "DJANGO_TASKS_FRAGMENT_CACHE_ENABLED",
+    "0" if CACHES[TASKS_FRAGMENT_CACHE]["BACKEND"] in PROCESS_LOCAL_CACHE_BACKENDS else "1",
+) == "1"
+TASKS_FRAGMENT_CACHE_TIMEOUT = int(os.getenv("DJANGO_TASKS_FRAGMENT_CACHE_TIMEOUT", "300"))
+
+# Сколько секунд кэшировать дашборд дедлайнов владельца (tasks/dashboard.py)
+TASKS_DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DJANGO_TASKS_DASHBOARD_CACHE_TIMEOUT", "30"))
+
+# Админка задач (tasks/admin.py): сколько секунд кэшировать общие счётчики
+# (число строк и количества в фильтрах) и до скольких строк считать результаты поиска
+TASKS_ADMIN_COUNTS_TIMEOUT = int(os.getenv("DJANGO_TASKS_ADMIN_COUNTS_TIMEOUT", "60"))
+TASKS_ADMIN_COUNT_LIMIT = int(os.getenv("DJANGO_TASKS_ADMIN_COUNT_LIMIT", "10000"))
+
+
+# Метрики запросов (taskmanager/instrumentation.py):
+# доля замеряемых запросов от 0 до 1 (0 — выключено) и запись каждого замера в лог
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv("DJANGO_REQUEST_METRICS_SAMPLE_RATE", "0.1"))
+REQUEST_METRICS_LOG = os.getenv("DJANGO_REQUEST_METRICS_LOG", "0") == "1"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "taskmanager.requests": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -121,6 +294,68 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]  # создадим позже
 STATIC_ROOT = BASE_DIR / "staticfiles"    # для collectstatic (прод)
 
+# Пагинация списка задач: "offset" (?page=N, с общим числом страниц)
+# или "keyset" (?cursor=..., без COUNT(*), для очень длинных списков)
+TASKS_PAGINATION = os.getenv("DJANGO_TASKS_PAGINATION", "offset")
+
+# Размер пачки строк при потоковой выгрузке задач (CSV/JSONL)
+TASKS_EXPORT_CHUNK_SIZE = int(os.getenv("DJANGO_TASKS_EXPORT_CHUNK_SIZE", "2000"))
+
+# Синхронизация (tasks/sync.py): изменения моложе N секунд отдаются в следующем опросе;
+# надгробия удалённых задач хранятся N дней (manage.py compact_tombstones)
+TASKS_SYNC_SETTLE_SECONDS = int(os.getenv("DJANGO_TASKS_SYNC_SETTLE_SECONDS", "1"))
+TASKS_TOMBSTONE_RETENTION_DAYS = int(os.getenv("DJANGO_TASKS_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Архив (tasks/archive.py): manage.py archive_tasks переносит выполненные задачи,
+# не менявшиеся N дней, в таблицу ArchivedTask
+TASKS_ARCHIVE_AFTER_DAYS = int(os.getenv("DJANGO_TASKS_ARCHIVE_AFTER_DAYS", "90"))
+
+# Журнал изменений задач (tasks/activity.py, manage.py compact_activity):
+# - TASKS_ACTIVITY: писать ли журнал (статус / приоритет / дедлайн)
+# - TASKS_ACTIVITY_BATCH_SIZE: строк в одном INSERT при сбросе буфера
+# - TASKS_ACTIVITY_HISTORY_LIMIT: записей в панели «История» на странице задачи
+# - TASKS_ACTIVITY_COMPACT_AFTER_DAYS: старше — изменения схлопываются до одной записи в день
+# - TASKS_ACTIVITY_RETENTION_DAYS: старше — записи удаляются
+TASKS_ACTIVITY = os.getenv("DJANGO_TASKS_ACTIVITY", "1") == "1"
+TASKS_ACTIVITY_BATCH_SIZE = int(os.getenv("DJANGO_TASKS_ACTIVITY_BATCH_SIZE", "500"))
+TASKS_ACTIVITY_HISTORY_LIMIT = int(os.getenv("DJANGO_TASKS_ACTIVITY_HISTORY_LIMIT", "50"))
+TASKS_ACTIVITY_COMPACT_AFTER_DAYS = int(os.getenv("DJANGO_TASKS_ACTIVITY_COMPACT_AFTER_DAYS", "30"))
+TASKS_ACTIVITY_RETENTION_DAYS = int(os.getenv("DJANGO_TASKS_ACTIVITY_RETENTION_DAYS", "365"))
+
+# Отчёты (tasks/analytics.py, manage.py refresh_analytics):
+# - TASKS_ANALYTICS_MAX_AGE: сводка старше N секунд — страница отчёта ставит фоновое обновление
+# - TASKS_ANALYTICS_BATCH_SIZE: диапазон id задач / записей журнала на одну транзакцию обновления
+TASKS_ANALYTICS_MAX_AGE = int(os.getenv("DJANGO_TASKS_ANALYTICS_MAX_AGE", "300"))
+TASKS_ANALYTICS_BATCH_SIZE = int(os.getenv("DJANGO_TASKS_ANALYTICS_BATCH_SIZE", "50000"))
+
+# Фоновые задания (tasks/jobs.py, manage.py run_workers):
+# - TASKS_JOBS_WORKERS: сколько процессов-воркеров запускать
+# - TASKS_JOBS_POLL_INTERVAL: как часто пустой воркер проверяет очередь, секунд
+# - TASKS_JOBS_STALE_SECONDS: задание без признаков жизни дольше — возвращается в очередь
+# - TASKS_JOBS_HEARTBEAT_SECONDS: как часто воркер отмечается во время задания
+#   (должно быть заметно меньше TASKS_JOBS_STALE_SECONDS)
+# - TASKS_JOBS_MAX_ATTEMPTS: попыток на задание (с растущей задержкой между ними)
+# - TASKS_JOBS_DIR: куда складываются файлы выгрузок
+# - TASKS_JOBS_BULK_DELETE_THRESHOLD: массовое удаление большего числа задач уходит в фон
+TASKS_JOBS_WORKERS = int(os.getenv("DJANGO_TASKS_JOBS_WORKERS", "2"))
+TASKS_JOBS_POLL_INTERVAL = float(os.getenv("DJANGO_TASKS_JOBS_POLL_INTERVAL", "1.0"))
+TASKS_JOBS_STALE_SECONDS = int(os.getenv("DJANGO_TASKS_JOBS_STALE_SECONDS", "300"))
+TASKS_JOBS_HEARTBEAT_SECONDS = float(os.getenv("DJANGO_TASKS_JOBS_HEARTBEAT_SECONDS", "30"))
+TASKS_JOBS_MAX_ATTEMPTS = int(os.getenv("DJANGO_TASKS_JOBS_MAX_ATTEMPTS", "3"))
+TASKS_JOBS_DIR = Path(os.getenv("DJANGO_TASKS_JOBS_DIR", BASE_DIR / "var" / "jobs"))
+TASKS_JOBS_BULK_DELETE_THRESHOLD = int(os.getenv("DJANGO_TASKS_JOBS_BULK_DELETE_THRESHOLD", "200"))
+
+# Push-уведомления об изменениях задач (tasks/events.py, GET /events/ — только под ASGI,
+# маршрут подключается вместе с DJANGO_ASYNC_VIEWS=1):
+# брокер (путь к классу), пинг SSE-потока и ожидание long-poll в секундах
+TASKS_EVENTS = os.getenv("DJANGO_TASKS_EVENTS", "0") == "1"
+TASKS_EVENTS_BROKER = os.getenv("DJANGO_TASKS_EVENTS_BROKER", "tasks.events.LocalBroker")
+TASKS_EVENTS_HEARTBEAT = int(os.getenv("DJANGO_TASKS_EVENTS_HEARTBEAT", "15"))
+TASKS_EVENTS_POLL_TIMEOUT = int(os.getenv("DJANGO_TASKS_EVENTS_POLL_TIMEOUT", "25"))
+
+# Async-версии view задач и админских страниц (для запуска под ASGI, taskmanager/asgi.py)
+ASYNC_VIEWS = os.getenv("DJANGO_ASYNC_VIEWS", "0") == "1"
+
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "task_list"
 LOGOUT_REDIRECT_URL = "login"
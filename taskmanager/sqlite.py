@@ -0,0 +1,54 @@
+"""
+Настройка соединений SQLite для продакшена.
+
+PRAGMA применяются к каждому новому соединению (сигнал connection_created,
+подключается в TasksConfig.ready). Набор PRAGMA задаётся в settings.SQLITE_PRAGMAS
+и управляется переменными окружения DJANGO_SQLITE_*.
+
+- journal_mode=WAL     — читатели не блокируют писателя и наоборот
+- synchronous=NORMAL   — в режиме WAL безопасно и без fsync на каждый коммит
+- busy_timeout         — сколько ждать освободившейся блокировки вместо
+                         немедленной ошибки "database is locked"
+- mmap_size            — чтение страниц через отображение файла в память
+- cache_size           — размер кэша страниц (отрицательное значение — в КиБ)
+- temp_store=MEMORY    — временные B-деревья (сортировки) в памяти
+
+Там же (профиль tuned) транзакции открываются как BEGIN IMMEDIATE —
+OPTIONS["transaction_mode"] в DATABASES, его применяет сам Django.
+"""
+from django.conf import settings
+
+# Порядок важен: journal_mode первым, остальные после
+PRAGMA_ORDER = ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size", "temp_store")
+
+
+def pragma_statements(pragmas):
+    """
+    Список SQL "PRAGMA имя=значение" в правильном порядке.
+    """
+    names = [name for name in PRAGMA_ORDER if name in pragmas]
+    names += [name for name in pragmas if name not in PRAGMA_ORDER]
+    return [f"PRAGMA {name}={pragmas[name]}" for name in names]
+
+
+def apply_pragmas(cursor, pragmas):
+    """
+    Применяет PRAGMA через курсор (DB-API или Django).
+    """
+    for sql in pragma_statements(pragmas):
+        cursor.execute(sql)
+
+
+def configure_connection(sender, connection, **kwargs):
+    """
+    Обработчик connection_created: настраивает каждое новое соединение SQLite.
+    """
+    if connection.vendor != "sqlite":
+        return
+
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    if not pragmas:
+        return
+
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, pragmas)
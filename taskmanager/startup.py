@@ -0,0 +1,93 @@
+"""
+Старт процесса: прогрев до первого запроса.
+
+prewarm() вызывается из wsgi.py / asgi.py сразу после создания приложения
+(если STARTUP_PREWARM). Без него всё это делает первый запрос каждого воркера:
+- URL-резолвер: импорт всех модулей urls и view, компиляция регулярных выражений
+  маршрутов и словарь для reverse()
+- переводы (USE_I18N): загрузка каталогов .mo всех приложений для LANGUAGE_CODE
+- шаблоны: все шаблоны проекта (каталоги DIRS и templates/ приложений проекта)
+  компилируются в кэширующий загрузчик (cached.Loader) — первый рендер не читает
+  и не разбирает файлы; шаблоны django.contrib (админка) загружаются по требованию
+
+Время каждого шага (мс) — в TIMINGS, его печатает manage.py startup_profile.
+"""
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.urls import get_resolver
+
+TIMINGS = {}
+
+
+@contextmanager
+def _timed(step):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        TIMINGS[step] = round((time.perf_counter() - started) * 1000, 2)
+
+
+def warm_urls():
+    """
+    Заполняет кэш резолвера ROOT_URLCONF. Возвращает число имён маршрутов.
+    """
+    resolver = get_resolver()
+    return len(resolver.reverse_dict)
+
+
+def warm_translations():
+    from django.utils import translation
+
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext("")
+
+
+def project_template_names():
+    """
+    Имена шаблонов проекта: *.html из каталогов DIRS и templates/ приложений,
+    кроме встроенных в Django.
+    """
+    directories = [Path(d) for engine in settings.TEMPLATES for d in engine.get("DIRS", [])]
+    directories += [
+        Path(app.path) / "templates"
+        for app in apps.get_app_configs()
+        if not app.name.startswith("django.")
+    ]
+    names = set()
+    for directory in directories:
+        if directory.is_dir():
+            names.update(path.relative_to(directory).as_posix() for path in directory.rglob("*.html"))
+    return sorted(names)
+
+
+def warm_templates():
+    """
+    Компилирует шаблоны проекта в кэш загрузчика. Возвращает их число.
+    """
+    from django.template.loader import get_template
+
+    names = project_template_names()
+    for name in names:
+        get_template(name)
+    return len(names)
+
+
+def prewarm():
+    if not getattr(settings, "STARTUP_PREWARM", True):
+        return TIMINGS
+
+    with _timed("urls"):
+        warm_urls()
+    if settings.USE_I18N:
+        with _timed("translations"):
+            warm_translations()
+    # В профиле api шаблонов нет
+    if settings.TEMPLATES:
+        with _timed("templates"):
+            warm_templates()
+    return TIMINGS
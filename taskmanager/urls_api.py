@@ -0,0 +1,10 @@
+"""
+URL-конфигурация профиля DJANGO_PROCESS_PROFILE=api (см. settings.py):
+только JSON API задач, без админки, HTML-страниц и страниц входа.
+Сессия — общая с основным приложением (вход выполняется там).
+"""
+from django.urls import include, path
+
+urlpatterns = [
+    path("", include("tasks.api_urls")),
+]
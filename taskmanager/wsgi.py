@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'taskmanager.settings')
 
 application = get_wsgi_application()
+
+# Прогрев URL-резолвера, переводов и шаблонов до первого запроса (taskmanager/startup.py)
+from taskmanager.startup import prewarm  # noqa: E402
+
+prewarm()
@@ -0,0 +1,338 @@
+"""
+Журнал изменений задач (TaskActivity): статус, приоритет и дедлайн — для отчётов
+по SLA и панели «История» на странице задачи.
+
+Запись:
+- изменения пишутся из путей сохранения: TaskUpdateView / AsyncTaskUpdateView
+  (record_save), TaskAdmin.save_model и массовые действия (record по строкам,
+  прочитанным до UPDATE)
+- старые значения берутся из снимка, сделанного при загрузке задачи (post_init,
+  tasks/signals.py) — без лишнего SELECT перед сохранением
+- в журнал попадают только изменившиеся поля, строкой "s=TODO>DONE;p=2>3"
+  (код поля = старое>новое, пустое значение — None)
+- записи копятся в буфере процесса и только после коммита транзакции (откатившиеся
+  изменения не попадают в журнал); буфер сбрасывается одним bulk_create после
+  отправки ответа (сигнал request_finished) — запрос на INSERT журнала не ждёт.
+  Цена: записи, не сброшенные до аварийного падения процесса, теряются
+
+Чтение: task_history() — по индексу (task_id, at), owner_history() — по (owner_id, at).
+
+Обслуживание (manage.py compact_activity):
+- compact(): записи старше TASKS_ACTIVITY_COMPACT_AFTER_DAYS схлопываются до одной
+  на задачу за день (первое старое значение -> последнее новое)
+- purge(): записи старше TASKS_ACTIVITY_RETENTION_DAYS удаляются
+"""
+import logging
+import threading
+from datetime import date, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.formats import date_format
+
+from .cards import PRIORITY_LABELS, STATUS_LABELS
+from .models import TaskActivity
+
+logger = logging.getLogger(__name__)
+
+# Отслеживаемое поле -> код в строке изменений
+FIELD_CODES = {"status": "s", "priority": "p", "due_date": "d"}
+CODE_FIELDS = {code: name for name, code in FIELD_CODES.items()}
+
+FIELD_LABELS = {"status": "Статус", "priority": "Приоритет", "due_date": "Дедлайн"}
+
+_buffer = []
+_lock = threading.Lock()
+
+
+def enabled():
+    return getattr(settings, "TASKS_ACTIVITY", True)
+
+
+def batch_size():
+    return getattr(settings, "TASKS_ACTIVITY_BATCH_SIZE", 500)
+
+
+# --- Кодирование -----------------------------------------------------------------------
+
+def _dump(value):
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _load(name, text):
+    if text == "":
+        return None
+    if name == "priority":
+        return int(text)
+    if name == "due_date":
+        return date.fromisoformat(text)
+    return text
+
+
+def encode(changes):
+    """
+    {"status": ("TODO", "DONE"), "priority": (2, 3)} -> "s=TODO>DONE;p=2>3".
+    """
+    return ";".join(
+        f"{FIELD_CODES[name]}={_dump(old)}>{_dump(new)}"
+        for name, (old, new) in changes.items()
+    )
+
+
+def decode(text):
+    """
+    Обратное encode(): строка изменений -> {поле: (старое, новое)}.
+    """
+    changes = {}
+    for part in text.split(";"):
+        if not part:
+            continue
+        code, _, values = part.partition("=")
+        name = CODE_FIELDS[code]
+        old, _, new = values.partition(">")
+        changes[name] = (_load(name, old), _load(name, new))
+    return changes
+
+
+def merge(changes_list):
+    """
+    Несколько изменений подряд (по времени) -> одно: для каждого поля первое старое
+    значение и последнее новое; поля, вернувшиеся к исходному значению, выпадают.
+    """
+    merged = {}
+    for changes in changes_list:
+        for name, (old, new) in changes.items():
+            merged[name] = (merged[name][0] if name in merged else old, new)
+    return {
+        name: merged[name]
+        for name in FIELD_CODES
+        if name in merged and merged[name][0] != merged[name][1]
+    }
+
+
+# --- Запись ----------------------------------------------------------------------------
+
+def snapshot(instance):
+    """
+    Значения отслеживаемых полей в момент загрузки задачи (отложенные поля пропускаются).
+    """
+    loaded = instance.__dict__
+    return {name: loaded[name] for name in FIELD_CODES if name in loaded}
+
+
+def diff(before, after):
+    """
+    Изменившиеся отслеживаемые поля: {поле: (старое, новое)}.
+    """
+    return {
+        name: (before[name], after[name])
+        for name in FIELD_CODES
+        if name in before and name in after and before[name] != after[name]
+    }
+
+
+def record(entries, actor_id=None, using=None):
+    """
+    Добавляет в журнал изменения [(owner_id, task_id, {поле: (старое, новое)}), ...].
+    Записи уходят в буфер после коммита текущей транзакции.
+    """
+    if not enabled():
+        return
+    now = timezone.now()
+    rows = [
+        TaskActivity(task_id=task_id, owner_id=owner_id, actor_id=actor_id, at=now, changes=encode(changes))
+        for owner_id, task_id, changes in entries
+        if changes
+    ]
+    if rows:
+        transaction.on_commit(partial(_enqueue, rows), using=using)
+
+
+def record_save(task, actor_id=None, using=None):
+    """
+    Изменения сохранённой задачи относительно снимка при загрузке.
+    Снимок обновляется: повторный вызов после следующего save() запишет только новое.
+    """
+    before = getattr(task, "_activity_snapshot", None)
+    if before is None:
+        return
+    after = snapshot(task)
+    task._activity_snapshot = after
+    record([(task.owner_id, task.pk, diff(before, after))], actor_id, using)
+
+
+def _enqueue(rows):
+    with _lock:
+        _buffer.extend(rows)
+
+
+def flush(**kwargs):
+    """
+    Записывает накопленные записи одним bulk_create. Возвращает число записей.
+    Вызывается после каждого запроса (request_finished) и при выходе процесса;
+    ошибка записи журнала логируется и не ломает запрос.
+    """
+    if not _buffer:
+        return 0
+    with _lock:
+        rows = _buffer[:]
+        _buffer.clear()
+    try:
+        TaskActivity.objects.bulk_create(rows, batch_size=batch_size())
+    except DatabaseError:
+        logger.exception("Не удалось записать журнал изменений задач (%d записей)", len(rows))
+        return 0
+    return len(rows)
+
+
+# --- Чтение ----------------------------------------------------------------------------
+
+def task_history(task_id, limit=None):
+    """
+    Последние изменения задачи, новые сверху (индекс activity_task_at_idx).
+    """
+    if limit is None:
+        limit = getattr(settings, "TASKS_ACTIVITY_HISTORY_LIMIT", 50)
+    return TaskActivity.objects.filter(task_id=task_id).order_by("-at", "-id")[:limit]
+
+
+def owner_history(owner_id, start=None, end=None):
+    """
+    Изменения задач владельца за период [start, end), по времени (индекс activity_owner_at_idx).
+    """
+    qs = TaskActivity.objects.filter(owner_id=owner_id)
+    if start is not None:
+        qs = qs.filter(at__gte=start)
+    if end is not None:
+        qs = qs.filter(at__lt=end)
+    return qs.order_by("at", "id")
+
+
+def _label(name, value):
+    if value is None:
+        return "—"
+    if name == "status":
+        return STATUS_LABELS.get(value, value)
+    if name == "priority":
+        return PRIORITY_LABELS.get(value, value)
+    return date_format(value)
+
+
+def history_rows(entries, owner_id):
+    """
+    Записи журнала -> строки панели «История»:
+    {"at", "actor": "владелец" / "администратор", "changes": [(поле, было, стало), ...]}.
+    """
+    rows = []
+    for entry in entries:
+        rows.append({
+            "at": entry.at,
+            "actor": "владелец" if entry.actor_id in (None, owner_id) else "администратор",
+            "changes": [
+                (FIELD_LABELS[name], _label(name, old), _label(name, new))
+                for name, (old, new) in decode(entry.changes).items()
+            ],
+        })
+    return rows
+
+
+# --- Обслуживание ----------------------------------------------------------------------
+
+def retention():
+    return timedelta(days=getattr(settings, "TASKS_ACTIVITY_RETENTION_DAYS", 365))
+
+
+def compact_after():
+    return timedelta(days=getattr(settings, "TASKS_ACTIVITY_COMPACT_AFTER_DAYS", 30))
+
+
+def purge(older_than=None, batch_size=10_000):
+    """
+    Удаляет записи старше срока хранения (пачками). Возвращает число удалённых строк.
+    """
+    cutoff = timezone.now() - (older_than if older_than is not None else retention())
+    deleted = 0
+    while True:
+        ids = list(
+            TaskActivity.objects.filter(at__lt=cutoff)
+            .order_by("at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += TaskActivity.objects.filter(id__in=ids).delete()[0]
+
+
+def compact(older_than=None, batch_size=10_000):
+    """
+    Схлопывает записи старше older_than (по умолчанию TASKS_ACTIVITY_COMPACT_AFTER_DAYS):
+    все изменения задачи за один день -> одна запись (merge) со временем последнего
+    изменения; если за день поле вернулось к исходному значению, запись удаляется.
+
+    Для дневных отчётов SLA этого достаточно, а строк в журнале становится меньше.
+    Повторный запуск ничего не меняет. Возвращает (изменено, удалено).
+    """
+    cutoff = timezone.now() - (older_than if older_than is not None else compact_after())
+    old = TaskActivity.objects.filter(at__lt=cutoff).order_by("task_id", "at", "id")
+    updated = deleted = 0
+
+    # Строки читаются страницами по (задача, время, id), изменения пишутся между
+    # страницами: SQLite не изолирует открытый курсор от записей в ту же таблицу.
+    # Группа — подряд идущие записи одной задачи за один день; последняя группа
+    # страницы может продолжиться на следующей, поэтому закрывается позже
+    group, key, last = [], None, None
+    while True:
+        page = old
+        if last is not None:
+            task_id, at, row_id = last
+            page = page.filter(
+                Q(task_id__gt=task_id)
+                | Q(task_id=task_id, at__gt=at)
+                | Q(task_id=task_id, at=at, id__gt=row_id)
+            )
+        rows = list(page.values_list("id", "task_id", "at", "changes")[:batch_size])
+
+        updates, delete_ids = [], []
+        for row_id, task_id, at, changes in rows:
+            row_key = (task_id, timezone.localdate(at))
+            if row_key != key:
+                _close_group(group, updates, delete_ids)
+                group, key = [], row_key
+            group.append((row_id, changes))
+        if not rows:
+            _close_group(group, updates, delete_ids)
+
+        with transaction.atomic():
+            if updates:
+                TaskActivity.objects.bulk_update(updates, ["changes"], batch_size=batch_size)
+            if delete_ids:
+                TaskActivity.objects.filter(id__in=delete_ids).delete()
+        updated += len(updates)
+        deleted += len(delete_ids)
+
+        if not rows:
+            return updated, deleted
+        last = rows[-1][1], rows[-1][2], rows[-1][0]
+
+
+def _close_group(group, updates, delete_ids):
+    """
+    Записи одной задачи за день [(id, changes), ...] -> одна запись: последняя получает
+    объединённые изменения, остальные удаляются (и она тоже, если изменений не осталось).
+    """
+    if len(group) < 2:
+        return
+    merged = merge([decode(changes) for _, changes in group])
+    *older, (last_id, _) = group
+    delete_ids.extend(row_id for row_id, _ in older)
+    if merged:
+        updates.append(TaskActivity(id=last_id, changes=encode(merged)))
+    else:
+        delete_ids.append(last_id)
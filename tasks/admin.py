@@ -1,5 +1,74 @@
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+from . import activity, counters
 from .models import Task
+from .search import task_search, user_search
+
+User = get_user_model()
+
+# Параметры списка админки, которые не фильтруют строки (страница, сортировка и т.п.)
+_NON_FILTER_PARAMS = {"p", "o", "all", "_facets"}
+
+
+class CounterChoicesFilter(admin.SimpleListFilter):
+    """
+    Фильтр по полю с choices; рядом с вариантом — количество задач из счётчиков
+    (counters.global_counts), без COUNT / DISTINCT по таблице задач.
+    """
+    field = None
+    options = ()  # (значение, подпись), как у choices поля
+    index = 0  # позиция поля в ключе (status, priority)
+
+    def lookups(self, request, model_admin):
+        totals = {}
+        for key, count in counters.global_counts().items():
+            totals[key[self.index]] = totals.get(key[self.index], 0) + count
+        return [(str(value), f"{label} ({totals.get(value, 0)})") for value, label in self.options]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.field: self.value()})
+        return queryset
+
+
+class StatusFilter(CounterChoicesFilter):
+    title = "Статус"
+    parameter_name = field = "status"
+    options = Task.Status.choices
+    index = 0
+
+
+class PriorityFilter(CounterChoicesFilter):
+    title = "Приоритет"
+    parameter_name = field = "priority"
+    options = Task.Priority.choices
+    index = 1
+
+
+class TaskAdminPaginator(Paginator):
+    """
+    Пагинатор админки без COUNT(*) по всей таблице:
+    - estimated_count — готовое число (из счётчиков), если оно известно
+    - иначе COUNT по не более чем TASKS_ADMIN_COUNT_LIMIT строкам
+      (дальше страниц просто не будет — для поиска этого достаточно)
+    """
+
+    def __init__(self, *args, estimated_count=None, **kwargs):
+        self.estimated_count = estimated_count
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.estimated_count is not None:
+            return self.estimated_count
+        limit = getattr(settings, "TASKS_ADMIN_COUNT_LIMIT", 10_000)
+        return self.object_list.order_by()[:limit].count()
 
 
 @admin.register(Task)
@@ -25,13 +94,83 @@ class TaskAdmin(admin.ModelAdmin):
         "created_at", # дата создания
     )
 
+    # Владелец подгружается JOIN-ом в том же запросе, а не отдельным запросом на строку
+    list_select_related = ("owner",)
+
     # Фильтры в правой колонке админки.
-    # Позволяют быстро отфильтровать задачи по статусу и приоритету.
-    list_filter = ("status", "priority")
+    # Позволяют быстро отфильтровать задачи по статусу и приоритету;
+    # количества рядом с вариантами берутся из счётчиков.
+    list_filter = (StatusFilter, PriorityFilter)
+
+    # Режим для большой таблицы:
+    # - сортировка только по id: это порядок rowid, страница читается без сортировки
+    #   (для других колонок нет глобальных индексов — сортировка всей таблицы)
+    # - без второго COUNT(*) по всей таблице («показать все N») и без фасетов
+    # - число строк для пагинации — из счётчиков или ограниченный COUNT (TaskAdminPaginator)
+    ordering = ("-id",)
+    sortable_by = ("id",)
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    paginator = TaskAdminPaginator
 
     # Поиск сверху в админке.
     # Ищет по:
     # - title (название задачи)
     # - description (описание)
     # - owner__username (username владельца)
+    # Сам поиск выполняется по полнотекстовым индексам, см. get_search_results.
     search_fields = ("title", "description", "owner__username")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Изменения статуса / приоритета / дедлайна — в журнал (tasks/activity.py)
+        if change:
+            activity.record_save(obj, actor_id=request.user.pk)
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Поиск через полнотекстовые индексы вместо LIKE по трём полям с JOIN:
+        - title/description — FTS5 по задачам
+        - owner__username — триграммный индекс по пользователям,
+          сначала находим id пользователей, потом задачи по owner_id
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+
+        user_q = user_search.search_q(search_term, using=queryset.db)
+        owner_ids = User.objects.using(queryset.db).filter(user_q).values("pk")
+        condition = task_search.search_q(search_term, using=queryset.db) | Q(owner_id__in=owner_ids)
+        queryset = queryset.filter(condition)
+
+        # Пока не выбрана сортировка по колонке — сначала самые релевантные (bm25),
+        # задачи, найденные только по владельцу, — после совпадений по тексту
+        rank = task_search.rank_expression(search_term, Task, using=queryset.db)
+        if rank is not None and not request.GET.get(ORDER_VAR):
+            queryset = queryset.annotate(search_rank=rank).order_by(
+                F("search_rank").asc(nulls_last=True), *queryset.query.order_by
+            )
+        return queryset, False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            estimated_count=self.estimated_count(request),
+        )
+
+    def estimated_count(self, request):
+        """
+        Число строк из счётчиков, если список отфильтрован только по статусу
+        и/или приоритету (или не отфильтрован вовсе); иначе None.
+        """
+        params = {key: value for key, value in request.GET.items() if key not in _NON_FILTER_PARAMS}
+        if not set(params) <= {"status", "priority"}:
+            return None
+        status = params.get("status")
+        priority = params.get("priority")
+        return sum(
+            count
+            for (row_status, row_priority), count in counters.global_counts().items()
+            if (not status or row_status == status)
+            and (not priority or str(row_priority) == priority)
+        )
@@ -0,0 +1,462 @@
+"""
+Отчёты по задачам: создано / выполнено за неделю, медианное время от создания
+до выполнения и доля выполненных с опозданием — по каждому пользователю и по всем.
+
+Отчёт читается из сводки TaskWeeklyStats (строка на владельца и неделю, плюс строка
+owner_id = 0 по всем), а не из tasks_task: на 10M задач страница отчёта читает
+десятки строк сводки.
+
+Обновление сводки — refresh() (manage.py refresh_analytics или фоновое задание
+"refresh_analytics"), инкрементально от водяных знаков ReportWatermark:
+- созданные задачи: новые id в tasks_task, диапазонами по первичному ключу;
+  число за неделю считает SQL (GROUP BY owner_id, неделя)
+- выполненные: новые записи журнала изменений (tasks/activity.py) с переходом
+  в DONE; даты создания и дедлайны задач читаются одним запросом на пачку,
+  дальше — подсчёт по кортежам values_list, без загрузки объектов моделей
+- дельты складываются с уже сохранёнными строками сводки в одной транзакции
+  с продвижением водяного знака: повторный или прерванный запуск не считает дважды
+
+Медиана хранится не точной, а гистограммой по геометрическим корзинам (шаг x1.25
+от минуты): гистограммы складываются между неделями и пользователями, медиана
+восстанавливается интерполяцией внутри корзины (погрешность — до ~12%).
+
+Ограничения:
+- выполнение = запись журнала со статусом -> DONE (задача, созданная сразу
+  выполненной, получает запись "s=>DONE" при создании — tasks/signals.py, import_tasks);
+  задачи, выполненные до появления журнала, учитываются только при полном
+  пересчёте (rebuild) — по updated_at
+- выполнение задачи, удалённой до обновления сводки, не учитывается
+  (неизвестна дата создания)
+"""
+import math
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, DateField, Exists, Max, OuterRef, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from .models import ArchivedTask, Job, ReportWatermark, Task, TaskActivity, TaskWeeklyStats
+
+# owner_id строки сводки по всем пользователям
+GLOBAL = 0
+
+# Корзины гистограммы времени выполнения: 0 — меньше минуты,
+# корзина b >= 1 — [60 * 1.25^(b-1), 60 * 1.25^b) секунд; последняя — всё, что дольше
+_BIN_BASE = 60
+_BIN_RATIO = 1.25
+MAX_BIN = 80
+
+# Поля-счётчики сводки (всё, кроме гистограммы)
+COUNTERS = ("created", "completed", "completed_with_due", "completed_late", "cycle_seconds")
+
+DEFAULT_WEEKS = 12
+MAX_WEEKS = 104
+
+
+def batch_size():
+    return getattr(settings, "TASKS_ANALYTICS_BATCH_SIZE", 50_000)
+
+
+# --- Недели и гистограммы --------------------------------------------------------------
+
+def week_start(day):
+    """
+    Понедельник недели, в которую попадает дата day.
+    """
+    return day - timedelta(days=day.weekday())
+
+
+def cycle_bin(seconds):
+    if seconds < _BIN_BASE:
+        return 0
+    return min(int(math.log(seconds / _BIN_BASE, _BIN_RATIO)) + 1, MAX_BIN)
+
+
+def _bin_bounds(index):
+    if index == 0:
+        return 0, _BIN_BASE
+    return _BIN_BASE * _BIN_RATIO ** (index - 1), _BIN_BASE * _BIN_RATIO ** index
+
+
+def merge_histograms(histograms):
+    """
+    Сумма гистограмм {"корзина": число} (ключи — строки, как их хранит JSONField).
+    """
+    total = Counter()
+    for histogram in histograms:
+        total.update({int(key): count for key, count in histogram.items()})
+    return total
+
+
+def histogram_median(histogram):
+    """
+    Медиана по гистограмме {корзина: число} в секундах (None, если пусто):
+    находим корзину, в которую попадает середина, и интерполируем внутри неё.
+    """
+    total = sum(histogram.values())
+    if not total:
+        return None
+    half = total / 2
+    seen = 0
+    for index in sorted(histogram):
+        count = histogram[index]
+        if seen + count >= half:
+            low, high = _bin_bounds(index)
+            return low + (high - low) * (half - seen) / count
+        seen += count
+
+
+# --- Обновление сводки -----------------------------------------------------------------
+
+def _empty():
+    return {name: 0 for name in COUNTERS} | {"hist": Counter()}
+
+
+class RefreshConflict(Exception):
+    """
+    Водяной знак сдвинул другой процесс (параллельное обновление сводки).
+    """
+
+
+def _watermarks():
+    return {
+        name: ReportWatermark.objects.get_or_create(name=name)[0].last_id
+        for name in ("tasks", "activity")
+    }
+
+
+def _apply(deltas, advance=None):
+    """
+    Прибавляет дельты {(owner_id, week): {...}} к строкам сводки (и к строкам owner_id = 0).
+
+    advance = (водяной знак, было, стало): знак сдвигается в той же транзакции условным
+    UPDATE ... WHERE last_id = было — первым запросом, он же берёт блокировку записи.
+    Если знак уже сдвинул параллельный запуск — RefreshConflict и откат: дельты
+    не будут посчитаны дважды.
+    """
+    for (owner_id, week), delta in list(deltas.items()):
+        total = deltas.setdefault((GLOBAL, week), _empty())
+        for name in COUNTERS:
+            total[name] += delta[name]
+        total["hist"].update(delta["hist"])
+
+    with transaction.atomic():
+        if advance is not None:
+            name, low, high = advance
+            moved = ReportWatermark.objects.filter(name=name, last_id=low).update(
+                last_id=high, updated_at=timezone.now()
+            )
+            if not moved:
+                raise RefreshConflict(name)
+
+        existing = {}
+        if deltas:
+            owners = {owner_id for owner_id, _ in deltas}
+            weeks = {week for _, week in deltas}
+            existing = {
+                (row.owner_id, row.week): row
+                for row in TaskWeeklyStats.objects.filter(owner_id__in=owners, week__in=weeks)
+            }
+
+        # Итоговые значения строк пишутся одним INSERT ... ON CONFLICT (owner_id, week)
+        # DO UPDATE на пачку: bulk_update строит CASE по каждой строке и на тысячах
+        # строк в разы медленнее
+        rows = []
+        for (owner_id, week), delta in deltas.items():
+            old = existing.get((owner_id, week))
+            histogram = merge_histograms([old.cycle_histogram] if old else [])
+            histogram.update(delta["hist"])
+            rows.append(TaskWeeklyStats(
+                owner_id=owner_id,
+                week=week,
+                cycle_histogram={str(index): count for index, count in sorted(histogram.items())},
+                **{name: (getattr(old, name) if old else 0) + delta[name] for name in COUNTERS},
+            ))
+        TaskWeeklyStats.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["owner_id", "week"],
+            update_fields=[*COUNTERS, "cycle_histogram"],
+        )
+
+
+def _created_deltas(model, low, high):
+    """
+    Созданные задачи с id в (low, high] — SQL-агрегат по (владелец, неделя).
+    """
+    rows = (
+        model.objects.filter(pk__gt=low, pk__lte=high)
+        .annotate(week=TruncWeek("created_at", output_field=DateField()))
+        .values_list("owner_id", "week")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    deltas = defaultdict(_empty)
+    for owner_id, week, n in rows:
+        deltas[(owner_id, week)]["created"] += n
+    return deltas
+
+
+def _add_completions(deltas, completions, tasks):
+    """
+    completions — [(task_id, owner_id, когда выполнена)], tasks — {task_id: (создана, дедлайн)}.
+    """
+    for task_id, owner_id, done_at in completions:
+        info = tasks.get(task_id)
+        if info is None:
+            continue
+        created_at, due_date = info
+        seconds = max(int((done_at - created_at).total_seconds()), 0)
+        done_day = timezone.localdate(done_at)
+
+        delta = deltas[(owner_id, week_start(done_day))]
+        delta["completed"] += 1
+        delta["cycle_seconds"] += seconds
+        delta["hist"][cycle_bin(seconds)] += 1
+        if due_date is not None:
+            delta["completed_with_due"] += 1
+            delta["completed_late"] += int(done_day > due_date)
+
+
+def _task_info(task_ids):
+    """
+    {task_id: (created_at, due_date)} для задач из списка — в tasks_task или в архиве.
+    """
+    info = {}
+    for model in (Task, ArchivedTask):
+        missing = [task_id for task_id in task_ids if task_id not in info]
+        if not missing:
+            break
+        for chunk_start in range(0, len(missing), 500):
+            chunk = missing[chunk_start:chunk_start + 500]
+            info.update(
+                (pk, (created_at, due_date))
+                for pk, created_at, due_date in model.objects.filter(pk__in=chunk)
+                .values_list("pk", "created_at", "due_date")
+            )
+    return info
+
+
+def _completion_deltas(low, high):
+    """
+    Переходы в DONE из журнала изменений с id в (low, high].
+    """
+    completions = list(
+        TaskActivity.objects.filter(pk__gt=low, pk__lte=high, changes__contains=">DONE")
+        .values_list("task_id", "owner_id", "at")
+    )
+    deltas = defaultdict(_empty)
+    if completions:
+        _add_completions(deltas, completions, _task_info(list({row[0] for row in completions})))
+    return deltas
+
+
+def _id_ranges(low, high, step):
+    while low < high:
+        yield low, min(low + step, high)
+        low += step
+
+
+def _seed_legacy_completions(step):
+    """
+    Выполненные задачи без записи о переходе в DONE (выполнены до появления журнала;
+    записи о других полях не в счёт): временем выполнения считается updated_at.
+    """
+    for model in (Task, ArchivedTask):
+        done = model.objects.filter(status=Task.Status.DONE).filter(
+            ~Exists(TaskActivity.objects.filter(task_id=OuterRef("pk"), changes__contains=">DONE"))
+        )
+        high = model.objects.aggregate(high=Max("pk"))["high"] or 0
+        for low, top in _id_ranges(0, high, step):
+            rows = list(
+                done.filter(pk__gt=low, pk__lte=top)
+                .values_list("pk", "owner_id", "updated_at", "created_at", "due_date")
+            )
+            if not rows:
+                continue
+            deltas = defaultdict(_empty)
+            _add_completions(
+                deltas,
+                [(pk, owner_id, updated_at) for pk, owner_id, updated_at, _, _ in rows],
+                {pk: (created_at, due_date) for pk, _, _, created_at, due_date in rows},
+            )
+            _apply(deltas)
+
+
+def refresh(progress=None, step=None):
+    """
+    Дописывает в сводку задачи и записи журнала, появившиеся после прошлого обновления.
+    progress(done, total) — необязательный колбэк (для фонового задания).
+    Возвращает {"tasks": обработано id, "activity": обработано id}.
+    """
+    step = step or batch_size()
+    marks = _watermarks()
+    # Новые id, которые появятся во время обновления, достанутся следующему запуску
+    highs = {
+        "tasks": Task.objects.aggregate(high=Max("pk"))["high"] or 0,
+        "activity": TaskActivity.objects.aggregate(high=Max("pk"))["high"] or 0,
+    }
+    deltas_for = {"tasks": partial(_created_deltas, Task), "activity": _completion_deltas}
+
+    total = sum(max(highs[name] - marks[name], 0) for name in marks)
+    result = {"tasks": 0, "activity": 0}
+    for name, build in deltas_for.items():
+        for low, high in _id_ranges(marks[name], highs[name], step):
+            _apply(build(low, high), advance=(name, low, high))
+            result[name] += high - low
+            if progress:
+                progress(sum(result.values()), total)
+
+    # Время обновления — даже если нового ничего не было
+    ReportWatermark.objects.filter(name="tasks").update(updated_at=timezone.now())
+    return result
+
+
+def rebuild(progress=None, step=None):
+    """
+    Полный пересчёт сводки: очистка и refresh() с нуля, плюс задачи из архива
+    и выполненные задачи, которых нет в журнале.
+    """
+    step = step or batch_size()
+    with transaction.atomic():
+        TaskWeeklyStats.objects.all().delete()
+        ReportWatermark.objects.all().delete()
+
+    high = ArchivedTask.objects.aggregate(high=Max("pk"))["high"] or 0
+    for low, top in _id_ranges(0, high, step):
+        _apply(_created_deltas(ArchivedTask, low, top))
+    _seed_legacy_completions(step)
+    return refresh(progress=progress, step=step)
+
+
+def last_refreshed():
+    return (
+        ReportWatermark.objects.filter(name="tasks").values_list("updated_at", flat=True).first()
+    )
+
+
+def ensure_fresh():
+    """
+    Ставит фоновое обновление сводки, если она старше TASKS_ANALYTICS_MAX_AGE секунд
+    и обновление ещё не стоит в очереди. Возвращает время последнего обновления.
+    """
+    from . import jobs
+
+    refreshed_at = last_refreshed()
+    max_age = timedelta(seconds=getattr(settings, "TASKS_ANALYTICS_MAX_AGE", 300))
+    if refreshed_at is None or timezone.now() - refreshed_at > max_age:
+        pending = Job.objects.filter(
+            kind="refresh_analytics", status__in=[Job.Status.QUEUED, Job.Status.RUNNING]
+        ).exists()
+        if not pending:
+            jobs.enqueue("refresh_analytics", max_attempts=1)
+    return refreshed_at
+
+
+# --- Чтение отчёта ---------------------------------------------------------------------
+
+def parse_weeks(value):
+    """
+    Параметр ?weeks=N (1..MAX_WEEKS); пустой — DEFAULT_WEEKS. Ошибка — ValueError.
+    """
+    if not value:
+        return DEFAULT_WEEKS
+    if not value.isdigit() or not 1 <= int(value) <= MAX_WEEKS:
+        raise ValueError(f"weeks должен быть от 1 до {MAX_WEEKS}")
+    return int(value)
+
+
+def period(weeks, today=None):
+    """
+    Недели отчёта: понедельники последних weeks недель, включая текущую, по возрастанию.
+    """
+    current = week_start(today or timezone.localdate())
+    return [current - timedelta(weeks=i) for i in range(weeks - 1, -1, -1)]
+
+
+def _ratio(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def _hours(seconds):
+    return round(seconds / 3600, 2) if seconds is not None else None
+
+
+def _metrics(counts, histogram):
+    """
+    Итоговые показатели по сложенным счётчикам и гистограмме.
+    """
+    completed = counts["completed"]
+    return {
+        "created": counts["created"],
+        "completed": completed,
+        "median_cycle_hours": _hours(histogram_median(histogram)),
+        "mean_cycle_hours": _hours(counts["cycle_seconds"] / completed) if completed else None,
+        "overdue_ratio": _ratio(counts["completed_late"], counts["completed_with_due"]),
+    }
+
+
+def _sum_rows(rows):
+    counts = {name: sum(row[name] for row in rows) for name in COUNTERS}
+    return _metrics(counts, merge_histograms(row["cycle_histogram"] for row in rows))
+
+
+def owner_report(owner_id=GLOBAL, weeks=DEFAULT_WEEKS, today=None):
+    """
+    Отчёт владельца (или по всем, owner_id = 0): показатели по неделям и за весь период.
+    Одно чтение по префиксу уникального индекса (owner_id, week).
+    """
+    days = period(weeks, today)
+    rows = {
+        row["week"]: row
+        for row in TaskWeeklyStats.objects.filter(owner_id=owner_id, week__gte=days[0])
+        .values("week", *COUNTERS, "cycle_histogram")
+    }
+    series = []
+    for week in days:
+        row = rows.get(week)
+        series.append({"week": week, **(_sum_rows([row]) if row else _sum_rows([]))})
+    return {"weeks": series, "summary": _sum_rows(list(rows.values()))}
+
+
+def users_report(weeks=DEFAULT_WEEKS, page=1, per_page=20, today=None):
+    """
+    Показатели пользователей за период, больше всего выполнивших — сверху.
+
+    Сортировка и пагинация — SQL-агрегатом по сводке (GROUP BY owner_id);
+    гистограммы и имена читаются только для пользователей страницы.
+    Возвращает (страница Paginator, [строки]).
+    """
+    start = period(weeks, today)[0]
+    totals = (
+        TaskWeeklyStats.objects.filter(week__gte=start, owner_id__gt=GLOBAL)
+        .values("owner_id")
+        .annotate(**{name: Sum(name) for name in COUNTERS})
+        .order_by("-completed", "-created", "owner_id")
+    )
+    page = Paginator(totals, per_page).get_page(page)
+    owner_ids = [row["owner_id"] for row in page.object_list]
+
+    histograms = defaultdict(list)
+    for owner_id, histogram in TaskWeeklyStats.objects.filter(
+        owner_id__in=owner_ids, week__gte=start
+    ).values_list("owner_id", "cycle_histogram"):
+        histograms[owner_id].append(histogram)
+    names = dict(get_user_model().objects.filter(pk__in=owner_ids).values_list("pk", "username"))
+
+    rows = [
+        {
+            "owner_id": row["owner_id"],
+            "username": names.get(row["owner_id"]),
+            **_metrics(row, merge_histograms(histograms[row["owner_id"]])),
+        }
+        for row in page.object_list
+    ]
+    return page, rows
@@ -0,0 +1,306 @@
+"""
+JSON API задач (GET /api/tasks/, GET /api/tasks/<id>/).
+
+- только задачи текущего пользователя, те же фильтры, что у списка (?q=&status=&priority=)
+- ?fields=id,title,status — выбираются только нужные колонки (.values(...))
+- курсорная пагинация (?cursor=..., ?limit=N), как у списка в режиме keyset
+- ?archived=1 — вместе с архивными задачами (tasks/archive.py), у каждой строки
+  появляется признак "archived"
+- условный GET: ETag и Last-Modified по состоянию задач владельца
+  (последнее изменение или удаление + число задач из счётчиков). Если клиент прислал
+  If-None-Match с тем же ETag — 304 без выборки и сериализации задач.
+
+GET /api/tasks/dashboard/ — дашборд дедлайнов (количество и первые задачи по корзинам).
+GET /api/tasks/sync/ — инкрементальная синхронизация (изменения и удаления после курсора).
+GET /api/tasks/analytics/ — недельный отчёт по своим задачам (tasks/analytics.py).
+GET /api/jobs/<id>/ — состояние фонового задания (tasks/jobs.py), /download/ — его файл.
+
+Неавторизованный запрос получает 403 (без редиректа на страницу логина).
+"""
+import hashlib
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import InvalidPage
+from django.db.models import Max
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views import View
+
+from . import analytics, archive, counters, jobs, sync
+from .dashboard import DEFAULT_TOP, MAX_TOP, deadline_dashboard
+from .export import TASK_EXPORT_FIELDS
+from .filters import filter_tasks
+from .models import Job, Task, TaskTombstone
+from .pagination import KeysetPaginator
+
+# Поля, доступные через ?fields= (по умолчанию — все)
+API_FIELDS = TASK_EXPORT_FIELDS
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class ApiError(Exception):
+    """
+    Ошибка в параметрах запроса — отдаётся клиенту как 400 {"error": ...}.
+    """
+
+
+def parse_fields(value):
+    """
+    "id,title" -> ["id", "title"]; пустое значение — все поля API_FIELDS.
+    """
+    if not value:
+        return list(API_FIELDS)
+    fields = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in API_FIELDS]
+    if unknown:
+        raise ApiError(f"Неизвестные поля: {', '.join(unknown)}")
+    # Порядок и без повторов
+    return list(dict.fromkeys(fields))
+
+
+def parse_limit(value):
+    if not value:
+        return DEFAULT_LIMIT
+    if not value.isdigit() or not 1 <= int(value) <= MAX_LIMIT:
+        raise ApiError(f"limit должен быть от 1 до {MAX_LIMIT}")
+    return int(value)
+
+
+def owner_state(owner):
+    """
+    Состояние задач владельца для условного GET: (время последнего изменения, число задач).
+
+    Время последнего изменения — максимум из updated_at задач и deleted_at надгробий
+    (TaskTombstone, индекс tombstone_owner_deleted_idx): удаление задачи не меняет
+    максимальный updated_at, а Last-Modified после него должен вырасти.
+    Число задач — для ETag, на случай, если надгробия уже удалены по сроку хранения.
+    """
+    last_modified = max(
+        (
+            value
+            for value in (
+                Task.objects.filter(owner=owner).aggregate(last=Max("updated_at"))["last"],
+                TaskTombstone.objects.filter(owner_id=owner.pk).aggregate(last=Max("deleted_at"))["last"],
+            )
+            if value is not None
+        ),
+        default=None,
+    )
+    return last_modified, counters.owner_histogram(owner)["total"]
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+class ApiMixin(LoginRequiredMixin):
+    # Без редиректа на логин: API-клиенту нужен код ответа
+    raise_exception = True
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    def conditional(self, etag, last_modified, build):
+        """
+        304, если у клиента актуальная версия, иначе JSON из build().
+        Заголовки ETag / Last-Modified ставятся в обоих случаях.
+        """
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified_ts
+        )
+        if response is None:
+            response = JsonResponse(build(), json_dumps_params={"ensure_ascii": False})
+
+        response["ETag"] = etag
+        if last_modified_ts is not None:
+            response["Last-Modified"] = http_date(last_modified_ts)
+        # Клиент может хранить ответ, но обязан перепроверять его
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class TaskApiListView(ApiMixin, View):
+    """
+    GET /api/tasks/?fields=id,title&status=TODO&cursor=...&limit=50
+
+    Ответ: {"results": [...], "next_cursor": "...", "previous_cursor": null}
+    """
+
+    def get(self, request, *args, **kwargs):
+        fields = parse_fields(request.GET.get("fields", ""))
+        limit = parse_limit(request.GET.get("limit", ""))
+
+        last_modified, total = owner_state(request.user)
+        # Ответ зависит и от состояния данных, и от параметров запроса
+        etag = make_etag(request.user.pk, last_modified, total, request.GET.urlencode())
+
+        return self.conditional(etag, last_modified, lambda: self.build(fields, limit))
+
+    def build(self, fields, limit):
+        qs = filter_tasks(
+            Task.objects.filter(owner=self.request.user),
+            self.request.GET,
+            owner_id=self.request.user.pk,
+        )
+        if archive.requested(self.request.GET):
+            qs = archive.with_archived(qs, self.request.GET, self.request.user)
+            fields = fields + ["archived"]
+        # Ключ курсора (created_at, id) выбираем всегда, а в ответ отдаём только запрошенное
+        qs = qs.values(*dict.fromkeys(fields + ["created_at", "id"]))
+
+        try:
+            page = KeysetPaginator(qs, limit).page(self.request.GET.get("cursor"))
+        except InvalidPage as e:
+            raise ApiError(str(e))
+
+        return {
+            "results": [{name: row[name] for name in fields} for row in page.object_list],
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+        }
+
+
+class TaskApiDetailView(ApiMixin, View):
+    """
+    GET /api/tasks/<id>/?fields=... — одна задача; чужая — 403, несуществующая — 404.
+    """
+
+    def get(self, request, *args, **kwargs):
+        fields = parse_fields(request.GET.get("fields", ""))
+        pk = kwargs["pk"]
+
+        row = (
+            Task.objects.filter(owner=request.user, pk=pk)
+            .values(*dict.fromkeys(fields + ["updated_at"]))
+            .first()
+        )
+        if row is None:
+            if Task.objects.filter(pk=pk).exists():
+                raise PermissionDenied
+            raise Http404("Задача не найдена")
+
+        etag = make_etag(pk, row["updated_at"], request.GET.urlencode())
+        return self.conditional(
+            etag, row["updated_at"], lambda: {name: row[name] for name in fields}
+        )
+
+
+class TaskSyncView(ApiMixin, View):
+    """
+    GET /api/tasks/sync/?cursor=...&fields=id,title&limit=500 — изменения после курсора
+    (см. tasks/sync.py). Без курсора — все задачи, дальше только изменения и удаления.
+
+    Ответ: {"changed": [...], "deleted": [id, ...], "cursor": "...", "has_more": false}
+    Устаревший курсор — 410 {"error": ..., "reset": true}: клиенту нужно начать без курсора.
+    """
+
+    def get(self, request, *args, **kwargs):
+        fields = parse_fields(request.GET.get("fields", ""))
+        limit = parse_limit(request.GET.get("limit", "") or str(MAX_LIMIT))
+
+        try:
+            data = sync.changes(
+                request.user, request.GET.get("cursor"), fields=fields, limit=limit
+            )
+        except InvalidPage as e:
+            raise ApiError(str(e))
+        except sync.CursorExpired as e:
+            return JsonResponse({"error": str(e), "reset": True}, status=410)
+
+        return JsonResponse(data, json_dumps_params={"ensure_ascii": False})
+
+
+class TaskDashboardApiView(ApiMixin, View):
+    """
+    GET /api/tasks/dashboard/?top=5 — корзины дедлайнов незавершённых задач (tasks/dashboard.py).
+    """
+
+    def get(self, request, *args, **kwargs):
+        top = request.GET.get("top", "")
+        if not top:
+            top = DEFAULT_TOP
+        elif top.isdigit() and 1 <= int(top) <= MAX_TOP:
+            top = int(top)
+        else:
+            raise ApiError(f"top должен быть от 1 до {MAX_TOP}")
+
+        return JsonResponse(
+            deadline_dashboard(request.user, top=top), json_dumps_params={"ensure_ascii": False}
+        )
+
+
+class TaskAnalyticsApiView(ApiMixin, View):
+    """
+    GET /api/tasks/analytics/?weeks=12 — свои показатели по неделям и за период:
+    создано / выполнено, медиана и среднее время выполнения в часах, доля опозданий.
+    Читается из сводки TaskWeeklyStats; refreshed_at — когда она обновлялась.
+    """
+
+    def get(self, request, *args, **kwargs):
+        try:
+            weeks = analytics.parse_weeks(request.GET.get("weeks", ""))
+        except ValueError as e:
+            raise ApiError(str(e))
+
+        return JsonResponse(
+            {
+                **analytics.owner_report(request.user.pk, weeks),
+                "refreshed_at": analytics.ensure_fresh(),
+            },
+            json_dumps_params={"ensure_ascii": False},
+        )
+
+
+class JobMixin(ApiMixin):
+    """
+    Задание текущего пользователя: чужое — 403, несуществующее — 404.
+    """
+
+    def get_job(self):
+        pk = self.kwargs["pk"]
+        job = Job.objects.filter(pk=pk, owner=self.request.user).first()
+        if job is None:
+            if Job.objects.filter(pk=pk).exists():
+                raise PermissionDenied
+            raise Http404("Задание не найдено")
+        return job
+
+
+class JobApiView(JobMixin, View):
+    """
+    GET /api/jobs/<id>/ — {"id", "kind", "status", "progress", "message", "result", "error", ...}.
+    Клиент опрашивает, пока status не станет DONE или FAILED.
+    """
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_job()
+        data = jobs.job_state(job)
+        if job.status == Job.Status.DONE and (job.result or {}).get("file"):
+            data["download_url"] = reverse("job_download", args=[job.pk])
+        return JsonResponse(data, json_dumps_params={"ensure_ascii": False})
+
+
+class JobDownloadView(JobMixin, View):
+    """
+    GET /api/jobs/<id>/download/ — файл, который подготовило задание (выгрузка).
+    """
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_job()
+        result = job.result or {}
+        if job.status != Job.Status.DONE or not result.get("file"):
+            raise Http404("Файл ещё не готов")
+        path = jobs.jobs_dir() / result["file"]
+        if not path.exists():
+            raise Http404("Файл удалён")
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=result["filename"])
@@ -0,0 +1,25 @@
+"""
+Маршруты JSON API задач. Подключаются в tasks/urls.py вместе с остальными,
+а в профиле DJANGO_PROCESS_PROFILE=api — одни (taskmanager/urls_api.py):
+модуль не импортирует view с шаблонами и формами.
+"""
+from django.urls import path
+
+from .api import (
+    TaskApiListView, TaskApiDetailView, TaskSyncView, TaskDashboardApiView,
+    TaskAnalyticsApiView, JobApiView, JobDownloadView,
+)
+
+urlpatterns = [
+    # JSON API: /api/tasks/?fields=id,title&cursor=... и /api/tasks/5/
+    path("api/tasks/", TaskApiListView.as_view(), name="task_api_list"),
+    path("api/tasks/<int:pk>/", TaskApiDetailView.as_view(), name="task_api_detail"),
+    path("api/tasks/dashboard/", TaskDashboardApiView.as_view(), name="task_api_dashboard"),
+    # Недельный отчёт по своим задачам: /api/tasks/analytics/?weeks=12
+    path("api/tasks/analytics/", TaskAnalyticsApiView.as_view(), name="task_api_analytics"),
+    # Изменения после курсора: /api/tasks/sync/?cursor=...
+    path("api/tasks/sync/", TaskSyncView.as_view(), name="task_sync"),
+    # Фоновые задания: состояние и файл результата
+    path("api/jobs/<int:pk>/", JobApiView.as_view(), name="job_status"),
+    path("api/jobs/<int:pk>/download/", JobDownloadView.as_view(), name="job_download"),
+]
@@ -1,6 +1,39 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        # После migrate восстанавливаем SQL-триггеры, если SQLite пересоздал таблицы
+        from .triggers import ensure_triggers
+
+        post_migrate.connect(ensure_triggers, sender=self)
+
+        # PRAGMA для каждого нового соединения SQLite (WAL, busy_timeout и т.д.)
+        from taskmanager.sqlite import configure_connection
+
+        connection_created.connect(configure_connection)
+
+        # Счётчик SQL для метрик запросов (taskmanager/instrumentation.py) — на каждом
+        # соединении, в том числе в потоках sync_to_async у async-view
+        from taskmanager.instrumentation import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
+
+        # Сброс кэша списка задач при сохранении/удалении
+        from . import signals  # noqa: F401
+
+        # Журнал изменений (tasks/activity.py) пишется после отправки ответа
+        # и при выходе процесса — чтобы не потерять остаток буфера
+        import atexit
+
+        from django.core.signals import request_finished
+
+        from . import activity
+
+        request_finished.connect(activity.flush, dispatch_uid="tasks_activity_flush")
+        atexit.register(activity.flush)
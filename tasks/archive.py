@@ -0,0 +1,213 @@
+"""
+Архив выполненных задач («холодное» хранение).
+
+Выполненные задачи составляют большую часть tasks_task, но их почти не открывают.
+manage.py archive_tasks переносит задачи в статусе DONE, не менявшиеся N дней,
+в таблицу ArchivedTask (тот же id, те же поля) и удаляет их из tasks_task:
+- списки, счётчики, FTS-индекс и индексы владельца становятся меньше
+- удаление из tasks_task идёт обычным путём (триггеры, сигналы), поэтому
+  счётчики и FTS обновляются сами, клиенты синхронизации получают надгробия,
+  открытые вкладки — события «deleted»
+- восстановление (restore) возвращает задачи с новым updated_at,
+  клиенты синхронизации получают их как изменения
+
+Перенос и восстановление идут пачками по batch_size задач, каждая пачка —
+отдельная транзакция, чтобы не держать долгую блокировку записи.
+
+Список и API с ?archived=1 читают живые и архивные задачи вместе
+(ArchiveAwareTasks): обе части — диапазонные запросы по индексам
+(owner, -created_at, -id), которые сливаются в Python в общем порядке.
+"""
+import heapq
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Value
+from django.utils import timezone
+
+from . import cache as fragment_cache
+from .filters import filter_tasks
+from .models import ArchivedTask, Task
+
+# Поля, которые переносятся между Task и ArchivedTask
+ARCHIVE_FIELDS = [
+    "id", "owner_id", "title", "description", "status", "priority",
+    "due_date", "created_at", "updated_at",
+]
+
+
+def archive_after():
+    return timedelta(days=getattr(settings, "TASKS_ARCHIVE_AFTER_DAYS", 90))
+
+
+def requested(params):
+    """
+    Нужно ли показывать архивные задачи (?archived=1).
+    """
+    return params.get("archived", "").strip() in ("1", "true", "on")
+
+
+def archive(older_than=None, batch_size=1000):
+    """
+    Переносит в архив выполненные задачи, не менявшиеся дольше older_than
+    (по умолчанию TASKS_ARCHIVE_AFTER_DAYS дней). Возвращает число перенесённых задач.
+    """
+    cutoff = timezone.now() - (older_than if older_than is not None else archive_after())
+    moved = 0
+    while True:
+        with transaction.atomic():
+            # Частичный индекс task_done_updated_idx: только выполненные задачи
+            rows = list(
+                Task.objects.filter(status=Task.Status.DONE, updated_at__lt=cutoff)
+                .order_by("updated_at")
+                .values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                return moved
+            ArchivedTask.objects.bulk_create(ArchivedTask(**row) for row in rows)
+            Task.objects.filter(id__in=[row["id"] for row in rows]).delete()
+        moved += len(rows)
+
+
+def restore(owner=None, ids=None, batch_size=1000):
+    """
+    Возвращает задачи из архива в tasks_task (все, владельца owner и/или с id из ids).
+    Возвращает число восстановленных задач.
+    """
+    qs = ArchivedTask.objects.all()
+    if owner is not None:
+        qs = qs.filter(owner=owner)
+    if ids is not None:
+        qs = qs.filter(id__in=ids)
+
+    restored = 0
+    while True:
+        with transaction.atomic():
+            rows = list(qs.order_by("id").values(*ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                return restored
+            # bulk_create выставит updated_at = сейчас (auto_now): для синхронизации
+            # задача снова появилась
+            Task.objects.bulk_create(Task(**row) for row in rows)
+            ArchivedTask.objects.filter(id__in=[row["id"] for row in rows]).delete()
+
+        # bulk_create не шлёт сигналов — сбрасываем кэш списков владельцев явно
+        for owner_id in {row["owner_id"] for row in rows}:
+            fragment_cache.bump_owner_version(owner_id)
+        restored += len(rows)
+
+
+class ArchiveAwareTasks:
+    """
+    Живые и архивные задачи как одна ленивая последовательность в общем порядке.
+
+    Поддерживает то, что нужно Paginator, KeysetPaginator и API:
+    filter() / order_by() / values() применяются к обеим частям, срез [a:b]
+    ленивый, как у QuerySet; при чтении каждая часть отдаёт не больше b строк
+    в порядке своего индекса, и строки сливаются (heapq.merge) по ключу сортировки.
+    count() — сумма COUNT по частям. Поддерживается и async-итерация (async-view).
+
+    У строк есть признак archived (аннотация): True — задача из архива.
+    """
+
+    # Для Paginator: порядок задан, предупреждения о неупорядоченном списке не будет
+    ordered = True
+
+    def __init__(self, parts, ordering=("-created_at", "-id"), bounds=(0, None)):
+        directions = {field.startswith("-") for field in ordering}
+        if len(directions) != 1:
+            raise ValueError("Все поля сортировки должны идти в одном направлении")
+        self.parts = [part.order_by(*ordering) for part in parts]
+        self.ordering = tuple(ordering)
+        self.bounds = bounds
+        self._result = None
+
+    def _clone(self, parts=None, ordering=None, bounds=None):
+        return ArchiveAwareTasks(
+            parts if parts is not None else self.parts,
+            ordering or self.ordering,
+            bounds or self.bounds,
+        )
+
+    def filter(self, *args, **kwargs):
+        return self._clone(parts=[part.filter(*args, **kwargs) for part in self.parts])
+
+    def order_by(self, *fields):
+        return self._clone(ordering=fields)
+
+    def values(self, *fields):
+        return self._clone(parts=[part.values(*fields) for part in self.parts])
+
+    def count(self):
+        return sum(part.count() for part in self.parts)
+
+    async def acount(self):
+        total = 0
+        for part in self.parts:
+            total += await part.acount()
+        return total
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError("ArchiveAwareTasks поддерживает только срезы [a:b]")
+        start, stop = self.bounds
+        new_start = start + (key.start or 0)
+        new_stop = stop
+        if key.stop is not None:
+            new_stop = start + key.stop if stop is None else min(stop, start + key.stop)
+        return self._clone(bounds=(new_start, new_stop))
+
+    # --- чтение ---
+
+    def _key(self, row):
+        names = [field.lstrip("-") for field in self.ordering]
+        if isinstance(row, dict):
+            return tuple(row[name] for name in names)
+        return tuple(getattr(row, name) for name in names)
+
+    def _limited_parts(self):
+        # Каждой части нужно не больше stop строк: дальше общего среза они не попадут
+        stop = self.bounds[1]
+        return [part[:stop] if stop is not None else part for part in self.parts]
+
+    def _merge(self, chunks):
+        merged = heapq.merge(*chunks, key=self._key, reverse=self.ordering[0].startswith("-"))
+        return list(islice(merged, self.bounds[0], self.bounds[1]))
+
+    def _fetch(self):
+        if self._result is None:
+            self._result = self._merge([list(part) for part in self._limited_parts()])
+        return self._result
+
+    def __iter__(self):
+        return iter(self._fetch())
+
+    def __len__(self):
+        return len(self._fetch())
+
+    def __bool__(self):
+        return bool(self._fetch())
+
+    async def __aiter__(self):
+        if self._result is None:
+            chunks = []
+            for part in self._limited_parts():
+                chunks.append([row async for row in part])
+            self._result = self._merge(chunks)
+        for row in self._result:
+            yield row
+
+
+def with_archived(qs, params, owner):
+    """
+    qs (живые задачи владельца, уже отфильтрованные) плюс архивные задачи
+    владельца с теми же фильтрами. Архив ищется без FTS — подстрокой (icontains;
+    на SQLite регистр сворачивается только у латиницы, как и в запасном режиме поиска).
+    """
+    archived = filter_tasks(ArchivedTask.objects.filter(owner=owner), params, search=None)
+    return ArchiveAwareTasks([
+        qs.annotate(archived=Value(False, output_field=BooleanField())),
+        archived.annotate(archived=Value(True, output_field=BooleanField())),
+    ])
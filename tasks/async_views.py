@@ -0,0 +1,287 @@
+"""
+Async-версии view задач для запуска под ASGI (uvicorn / daphne, taskmanager/asgi.py).
+
+Включаются настройкой ASYNC_VIEWS (переменная окружения DJANGO_ASYNC_VIEWS=1):
+tasks/urls.py и accounts/urls.py тогда подключают эти классы вместо синхронных.
+Под WSGI (taskmanager/wsgi.py) включать не нужно — Django будет гонять
+каждый async-view через async_to_sync.
+
+Поведение и число SQL-запросов совпадают с синхронными view из tasks/views.py:
+- пользователь читается через request.auser() и кладётся в request.user,
+  чтобы шаблоны и контекст-процессоры не лезли в БД синхронно
+- данные читаются async ORM (aget / acount / async for), все QuerySet
+  материализуются до рендера, шаблон рендерится уже без обращений к БД
+- сохранение и удаление — asave() / adelete(), сигналы (сброс кэша списка) срабатывают как обычно
+
+Кэш фрагментов вызывается синхронно: для locmem это обращение к памяти.
+Для сетевого бэкенда кэша (Redis и т.п.) его стоит перевести на aget/aset.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+from django.views import View
+
+from . import cache as fragment_cache
+from . import activity, archive, counters, events
+from .cards import list_context, status_links
+from .filters import afilter_tasks, filter_query, rank_search_results
+from .forms import TaskForm
+from .models import Task
+from .pagination import KeysetPaginator
+from .views import TaskListView
+
+
+class AsyncLoginRequiredMixin:
+    """
+    Async-аналог LoginRequiredMixin (+ проверка test_user для админских view).
+    Неавторизованных перенаправляет на LOGIN_URL, не прошедших test_user — 403.
+    """
+
+    # True — 403 вместо редиректа (для API и потоков событий)
+    raise_exception = False
+
+    def test_user(self, user):
+        return True
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            if self.raise_exception:
+                raise PermissionDenied
+            return redirect_to_login(request.get_full_path())
+        # request.user — ленивый объект с синхронной загрузкой; подменяем готовым
+        request.user = user
+        if not self.test_user(user):
+            raise PermissionDenied
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncOwnedTaskMixin:
+    """
+    Async-аналог OwnerOnlyMixin: своя задача — один запрос,
+    чужая — 403, несуществующая — 404 (второй запрос только в этих случаях).
+    """
+
+    async def get_object(self):
+        pk = self.kwargs["pk"]
+        try:
+            return await Task.objects.filter(owner=self.request.user).aget(pk=pk)
+        except Task.DoesNotExist:
+            if await Task.objects.filter(pk=pk).aexists():
+                raise PermissionDenied
+            raise Http404("Задача не найдена")
+
+
+class AsyncTaskListView(AsyncLoginRequiredMixin, View):
+    """
+    Список задач, см. TaskListView: тот же шаблон, фрагментный кэш и режимы пагинации.
+    """
+    template_name = "tasks/task_list.html"
+    paginate_by = TaskListView.paginate_by
+
+    def get_pagination_mode(self):
+        return getattr(settings, "TASKS_PAGINATION", "offset")
+
+    async def get(self, request, *args, **kwargs):
+        mode = self.get_pagination_mode()
+        key = fragment_cache.list_fragment_key(request.user.pk, request.GET, mode)
+        fragment = fragment_cache.get_fragment(key)
+
+        if fragment is None:
+            context = await self.get_list_context(mode)
+            fragment = {
+                "html": TemplateResponse(
+                    request, "tasks/task_list_items.html", context
+                ).rendered_content,
+                "has_tasks": bool(context["tasks"]),
+            }
+            fragment_cache.set_fragment(key, fragment)
+
+        return TemplateResponse(
+            request,
+            self.template_name,
+            {
+                "filter_query": filter_query(self.request.GET),
+                "task_list_html": mark_safe(fragment["html"]),
+                "has_tasks": fragment["has_tasks"],
+                "events_enabled": events.stream_enabled(),
+            },
+        )
+
+    async def get_list_context(self, mode):
+        qs = await afilter_tasks(
+            Task.objects.filter(owner=self.request.user),
+            self.request.GET,
+            owner_id=self.request.user.pk,
+        )
+        if archive.requested(self.request.GET):
+            qs = archive.with_archived(qs, self.request.GET, self.request.user)
+        else:
+            qs = rank_search_results(qs, self.request.GET, mode)
+
+        if mode == "keyset":
+            paginator = KeysetPaginator(qs, self.paginate_by)
+            try:
+                page = await paginator.apage(self.request.GET.get("cursor"))
+            except InvalidPage as e:
+                raise Http404(str(e))
+        else:
+            paginator = Paginator(qs, self.paginate_by)
+            # cached_property: считаем заранее асинхронно, Paginator его не перезапросит
+            paginator.count = await qs.acount()
+            page_number = self.request.GET.get("page") or 1
+            try:
+                page = paginator.page(page_number)
+            except InvalidPage as e:
+                raise Http404(str(e))
+            page.object_list = [task async for task in page.object_list]
+
+        return {
+            **list_context(page, self.request.GET, keyset=mode == "keyset"),
+            "paginator": paginator,
+            "status_histogram": status_links(
+                await counters.astatus_histogram(self.request.user), self.request.GET
+            ),
+        }
+
+
+class AsyncTaskDetailView(AsyncLoginRequiredMixin, AsyncOwnedTaskMixin, View):
+    template_name = "tasks/task_detail.html"
+
+    async def get(self, request, *args, **kwargs):
+        task = await self.get_object()
+        entries = [entry async for entry in activity.task_history(task.pk)]
+        return TemplateResponse(
+            request,
+            self.template_name,
+            {"task": task, "object": task, "history": activity.history_rows(entries, task.owner_id)},
+        )
+
+
+class AsyncTaskFormMixin:
+    """
+    Общее у создания и редактирования: форма TaskForm и шаблон task_form.html.
+    TaskForm валидируется без запросов к БД (уникальных полей у Task нет).
+    """
+    template_name = "tasks/task_form.html"
+
+    def render_form(self, form, task=None):
+        return TemplateResponse(
+            self.request, self.template_name, {"form": form, "object": task}
+        )
+
+
+class AsyncTaskCreateView(AsyncLoginRequiredMixin, AsyncTaskFormMixin, View):
+
+    async def get(self, request, *args, **kwargs):
+        return self.render_form(TaskForm())
+
+    async def post(self, request, *args, **kwargs):
+        form = TaskForm(request.POST)
+        if not form.is_valid():
+            return self.render_form(form)
+
+        task = form.save(commit=False)
+        # Владелец — текущий пользователь, не из формы
+        task.owner = request.user
+        await task.asave()
+        return HttpResponseRedirect(reverse("task_list"))
+
+
+class AsyncTaskUpdateView(AsyncLoginRequiredMixin, AsyncOwnedTaskMixin, AsyncTaskFormMixin, View):
+
+    async def get(self, request, *args, **kwargs):
+        task = await self.get_object()
+        return self.render_form(TaskForm(instance=task), task)
+
+    async def post(self, request, *args, **kwargs):
+        task = await self.get_object()
+        form = TaskForm(request.POST, instance=task)
+        if not form.is_valid():
+            return self.render_form(form, task)
+
+        await form.save(commit=False).asave()
+        # transaction.on_commit() обращается к соединению — в том же потоке, что и asave()
+        await sync_to_async(activity.record_save)(task, actor_id=request.user.pk)
+        return HttpResponseRedirect(reverse("task_list"))
+
+
+class AsyncTaskDeleteView(AsyncLoginRequiredMixin, AsyncOwnedTaskMixin, View):
+    template_name = "tasks/task_confirm_delete.html"
+
+    async def get(self, request, *args, **kwargs):
+        task = await self.get_object()
+        return TemplateResponse(request, self.template_name, {"object": task, "task": task})
+
+    async def post(self, request, *args, **kwargs):
+        task = await self.get_object()
+        await task.adelete()
+        return HttpResponseRedirect(reverse("task_list"))
+
+
+class AsyncTaskEventsView(AsyncLoginRequiredMixin, View):
+    """
+    Поток изменений задач текущего пользователя (GET /events/), см. tasks/events.py.
+
+    - по умолчанию — Server-Sent Events (text/event-stream): по строке data: на событие
+      и комментарий-пинг раз в TASKS_EVENTS_HEARTBEAT секунд, чтобы прокси не рвали соединение
+    - ?poll=1 — long-poll: ждём до TASKS_EVENTS_POLL_TIMEOUT секунд и отдаём
+      {"events": [...]}; если ничего не случилось — 204
+
+    Доставка «не более одного раза»: события, случившиеся между переподключениями,
+    не хранятся — после переподключения клиент догоняет через /api/tasks/sync/.
+
+    Соединение держится долго, поэтому view рассчитан на ASGI: под WSGI каждая
+    открытая вкладка заняла бы поток сервера: маршрут есть только при ASYNC_VIEWS,
+    и отвечает 404, пока TASKS_EVENTS=False (events.stream_enabled()).
+    """
+    raise_exception = True
+
+    async def get(self, request, *args, **kwargs):
+        if not events.stream_enabled():
+            raise Http404("События выключены")
+
+        if request.GET.get("poll"):
+            return await self.long_poll(request.user.pk)
+
+        response = StreamingHttpResponse(
+            self.stream(request.user.pk), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # nginx: не буферизовать поток
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def encode(event):
+        return json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+    async def stream(self, owner_id):
+        heartbeat = getattr(settings, "TASKS_EVENTS_HEARTBEAT", 15)
+        with events.get_broker().subscribe(owner_id) as subscription:
+            # Через сколько мс браузеру переподключаться после обрыва
+            yield "retry: 5000\n\n"
+            while True:
+                event = await subscription.get(timeout=heartbeat)
+                if event is None:
+                    yield ": ping\n\n"
+                else:
+                    yield f"data: {self.encode(event)}\n\n"
+
+    async def long_poll(self, owner_id):
+        timeout = getattr(settings, "TASKS_EVENTS_POLL_TIMEOUT", 25)
+        with events.get_broker().subscribe(owner_id) as subscription:
+            event = await subscription.get(timeout=timeout)
+            if event is None:
+                return HttpResponse(status=204)
+            batch = [event, *subscription.drain()]
+        return JsonResponse({"events": batch}, json_dumps_params={"ensure_ascii": False})
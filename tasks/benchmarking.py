@@ -0,0 +1,209 @@
+"""
+Общие части бенчмарков: синтетические данные и замеры.
+
+Используется командой manage.py benchmark (и другими bench_* командами).
+Всё работает во временной тестовой БД, рабочая база не затрагивается.
+"""
+import gc
+import importlib
+import os
+import random
+import resource
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import clear_url_caches
+from django.utils import timezone
+
+from .models import Task
+
+User = get_user_model()
+
+# Масштабы: (всего задач, пользователей). Первый пользователь — «тяжёлый»,
+# у него POWER_USER_SHARE всех задач, остальные делят остаток поровну.
+SCALES = {
+    "1k": (1_000, 10),
+    "100k": (100_000, 100),
+    "1m": (1_000_000, 1_000),
+}
+POWER_USER_SHARE = 0.2
+BENCH_USER_PREFIX = "bench_user_"
+
+WORDS = [
+    "отчёт", "задача", "встреча", "договор", "клиент", "релиз", "проверка",
+    "бюджет", "план", "звонок", "report", "deploy", "review", "invoice", "backup",
+]
+
+
+def seed(total_tasks, users_count, batch_size=10_000, stdout=None):
+    """
+    Создаёт пользователей bench_user_N и total_tasks задач со случайными
+    статусами, приоритетами, дедлайнами и датами создания.
+    Возвращает «тяжёлого» пользователя.
+    """
+    rng = random.Random(42)
+    now = timezone.now()
+
+    User.objects.bulk_create(
+        User(username=f"{BENCH_USER_PREFIX}{i}", password="!", is_staff=(i == 0))
+        for i in range(users_count)
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith=BENCH_USER_PREFIX)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+    power_tasks = int(total_tasks * POWER_USER_SHARE)
+    rest_ids = user_ids[1:] or user_ids
+    statuses = Task.Status.values
+    priorities = Task.Priority.values
+
+    def make(i):
+        owner_id = user_ids[0] if i < power_tasks else rest_ids[i % len(rest_ids)]
+        created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        due = rng.random()
+        return Task(
+            owner_id=owner_id,
+            title=" ".join(rng.sample(WORDS, 3)) + f" #{i}",
+            description=" ".join(rng.choices(WORDS, k=12)),
+            status=rng.choice(statuses),
+            priority=rng.choice(priorities),
+            due_date=None if due < 0.3 else (now + timedelta(days=rng.randint(-30, 60))).date(),
+            created_at=created_at,
+        )
+
+    started = time.monotonic()
+    for offset in range(0, total_tasks, batch_size):
+        batch = [make(i) for i in range(offset, min(offset + batch_size, total_tasks))]
+        with transaction.atomic():
+            Task.objects.bulk_create(batch)
+        if stdout is not None:
+            done = offset + len(batch)
+            rate = done / (time.monotonic() - started)
+            stdout.write(f"  задач: {done}/{total_tasks} ({rate:.0f}/с)")
+
+    return User.objects.get(pk=user_ids[0])
+
+
+@contextmanager
+def bench_database(scale, db_file=None, keepdb=False, stdout=None):
+    """
+    Временная БД SQLite с данными масштаба scale на время блока; отдаёт «тяжёлого» пользователя.
+
+    С keepdb база не удаляется и при следующем запуске не заполняется повторно.
+    """
+    db_file = db_file or os.path.join(tempfile.gettempdir(), f"taskmanager_bench_{scale}.sqlite3")
+    connection.settings_dict.setdefault("TEST", {})["NAME"] = db_file
+    # Тестовый клиент ходит на хост testserver
+    if "testserver" not in settings.ALLOWED_HOSTS:
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        user = User.objects.filter(username=f"{BENCH_USER_PREFIX}0").first()
+        if user is None:
+            total, users_count = SCALES[scale]
+            if stdout is not None:
+                stdout.write(f"Заполнение: {total} задач, {users_count} пользователей")
+            user = seed(total, users_count, stdout=stdout)
+        yield user
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def percentile(sorted_values, fraction):
+    """
+    Перцентиль по отсортированному списку (метод ближайшего ранга).
+    """
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def current_rss_kb():
+    """
+    Текущий RSS процесса в КиБ (Linux: /proc/self/statm), иначе пиковый.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() // 1024
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(call, iterations, warmup=2, before_each=None):
+    """
+    Вызывает call() warmup + iterations раз и возвращает статистику:
+    перцентили времени (мс), число SQL-запросов на вызов, RSS.
+
+    call() должен вернуть ответ; у потоковых ответов тело дочитывается,
+    чтобы время и запросы включали всю выгрузку.
+    """
+    def run():
+        if before_each is not None:
+            before_each()
+        response = call()
+        if getattr(response, "streaming", False):
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    for _ in range(warmup):
+        run()
+
+    gc.collect()
+    timings, queries, statuses = [], [], set()
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = run()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(ctx.captured_queries))
+        statuses.add(getattr(response, "status_code", None))
+
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "status": sorted(s for s in statuses if s is not None),
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "queries": max(queries),
+        "rss_kb": current_rss_kb(),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+@contextmanager
+def views_mode(async_views):
+    """
+    Подключает синхронные или async-view (настройка ASYNC_VIEWS) на время блока.
+    Классы view выбираются в urls.py при импорте, поэтому модули URL перечитываются;
+    корневой URLconf — тоже: его include() кэширует списки маршрутов приложений.
+    """
+    import accounts.urls
+    import tasks.urls
+
+    def reload_urls():
+        importlib.reload(tasks.urls)
+        importlib.reload(accounts.urls)
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+    try:
+        with override_settings(ASYNC_VIEWS=async_views):
+            reload_urls()
+            yield
+    finally:
+        reload_urls()
@@ -0,0 +1,126 @@
+"""
+Кэш отрендеренных фрагментов списка задач.
+
+Ключ фрагмента: владелец + версия владельца + параметры фильтров и страницы.
+Версия владельца меняется при любом сохранении/удалении его задач
+(сигналы в tasks/signals.py, массовые операции вызывают bump_owner_version сами),
+поэтому старые фрагменты просто перестают читаться и вытесняются LRU.
+
+Бэкенд — обычный кэш Django (алиас из настройки TASKS_FRAGMENT_CACHE):
+locmem ограничен MAX_ENTRIES и вытесняет давно не использованные записи.
+Важно: locmem — свой у каждого процесса. Если воркеров несколько, версия,
+изменённая в одном процессе, не видна в другом, и список показывает устаревшие
+задачи. Поэтому по умолчанию кэш фрагментов включён только с общим бэкендом
+(FileBasedCache, Redis, Memcached), см. TASKS_FRAGMENT_CACHE_ENABLED в settings.py.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Какие параметры запроса влияют на содержимое списка
+LIST_PARAMS = ("q", "status", "priority", "archived", "page", "cursor")
+
+
+class CacheStats:
+    """
+    Счётчики попаданий/промахов в пределах процесса (потокобезопасно).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+        }
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, "TASKS_FRAGMENT_CACHE", "default")]
+
+
+def enabled():
+    return getattr(settings, "TASKS_FRAGMENT_CACHE_ENABLED", False)
+
+
+def _version_key(owner_id):
+    return f"tasks:list-version:{owner_id}"
+
+
+def owner_version(owner_id):
+    """
+    Текущая версия данных владельца.
+
+    Версия — время в наносекундах, а не счётчик: если ключ версии вытеснен
+    из кэша, новая версия гарантированно не совпадёт ни с одной старой,
+    и устаревший фрагмент не «воскреснет».
+    """
+    cache = get_cache()
+    version = cache.get(_version_key(owner_id))
+    if version is None:
+        version = time.time_ns()
+        # add() — чтобы не перетереть версию, которую параллельно выставил другой запрос
+        if not cache.add(_version_key(owner_id), version, timeout=None):
+            version = cache.get(_version_key(owner_id), version)
+    return version
+
+
+def bump_owner_version(owner_id):
+    """
+    Делает все закэшированные фрагменты владельца устаревшими.
+    """
+    get_cache().set(_version_key(owner_id), time.time_ns(), timeout=None)
+
+
+def list_fragment_key(owner_id, params, mode):
+    """
+    Ключ фрагмента списка: владелец, версия, режим пагинации и значимые параметры.
+    None, если кэш фрагментов выключен: get_fragment() тогда всегда промахивается,
+    а set_fragment() ничего не делает.
+    """
+    if not enabled():
+        return None
+    raw = "&".join(f"{name}={params.get(name, '').strip()}" for name in LIST_PARAMS)
+    digest = hashlib.sha1(f"{mode}|{raw}".encode()).hexdigest()
+    return f"tasks:list:{owner_id}:{owner_version(owner_id)}:{digest}"
+
+
+def get_fragment(key):
+    if key is None:
+        return None
+    value = get_cache().get(key)
+    if value is None:
+        stats.miss()
+    else:
+        stats.hit()
+    return value
+
+
+def set_fragment(key, value):
+    if key is None:
+        return
+    timeout = getattr(settings, "TASKS_FRAGMENT_CACHE_TIMEOUT", 300)
+    get_cache().set(key, value, timeout=timeout)
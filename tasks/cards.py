@@ -0,0 +1,105 @@
+"""
+Карточки задач для списков (tasks/task_list_items.html, adminpanel/user_detail.html).
+
+Всё, что шаблон показывает по задаче, готовится в Python один раз за страницу,
+а шаблон только подставляет готовые строки из словаря:
+- подписи статуса и приоритета — из словарей STATUS_LABELS / PRIORITY_LABELS
+  (get_status_display() на каждой строке заново собирает словарь из choices)
+- ссылка на задачу — подстановкой id в путь, который reverse() строит один раз
+  на страницу ({% url %} в цикле — полный reverse() на каждую карточку)
+- дедлайн — уже отформатированная дата
+- ссылки пагинации — готовые строки запроса (list_context), а не сборка
+  из request.GET в шаблоне
+
+Время рендера — manage.py bench_render.
+"""
+from django.urls import reverse
+from django.utils.formats import date_format
+
+from .filters import filter_query
+from .models import Task
+
+STATUS_LABELS = dict(Task.Status.choices)
+PRIORITY_LABELS = dict(Task.Priority.choices)
+
+# id, который заведомо не встретится в пути маршрута: по нему reverse() даёт шаблон пути
+_PK_MARKER = 987654321
+
+
+def detail_url_template():
+    return reverse("task_detail", args=[_PK_MARKER]).replace(str(_PK_MARKER), "{}")
+
+
+def task_cards(tasks):
+    """
+    Задачи (объекты Task / ArchivedTask) -> словари с готовыми значениями для карточек.
+    """
+    url = detail_url_template()
+    # Форматирование даты с локализацией заметно дороже словаря,
+    # а дедлайны на странице часто совпадают — форматируем каждую дату один раз
+    due_labels = {None: "—"}
+
+    cards = []
+    for task in tasks:
+        if task.due_date not in due_labels:
+            due_labels[task.due_date] = date_format(task.due_date)
+        cards.append({
+            "pk": task.pk,
+            "url": url.format(task.pk),
+            "title": task.title,
+            "description": task.description or "",
+            "status_label": STATUS_LABELS.get(task.status, task.status),
+            "priority_label": PRIORITY_LABELS.get(task.priority, task.priority),
+            "due_label": due_labels[task.due_date],
+            "created_at": task.created_at,
+            "archived": getattr(task, "archived", False),
+        })
+    return cards
+
+
+def page_links(page, params, keyset=False):
+    """
+    Ссылки «Назад» / «Вперёд» с текущими фильтрами: {"previous": "?page=1&q=...", "next": ...};
+    ключа нет, если страницы нет.
+    """
+    query = filter_query(params)
+    suffix = f"&{query}" if query else ""
+    links = {}
+    if keyset:
+        if page.has_previous():
+            links["previous"] = f"?cursor={page.previous_cursor}{suffix}"
+        if page.has_next():
+            links["next"] = f"?cursor={page.next_cursor}{suffix}"
+    else:
+        if page.has_previous():
+            links["previous"] = f"?page={page.previous_page_number()}{suffix}"
+        if page.has_next():
+            links["next"] = f"?page={page.next_page_number()}{suffix}"
+    return links
+
+
+def status_links(histogram, params):
+    """
+    Гистограмма статусов со ссылками: [(код, подпись, количество, "?status=...&q=..."), ...].
+    В ссылке — текущие фильтры с заменённым статусом, без страницы и курсора.
+    """
+    return [
+        (code, label, count, f"?{filter_query(params, status=code)}")
+        for code, label, count in histogram
+    ]
+
+
+def list_context(page, params, keyset=False):
+    """
+    Контекст tasks/task_list_items.html для страницы page (кроме status_histogram).
+    Общий для TaskListView и AsyncTaskListView.
+    """
+    return {
+        "tasks": page.object_list,
+        "cards": task_cards(page.object_list),
+        "page_obj": page,
+        "is_paginated": page.has_other_pages(),
+        "keyset_pagination": keyset,
+        "page_links": page_links(page, params, keyset),
+        "filter_query": filter_query(params),
+    }
@@ -0,0 +1,191 @@
+"""
+Чтение и обслуживание денормализованных счётчиков задач (модель TaskCounter).
+
+Счётчики поддерживаются SQL-триггерами (tasks/triggers.py), поэтому они есть
+только на SQLite. На других СУБД функции чтения откатываются на COUNT по
+таблице задач — медленнее, но с тем же результатом.
+"""
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .cache import get_cache
+from .models import Task, TaskCounter
+from .triggers import TASK_COUNTERS
+
+
+def enabled(using="default"):
+    """
+    Поддерживаются ли счётчики триггерами на этой БД.
+    """
+    return connections[using].vendor == "sqlite"
+
+
+def tasks_count_annotation(using="default"):
+    """
+    Выражение для annotate(tasks_count=...) у QuerySet пользователей.
+
+    Коррелированный подзапрос по TaskCounter (до 9 строк на пользователя)
+    вычисляется только для строк текущей страницы, вместо GROUP BY по всем задачам.
+    """
+    if not enabled(using):
+        return Count("tasks")
+
+    total = (
+        TaskCounter.objects.filter(owner=OuterRef("pk"))
+        .values("owner")
+        .annotate(total=Sum("count"))
+        .values("total")
+    )
+    return Coalesce(Subquery(total, output_field=IntegerField()), 0)
+
+
+def _owner_counts(owner, using):
+    # Строки (status, priority, count): из счётчиков или GROUP BY по задачам
+    if enabled(using):
+        return TaskCounter.objects.using(using).filter(owner=owner).values_list(
+            "status", "priority", "count"
+        )
+    return (
+        Task.objects.using(using)
+        .filter(owner=owner)
+        .order_by()
+        .values_list("status", "priority")
+        .annotate(count=Count("id"))
+    )
+
+
+def _histogram(rows):
+    histogram = {
+        "total": 0,
+        "status": {status: 0 for status in Task.Status.values},
+        "priority": {priority: 0 for priority in Task.Priority.values},
+    }
+    for status, priority, count in rows:
+        histogram["total"] += count
+        histogram["status"][status] = histogram["status"].get(status, 0) + count
+        histogram["priority"][priority] = histogram["priority"].get(priority, 0) + count
+    return histogram
+
+
+def owner_histogram(owner, using="default"):
+    """
+    Гистограмма задач владельца одним запросом:
+    {"total": N, "status": {"TODO": n, ...}, "priority": {1: n, ...}}
+
+    В словарях есть все статусы и приоритеты, даже с нулём.
+    """
+    return _histogram(_owner_counts(owner, using))
+
+
+async def aowner_histogram(owner, using="default"):
+    """
+    То же, что owner_histogram(), для async-view.
+    """
+    return _histogram([row async for row in _owner_counts(owner, using)])
+
+
+def status_histogram(owner, using="default"):
+    """
+    Для шаблонов: [(код, подпись, количество), ...] в порядке Task.Status.
+    """
+    return _status_rows(owner_histogram(owner, using))
+
+
+async def astatus_histogram(owner, using="default"):
+    return _status_rows(await aowner_histogram(owner, using))
+
+
+def _global_counts(using):
+    # Строки (status, priority, count) по всем владельцам
+    if enabled(using):
+        return (
+            TaskCounter.objects.using(using)
+            .order_by()
+            .values_list("status", "priority")
+            .annotate(count=Sum("count"))
+        )
+    return (
+        Task.objects.using(using)
+        .order_by()
+        .values_list("status", "priority")
+        .annotate(count=Count("id"))
+    )
+
+
+def global_counts(using="default"):
+    """
+    {(status, priority): количество} по всем задачам — для админки
+    (число строк в списке и количества в фильтрах).
+
+    Сумма по TaskCounter (до 9 строк на пользователя) кэшируется на
+    TASKS_ADMIN_COUNTS_TIMEOUT секунд, поэтому это оценка: свежие изменения
+    видны не сразу.
+    """
+    key = f"tasks:counters:global:{using}"
+    cache = get_cache()
+    counts = cache.get(key)
+    if counts is None:
+        counts = {(status, priority): count for status, priority, count in _global_counts(using)}
+        cache.set(key, counts, timeout=getattr(settings, "TASKS_ADMIN_COUNTS_TIMEOUT", 60))
+    return counts
+
+
+def _status_rows(histogram):
+    counts = histogram["status"]
+    return [(status, label, counts[status]) for status, label in Task.Status.choices]
+
+
+def _actual_counts(using, owner_ids=None):
+    qs = Task.objects.using(using).order_by()
+    if owner_ids is not None:
+        qs = qs.filter(owner_id__in=owner_ids)
+    return {
+        (owner_id, status, priority): count
+        for owner_id, status, priority, count in qs.values_list(
+            "owner_id", "status", "priority"
+        ).annotate(count=Count("id"))
+    }
+
+
+def _stored_counts(using, owner_ids=None):
+    qs = TaskCounter.objects.using(using)
+    if owner_ids is not None:
+        qs = qs.filter(owner_id__in=owner_ids)
+    return {
+        (owner_id, status, priority): count
+        for owner_id, status, priority, count in qs.values_list(
+            "owner_id", "status", "priority", "count"
+        )
+        if count
+    }
+
+
+def verify(using="default", owner_ids=None):
+    """
+    Сравнивает счётчики с реальным GROUP BY по задачам.
+    Возвращает список расхождений [(owner_id, status, priority, хранится, на самом деле)].
+    """
+    actual = _actual_counts(using, owner_ids)
+    stored = _stored_counts(using, owner_ids)
+
+    mismatches = []
+    for key in sorted(set(actual) | set(stored), key=str):
+        if actual.get(key, 0) != stored.get(key, 0):
+            mismatches.append((*key, stored.get(key, 0), actual.get(key, 0)))
+    return mismatches
+
+
+def rebuild(using="default"):
+    """
+    Пересчитывает все счётчики с нуля одной транзакцией
+    (заодно восстанавливает триггеры, если они были потеряны).
+    """
+    connection = connections[using]
+    if not enabled(using):
+        return
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        TASK_COUNTERS.uninstall(cursor)
+        TASK_COUNTERS.install(cursor)
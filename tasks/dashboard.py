@@ -0,0 +1,102 @@
+"""
+Дашборд дедлайнов: незавершённые задачи владельца по корзинам
+«просрочено / сегодня / на этой неделе / позже / без дедлайна».
+
+Все запросы идут по частичному индексу task_open_due_idx
+(owner, due_date) WHERE status <> 'DONE':
+- количество по корзинам — один агрегирующий запрос по диапазону индекса
+- первые N задач корзины — диапазонный запрос в порядке индекса
+  (due_date, id), без сортировки во временном B-дереве
+
+Результат кэшируется на TASKS_DASHBOARD_CACHE_TIMEOUT секунд; ключ включает
+версию данных владельца (tasks/cache.py) и текущую дату, поэтому любое
+изменение задач и смена дня сразу дают новый ключ.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .cache import get_cache, owner_version
+from .models import Task
+
+# Код корзины и подпись, в порядке показа
+BUCKETS = [
+    ("overdue", "Просрочено"),
+    ("today", "Сегодня"),
+    ("week", "На этой неделе"),
+    ("later", "Позже"),
+    ("none", "Без дедлайна"),
+]
+
+# Поля задач в корзинах
+DASHBOARD_FIELDS = ["id", "title", "status", "priority", "due_date"]
+
+DEFAULT_TOP = 5
+MAX_TOP = 50
+
+
+def open_tasks(owner):
+    """
+    Незавершённые задачи владельца. Условие записано так же, как условие
+    частичного индекса (NOT status = 'DONE'), чтобы SQLite мог его использовать.
+    """
+    return Task.objects.filter(owner=owner).exclude(status=Task.Status.DONE)
+
+
+def bucket_conditions(today):
+    """
+    Условия корзин для даты today. Неделя — до воскресенья включительно;
+    в воскресенье корзина «на этой неделе» пуста.
+    """
+    end_of_week = today + timedelta(days=6 - today.weekday())
+    return {
+        "overdue": Q(due_date__lt=today),
+        "today": Q(due_date=today),
+        "week": Q(due_date__gt=today, due_date__lte=end_of_week),
+        "later": Q(due_date__gt=end_of_week),
+        "none": Q(due_date__isnull=True),
+    }
+
+
+def _bucket_ordering(code):
+    # Без дедлайна — сначала новые (по id, это хвост ключа индекса), иначе — ближайший дедлайн
+    return ("-id",) if code == "none" else ("due_date", "id")
+
+
+def build_dashboard(owner, today, top=DEFAULT_TOP):
+    conditions = bucket_conditions(today)
+    qs = open_tasks(owner)
+
+    counts = qs.aggregate(
+        **{code: Count("id", filter=condition) for code, condition in conditions.items()}
+    )
+
+    buckets = []
+    for code, label in BUCKETS:
+        tasks = []
+        if counts[code]:
+            tasks = list(
+                qs.filter(conditions[code])
+                .order_by(*_bucket_ordering(code))
+                .values(*DASHBOARD_FIELDS)[:top]
+            )
+        buckets.append({"code": code, "label": label, "count": counts[code], "tasks": tasks})
+
+    return {"today": today, "buckets": buckets}
+
+
+def deadline_dashboard(owner, top=DEFAULT_TOP):
+    """
+    {"today": date, "buckets": [{"code", "label", "count", "tasks": [{...}, ...]}, ...]}
+    """
+    today = timezone.localdate()
+    key = f"tasks:dashboard:{owner.pk}:{owner_version(owner.pk)}:{today.isoformat()}:{top}"
+
+    cache = get_cache()
+    data = cache.get(key)
+    if data is None:
+        data = build_dashboard(owner, today, top)
+        cache.set(key, data, timeout=getattr(settings, "TASKS_DASHBOARD_CACHE_TIMEOUT", 30))
+    return data
@@ -0,0 +1,172 @@
+"""
+Push-уведомления об изменениях задач: pub/sub в пределах процесса.
+
+Источник событий — сигналы Task (tasks/signals.py) и массовые действия
+(TaskBulkActionView). События публикуются после коммита транзакции и
+доставляются подписчикам-владельцам: открытым вкладкам, которые слушают
+GET /events/ (Server-Sent Events или long-poll, см. AsyncTaskEventsView).
+
+Формат события (в событии только изменившиеся поля):
+    {"type": "created", "id": 5, "fields": {...все поля...}}
+    {"type": "updated", "id": 5, "fields": {"status": "DONE", "updated_at": ...}}
+    {"type": "updated", "ids": [5, 6], "fields": {"priority": 3, ...}}   # массовое действие
+    {"type": "deleted", "id": 5}
+    {"type": "reload"}   # подписчик не успевал читать, часть событий потеряна
+
+Брокер выбирается настройкой TASKS_EVENTS_BROKER (путь к классу). LocalBroker
+доставляет только внутри своего процесса: при нескольких воркерах или изменениях
+из manage.py нужен брокер поверх общей шины (Redis pub/sub и т.п.) с теми же
+методами subscribe() / publish() / has_subscribers().
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .export import TASK_EXPORT_FIELDS
+
+# Поля задачи в событиях (изменения отслеживаются по ним же)
+EVENT_FIELDS = TASK_EXPORT_FIELDS
+
+
+def enabled():
+    return getattr(settings, "TASKS_EVENTS", False)
+
+
+def stream_enabled():
+    """
+    Доступен ли поток GET /events/ (и подписка на него со страницы списка).
+    Соединение держится долго, поэтому только с async-view под ASGI (ASYNC_VIEWS):
+    под WSGI каждая открытая вкладка заняла бы поток сервера.
+    Публикация событий от этого не зависит — подписчики могут жить в других процессах.
+    """
+    return enabled() and getattr(settings, "ASYNC_VIEWS", False)
+
+
+class Subscription:
+    """
+    Очередь событий одного подписчика (одной вкладки), живёт в event loop подписчика.
+    publish() может вызываться из любого потока — доставка идёт через call_soon_threadsafe.
+    """
+
+    def __init__(self, broker, owner_id, maxsize):
+        self.broker = broker
+        self.owner_id = owner_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Медленный клиент: выбрасываем накопленное и просим перечитать всё
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "reload"})
+
+    async def get(self, timeout=None):
+        """
+        Следующее событие или None, если за timeout секунд ничего не пришло.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain(self):
+        """
+        Все уже пришедшие события без ожидания.
+        """
+        events = []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class LocalBroker:
+    """
+    Подписчики по владельцу в памяти процесса (потокобезопасно).
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, owner_id):
+        """
+        Вызывается из async-кода; возвращает Subscription (контекстный менеджер).
+        """
+        subscription = Subscription(self, owner_id, self.queue_size)
+        with self._lock:
+            self._subscribers[owner_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.owner_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.owner_id]
+
+    def has_subscribers(self, owner_id):
+        return owner_id in self._subscribers
+
+    def publish(self, owner_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(owner_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.deliver(event)
+            except RuntimeError:
+                # event loop подписчика уже закрыт
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    path = getattr(settings, "TASKS_EVENTS_BROKER", "tasks.events.LocalBroker")
+    return import_string(path)()
+
+
+def snapshot(instance):
+    """
+    Значения отслеживаемых полей в момент загрузки объекта (отложенные поля пропускаются).
+    """
+    loaded = instance.__dict__
+    return {name: loaded[name] for name in EVENT_FIELDS if name in loaded}
+
+
+def saved_event(instance, created):
+    """
+    Событие для сохранённой задачи: при создании — все поля, иначе только изменившиеся.
+    None — если видимых изменений нет.
+    """
+    current = snapshot(instance)
+    if created:
+        return {"type": "created", "id": instance.pk, "fields": current}
+
+    before = getattr(instance, "_event_snapshot", None) or {}
+    changed = {
+        name: value for name, value in current.items()
+        if name not in before or before[name] != value
+    }
+    if set(changed) <= {"updated_at"}:
+        return None
+    return {"type": "updated", "id": instance.pk, "fields": changed}
@@ -0,0 +1,97 @@
+"""
+Проверка планов запросов SQLite (EXPLAIN QUERY PLAN).
+
+Используется в тестах: все SQL-запросы, выполненные внутри блока
+assertQueryPlans(), прогоняются через EXPLAIN QUERY PLAN, и тест падает, если
+в плане есть:
+- полный проход по таблице или индексу ("SCAN <таблица>"), кроме FTS-таблиц
+  и таблиц, перечисленных в allow_scans (например, выгрузка всех задач);
+- сортировка во временном B-дереве ("USE TEMP B-TREE FOR ORDER BY / GROUP BY / DISTINCT"),
+  если она не разрешена явно (allow_temp_sort).
+
+Так регрессия индекса (пропал индекс, поменялся порядок сортировки, новый фильтр
+без индекса) ловится тестом, а не на проде на миллионе строк.
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+_SCAN_RE = re.compile(r"^SCAN (\w+)")
+
+# Каталог SQLite (проверка «есть ли FTS-таблица») — крошечный, его проход не в счёт
+ALWAYS_ALLOWED_SCANS = {"sqlite_master"}
+
+# Служебные запросы транзакций и PRAGMA объяснять не нужно
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+
+def query_plan(sql, using="default", params=None):
+    """
+    Строки плана (колонка detail EXPLAIN QUERY PLAN) для запроса.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[3] for row in cursor.fetchall()]
+
+
+def plan_problems(plan, allow_scans=(), allow_temp_sort=False):
+    """
+    Список претензий к плану (пустой — план хороший).
+    """
+    problems = []
+    for detail in plan:
+        match = _SCAN_RE.match(detail)
+        if match:
+            table = match.group(1)
+            allowed = table in ALWAYS_ALLOWED_SCANS or table in allow_scans
+            # VALUES (...) в INSERT — «SCAN N CONSTANT ROWS», это не таблица
+            if "VIRTUAL TABLE" not in detail and "CONSTANT ROW" not in detail and not allowed:
+                problems.append(detail)
+        if "USE TEMP B-TREE" in detail and not allow_temp_sort:
+            problems.append(detail)
+    return problems
+
+
+@contextmanager
+def captured_plans(using="default"):
+    """
+    Собирает планы всех запросов блока: список (sql, [строки плана]).
+    """
+    connection = connections[using]
+    plans = []
+    with CaptureQueriesContext(connection) as ctx:
+        yield plans
+    for query in ctx.captured_queries:
+        sql = query["sql"]
+        if sql.lstrip().upper().startswith(_EXPLAINABLE):
+            plans.append((sql, query_plan(sql, using)))
+
+
+class QueryPlanAssertionsMixin:
+    """
+    Миксин для TestCase:
+
+        with self.assertQueryPlans():
+            self.client.get(reverse("task_list"))
+
+        with self.assertQueryPlans(allow_scans={"tasks_task"}):
+            ...   # осознанный полный проход (выгрузка всех задач)
+    """
+
+    @contextmanager
+    def assertQueryPlans(self, allow_scans=(), allow_temp_sort=False, using="default"):
+        if connections[using].vendor != "sqlite":
+            self.skipTest("EXPLAIN QUERY PLAN проверяется только на SQLite")
+
+        with captured_plans(using) as plans:
+            yield plans
+
+        failures = []
+        for sql, plan in plans:
+            problems = plan_problems(plan, allow_scans, allow_temp_sort)
+            if problems:
+                failures.append(f"{sql}\n    " + "\n    ".join(problems))
+        if failures:
+            self.fail("Плохие планы запросов:\n\n" + "\n\n".join(failures))
@@ -0,0 +1,80 @@
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+
+from .search import task_search
+
+
+def filter_tasks(qs, params, owner_id=None, search=task_search):
+    """
+    Фильтры списка задач по параметрам запроса (?q=...&status=...&priority=...).
+
+    Общие для страницы списка, экспорта и других выгрузок, чтобы везде
+    фильтрация работала одинаково.
+
+    qs       — исходный QuerySet (обычно уже ограниченный владельцем)
+    params   — request.GET или любой словарь
+    owner_id — владелец для полнотекстового поиска (отсекает чужие задачи внутри FTS)
+    search   — бэкенд поиска; None — без индекса, подстрока в названии или описании
+               (архив задач: его нет в FTS-таблице)
+    """
+    q = params.get("q", "").strip()                # строка поиска
+    status = params.get("status", "").strip()      # статус (TODO/INPR/DONE)
+    priority = params.get("priority", "").strip()  # приоритет (1/2/3)
+
+    # Поиск по названию или описанию: полнотекстовый индекс FTS5
+    # (по префиксам слов, без учёта регистра), см. tasks/search.py
+    if q and search is None:
+        qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
+    elif q:
+        if owner_id is not None:
+            qs = search.filter(qs, q, owner_id=owner_id)
+        else:
+            qs = search.filter(qs, q)
+
+    # Фильтр по статусу, если он передан
+    if status:
+        qs = qs.filter(status=status)
+
+    # Фильтр по приоритету: проверяем, что это число
+    if priority.isdigit():
+        qs = qs.filter(priority=int(priority))
+
+    return qs
+
+
+def rank_search_results(qs, params, pagination="offset", search=task_search):
+    """
+    При поиске (?q=...) сортирует задачи по релевантности (bm25), см. tasks/search.py.
+
+    Только для постраничной пагинации: курсор keyset-режима — это (created_at, id),
+    поэтому там (и в API с курсором синхронизации) результаты остаются по времени.
+    """
+    q = params.get("q", "").strip()
+    if not q or pagination == "keyset":
+        return qs
+    return search.order_by_rank(qs, q)
+
+
+async def afilter_tasks(qs, params, owner_id=None):
+    """
+    То же, что filter_tasks(), для async-view.
+
+    Проверка наличия FTS-таблицы делает синхронный запрос (один раз на процесс),
+    поэтому прогреваем её через sync_to_async; дальше QuerySet строится без БД.
+    """
+    if params.get("q", "").strip():
+        await sync_to_async(task_search.is_available)(qs.db)
+    return filter_tasks(qs, params, owner_id=owner_id)
+
+
+def filter_query(params, **overrides):
+    """
+    Текущие фильтры одной строкой (q=...&status=...) — для ссылок пагинации и экспорта.
+    overrides заменяют значения отдельных фильтров: filter_query(params, status="DONE").
+    Страница и курсор в строку не попадают.
+    """
+    values = {key: params.get(key, "").strip() for key in ("q", "status", "priority", "archived")}
+    values.update(overrides)
+    return urlencode({k: v for k, v in values.items() if v})
@@ -24,3 +24,100 @@ class TaskForm(forms.ModelForm):
         widgets = {
             "due_date": forms.DateInput(attrs={"type": "date"})
         }
+
+
+class TaskIdListField(forms.Field):
+    """
+    Список id задач: повторяющийся параметр (?ids=1&ids=2)
+    или одна строка через запятую (ids=1,2,3).
+    """
+    widget = forms.MultipleHiddenInput
+
+    def __init__(self, *, max_items=1000, **kwargs):
+        self.max_items = max_items
+        super().__init__(**kwargs)
+
+    def to_python(self, value):
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = [value]
+
+        ids = []
+        for item in value:
+            for part in str(item).split(","):
+                part = part.strip()
+                if not part:
+                    continue
+                if not part.isdigit():
+                    raise forms.ValidationError("Некорректный id задачи: %(value)s", params={"value": part})
+                ids.append(int(part))
+
+        if len(ids) > self.max_items:
+            raise forms.ValidationError(
+                "Слишком много задач за один раз (максимум %(max)s)", params={"max": self.max_items}
+            )
+        # Убираем повторы, сохраняя порядок
+        return list(dict.fromkeys(ids))
+
+
+class TaskBulkActionForm(forms.Form):
+    """
+    Форма массового действия над задачами.
+
+    ids    — какие задачи
+    action — что сделать: сменить статус / приоритет / дедлайн или удалить
+    status / priority / due_date — новое значение для соответствующего действия
+    (пустой due_date при set_due_date снимает дедлайн)
+    """
+
+    SET_STATUS = "set_status"
+    SET_PRIORITY = "set_priority"
+    SET_DUE_DATE = "set_due_date"
+    DELETE = "delete"
+
+    ACTION_CHOICES = [
+        (SET_STATUS, "Сменить статус"),
+        (SET_PRIORITY, "Сменить приоритет"),
+        (SET_DUE_DATE, "Сменить дедлайн"),
+        (DELETE, "Удалить"),
+    ]
+
+    ids = TaskIdListField(label="Задачи")
+    action = forms.ChoiceField(label="Действие", choices=ACTION_CHOICES)
+    status = forms.ChoiceField(label="Статус", choices=Task.Status.choices, required=False)
+    priority = forms.TypedChoiceField(
+        label="Приоритет", choices=Task.Priority.choices, coerce=int, required=False, empty_value=None
+    )
+    due_date = forms.DateField(label="Дедлайн", required=False, widget=forms.DateInput(attrs={"type": "date"}))
+
+    def clean(self):
+        cleaned = super().clean()
+        action = cleaned.get("action")
+
+        if action == self.SET_STATUS and not cleaned.get("status"):
+            self.add_error("status", "Выберите статус")
+        if action == self.SET_PRIORITY and cleaned.get("priority") is None:
+            self.add_error("priority", "Выберите приоритет")
+        return cleaned
+
+    def get_changes(self):
+        """
+        Какие поля обновить для выбранного действия (для QuerySet.update).
+        Для удаления возвращает пустой словарь.
+        """
+        action = self.cleaned_data["action"]
+        if action == self.SET_STATUS:
+            return {"status": self.cleaned_data["status"]}
+        if action == self.SET_PRIORITY:
+            return {"priority": self.cleaned_data["priority"]}
+        if action == self.SET_DUE_DATE:
+            return {"due_date": self.cleaned_data["due_date"]}
+        return {}
+
+
+class TaskRestoreForm(forms.Form):
+    """
+    Возврат задач из архива: ids — какие архивные задачи вернуть в список.
+    """
+    ids = TaskIdListField(label="Задачи")
@@ -0,0 +1,399 @@
+"""
+Очередь фоновых заданий в БД (модель Job) без внешнего брокера.
+
+- enqueue(kind, payload, owner=...) ставит задание; статус можно опрашивать
+  через GET /api/jobs/<id>/ (tasks/api.py)
+- manage.py run_workers запускает пул процессов-воркеров; каждый в цикле
+  забирает задание (claim) и выполняет его обработчик (run_job)
+- обработчик — функция handler(job) -> результат (JSON), регистрируется
+  декоратором @handler("тип", concurrency=N); прогресс — job_progress(job, done, total)
+- ошибка в обработчике: задание возвращается в очередь с задержкой
+  (2, 4, 8... секунд) до max_attempts попыток, потом FAILED с текстом ошибки
+- concurrency — сколько заданий этого типа может выполняться одновременно
+  во всех воркерах (например, пересчёт счётчиков — строго один)
+- пока обработчик работает, фоновый поток воркера (Heartbeat) раз в
+  TASKS_JOBS_HEARTBEAT_SECONDS обновляет heartbeat_at — даже если обработчик
+  долго не вызывает job_progress (пересчёт счётчиков, импорт одной пачкой)
+- воркер, который упал посреди задания, перестаёт обновлять heartbeat_at;
+  через TASKS_JOBS_STALE_SECONDS задание возвращается в очередь (requeue_stale),
+  а результат «потерянного» задания, если его воркер всё-таки доработает,
+  не перезаписывает новое выполнение (сохранение — только пока задание за этим воркером)
+
+Забор задания — один UPDATE ... WHERE status = 'QUEUED' [AND выполняется < N]:
+запись в SQLite сериализуется, поэтому задание не достанется двум воркерам
+и лимит параллельности не будет превышен.
+"""
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import Count, F, IntegerField, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Job, Task
+
+logger = logging.getLogger(__name__)
+
+# Реестр обработчиков: тип задания -> (функция, лимит параллельности или None)
+HANDLERS = {}
+
+
+def handler(kind, concurrency=None):
+    """
+    Регистрирует обработчик заданий типа kind.
+    """
+    def decorator(func):
+        HANDLERS[kind] = (func, concurrency)
+        return func
+    return decorator
+
+
+def stale_after():
+    return timedelta(seconds=getattr(settings, "TASKS_JOBS_STALE_SECONDS", 300))
+
+
+def heartbeat_interval():
+    return getattr(settings, "TASKS_JOBS_HEARTBEAT_SECONDS", 30)
+
+
+def jobs_dir():
+    """
+    Каталог для файлов-результатов заданий (выгрузки); создаётся при первом обращении.
+    """
+    path = Path(getattr(settings, "TASKS_JOBS_DIR", settings.BASE_DIR / "var" / "jobs"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def worker_name(slot=0):
+    return f"{socket.gethostname()}:{os.getpid()}:{slot}"
+
+
+# --- постановка и опрос ---
+
+def enqueue(kind, payload=None, owner=None, max_attempts=None, delay=None):
+    """
+    Ставит задание в очередь и возвращает Job.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Неизвестный тип задания: {kind}")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        owner=owner,
+        max_attempts=max_attempts or getattr(settings, "TASKS_JOBS_MAX_ATTEMPTS", 3),
+        run_after=timezone.now() + (delay or timedelta()),
+    )
+
+
+def job_state(job):
+    """
+    Состояние задания для клиента (JSON).
+    """
+    return {
+        "id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "message": job.message,
+        "attempts": job.attempts,
+        "result": job.result,
+        "error": job.error.strip().splitlines()[-1] if job.error else None,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def job_progress(job, done, total=None, message=""):
+    """
+    Прогресс задания из обработчика: done из total (или сразу проценты, если total нет).
+    Заодно обновляет heartbeat_at — воркер жив.
+    """
+    percent = int(done * 100 / total) if total else int(done)
+    job.progress = max(0, min(percent, 99))
+    job.message = message[:200]
+    Job.objects.filter(pk=job.pk).update(
+        progress=job.progress, message=job.message, heartbeat_at=timezone.now()
+    )
+
+
+# --- выполнение ---
+
+def _running_count(kind):
+    return Coalesce(
+        Subquery(
+            Job.objects.filter(kind=kind, status=Job.Status.RUNNING)
+            .order_by()
+            .values("kind")
+            .annotate(n=Count("id"))
+            .values("n"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def claim(worker=None, now=None):
+    """
+    Забирает следующее готовое задание (QUEUED, run_after <= now) и возвращает его
+    в статусе RUNNING или None, если забирать нечего.
+    """
+    worker = worker or worker_name()
+    now = now or timezone.now()
+
+    candidates = (
+        Job.objects.filter(status=Job.Status.QUEUED, run_after__lte=now)
+        .order_by("run_after", "id")
+        .values_list("id", "kind")[:20]
+    )
+    for pk, kind in candidates:
+        _, concurrency = HANDLERS.get(kind, (None, None))
+        qs = Job.objects.filter(pk=pk, status=Job.Status.QUEUED)
+        if concurrency:
+            qs = qs.alias(running=_running_count(kind)).filter(running__lt=concurrency)
+        claimed = qs.update(
+            status=Job.Status.RUNNING,
+            worker=worker,
+            attempts=F("attempts") + 1,
+            started_at=now,
+            heartbeat_at=now,
+            error="",
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+class Heartbeat(threading.Thread):
+    """
+    Поток, который обновляет heartbeat_at задания, пока обработчик работает.
+
+    UPDATE только пока задание RUNNING и принадлежит этому воркеру: если его уже
+    вернули в очередь (requeue_stale) и забрал другой воркер, поток останавливается.
+    У потока своё соединение с БД — закрывается при выходе.
+    """
+
+    def __init__(self, job, interval=None):
+        super().__init__(name=f"job-{job.pk}-heartbeat", daemon=True)
+        self.job = job
+        self.interval = interval if interval is not None else heartbeat_interval()
+        self._stopped = threading.Event()
+
+    def beat(self):
+        return bool(_owned(self.job).update(heartbeat_at=timezone.now()))
+
+    def run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                if not self.beat():
+                    break
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def _owned(job):
+    # Задание всё ещё выполняется этим воркером
+    return Job.objects.filter(pk=job.pk, worker=job.worker, status=Job.Status.RUNNING)
+
+
+def retry_delay(attempts):
+    # 2, 4, 8... секунд, но не больше 10 минут
+    return timedelta(seconds=min(2 ** attempts, 600))
+
+
+def run_job(job):
+    """
+    Выполняет забранное задание и сохраняет результат, ошибку или повтор.
+
+    Результат сохраняется, только если задание всё ещё за этим воркером
+    (RUNNING, worker): иначе его уже вернули в очередь как зависшее, и запись
+    затёрла бы новое выполнение — тогда результат отбрасывается.
+    """
+    func, _ = HANDLERS.get(job.kind, (None, None))
+    now = timezone.now
+    heartbeat = Heartbeat(job)
+    heartbeat.start()
+    try:
+        if func is None:
+            raise LookupError(f"Нет обработчика для {job.kind}")
+        result = func(job)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.Status.QUEUED
+            job.run_after = now() + retry_delay(job.attempts)
+        else:
+            job.status = Job.Status.FAILED
+            job.finished_at = now()
+        job.error = error
+        _finish(job, heartbeat, ["status", "run_after", "error", "finished_at"])
+        return job
+
+    job.status = Job.Status.DONE
+    job.progress = 100
+    job.result = result
+    job.finished_at = now()
+    _finish(job, heartbeat, ["status", "progress", "result", "finished_at"])
+    return job
+
+
+def _finish(job, heartbeat, fields):
+    heartbeat.stop()
+    saved = _owned(job).update(**{name: getattr(job, name) for name in fields})
+    if not saved:
+        logger.warning(
+            "Задание #%s больше не принадлежит воркеру %s — результат отброшен", job.pk, job.worker
+        )
+
+
+def run_pending(worker=None, limit=None):
+    """
+    Выполняет готовые задания в текущем процессе, пока они есть (или limit штук).
+    Для manage.py run_workers --once и тестов. Возвращает число выполненных заданий.
+    """
+    done = 0
+    while limit is None or done < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
+
+
+def requeue_stale(older_than=None):
+    """
+    Возвращает в очередь задания, воркер которых не подавал признаков жизни
+    дольше older_than (по умолчанию TASKS_JOBS_STALE_SECONDS). Попытка засчитывается.
+    """
+    cutoff = timezone.now() - (older_than if older_than is not None else stale_after())
+    stale = Job.objects.filter(status=Job.Status.RUNNING, heartbeat_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED, error="Воркер перестал отвечать", finished_at=timezone.now()
+    )
+    return failed + stale.update(status=Job.Status.QUEUED, worker="", run_after=timezone.now())
+
+
+def worker_loop(worker, stop_event, poll_interval=1.0):
+    """
+    Цикл одного воркера: забрать задание, выполнить, повторить;
+    если очередь пуста — подождать poll_interval секунд. Выходит по stop_event.
+    """
+    while not stop_event.is_set():
+        close_old_connections()
+        job = claim(worker)
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+        run_job(job)
+
+
+# --- обработчики ---
+
+@handler("export_tasks")
+def export_tasks(job):
+    """
+    Выгрузка задач в файл. payload: {"scope": "owner" | "all", "format": "csv" | "jsonl",
+    "params": {фильтры списка}}; scope "owner" — задачи job.owner.
+    """
+    from .export import (
+        ADMIN_EXPORT_FIELDS, FORMATS, TASK_EXPORT_FIELDS,
+        admin_export_queryset, iter_export, owner_export_queryset,
+    )
+
+    payload = job.payload
+    fmt = payload.get("format", "csv")
+    params = payload.get("params", {})
+    if payload.get("scope") == "all":
+        qs, fields, filename = admin_export_queryset(params), ADMIN_EXPORT_FIELDS, "tasks_all"
+    else:
+        qs, fields, filename = owner_export_queryset(job.owner_id, params), TASK_EXPORT_FIELDS, "tasks"
+
+    total = qs.count()
+    extension = FORMATS[fmt][1]
+    path = jobs_dir() / f"job-{job.pk}.{extension}"
+    step = getattr(settings, "TASKS_EXPORT_CHUNK_SIZE", 2000)
+
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as output:
+        for line in iter_export(qs, fields, fmt):
+            output.write(line)
+            rows += 1
+            if rows % step == 0:
+                job_progress(job, rows, total + 1, f"{rows} из {total}")
+
+    # В CSV первая строка — заголовок
+    data_rows = rows - 1 if fmt == "csv" else rows
+    return {"file": path.name, "filename": f"{filename}.{extension}", "rows": data_rows}
+
+
+@handler("bulk_delete")
+def bulk_delete(job):
+    """
+    Удаление задач владельца пачками. payload: {"ids": [...]}.
+    Каждая пачка — обычный QuerySet.delete(): сигналы, надгробия и счётчики как всегда.
+    """
+    ids = job.payload["ids"]
+    batch_size = getattr(settings, "TASKS_JOBS_DELETE_BATCH_SIZE", 100)
+    deleted = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        deleted += Task.objects.filter(owner_id=job.owner_id, pk__in=batch).delete()[1].get("tasks.Task", 0)
+        job_progress(job, start + len(batch), len(ids), f"Удалено {deleted}")
+    return {"deleted": deleted}
+
+
+@handler("rebuild_counters", concurrency=1)
+def rebuild_counters(job):
+    """
+    Пересчёт счётчиков задач (manage.py rebuild_task_counters --background).
+    """
+    from . import counters
+
+    counters.rebuild()
+    return {"mismatches": len(counters.verify())}
+
+
+@handler("import_tasks", concurrency=1)
+def import_tasks(job):
+    """
+    Импорт файла командой import_tasks (manage.py import_tasks ... --background).
+    payload: {"path": ..., "options": {format, owner, batch_size, rejects}}.
+    Файл должен быть доступен воркеру по тому же пути.
+    """
+    from io import StringIO
+
+    from django.core.management import call_command
+
+    output = StringIO()
+    options = {name: value for name, value in job.payload.get("options", {}).items() if value is not None}
+    call_command("import_tasks", job.payload["path"], stdout=output, **options)
+    lines = output.getvalue().strip().splitlines()
+    return {"output": lines[-1] if lines else ""}
+
+
+@handler("refresh_analytics", concurrency=1)
+def refresh_analytics(job):
+    """
+    Обновление сводки отчётов (tasks/analytics.py, manage.py refresh_analytics --background).
+    payload: {"rebuild": true} — полный пересчёт.
+    """
+    from . import analytics
+
+    def progress(done, total):
+        job_progress(job, done, total, message="Обновление сводки")
+
+    if job.payload.get("rebuild"):
+        return analytics.rebuild(progress=progress)
+    return analytics.refresh(progress=progress)
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import archive
+
+
+class Command(BaseCommand):
+    """
+    Перенос старых выполненных задач в архив и возврат их обратно (tasks/archive.py).
+
+    Примеры:
+        python manage.py archive_tasks                        # DONE старше TASKS_ARCHIVE_AFTER_DAYS
+        python manage.py archive_tasks --days 30 --batch-size 500
+        python manage.py archive_tasks --restore --user alice # вернуть архив пользователя
+        python manage.py archive_tasks --restore              # вернуть весь архив
+    """
+
+    help = "Переносит выполненные задачи в архив (или возвращает их с --restore)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Сколько дней задача не менялась (по умолчанию из настроек)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Задач в одной транзакции")
+        parser.add_argument("--restore", action="store_true", help="Вернуть задачи из архива")
+        parser.add_argument("--user", help="Только задачи этого пользователя (username, для --restore)")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        if options["restore"]:
+            owner = None
+            if options["user"]:
+                try:
+                    owner = get_user_model().objects.get(username=options["user"])
+                except get_user_model().DoesNotExist:
+                    raise CommandError(f"Пользователь {options['user']} не найден")
+            restored = archive.restore(owner=owner, batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Возвращено из архива: {restored}"))
+            return
+
+        if options["user"]:
+            raise CommandError("--user используется только вместе с --restore")
+        older_than = timedelta(days=options["days"]) if options["days"] is not None else None
+        moved = archive.archive(older_than, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Перенесено в архив: {moved}"))
@@ -0,0 +1,99 @@
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from tasks.benchmarking import SCALES, bench_database, measure
+from tasks.models import Task
+
+# Режимы: (название, SESSION_ENGINE, ACCOUNTS_USER_CACHE_TIMEOUT).
+# Первый — поведение Django по умолчанию, с ним сравниваются остальные
+MODES = [
+    ("db", "django.contrib.sessions.backends.db", 0),
+    ("cached_db", "accounts.sessions", 0),
+    ("cached_db+user", "accounts.sessions", 60),
+    ("signed_cookies+user", "django.contrib.sessions.backends.signed_cookies", 60),
+]
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк авторизации запроса: сколько SQL-запросов и времени на запрос
+    к view задач уходит на чтение сессии и пользователя в каждом режиме
+    (сессии в БД / cached_db / signed cookies, с кэшем пользователя и без).
+
+    Данные — как у manage.py benchmark (временная БД, рабочая не затрагивается).
+
+        python manage.py bench_auth
+        python manage.py bench_auth --scale 100k --iterations 50 --output bench/auth.json
+    """
+
+    help = "Сравнивает число запросов и задержку view задач в разных режимах сессий"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(SCALES), default="1k", help="Объём данных")
+        parser.add_argument("--iterations", type=int, default=30, help="Замеров на маршрут")
+        parser.add_argument("--db-file", help="Файл временной БД")
+        parser.add_argument("--keepdb", action="store_true", help="Не удалять БД после прогона")
+        parser.add_argument("--output", help="Записать результаты в JSON-файл")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Бенчмарк рассчитан на SQLite")
+
+        with bench_database(
+            options["scale"], options["db_file"], options["keepdb"], stdout=self.stdout
+        ) as user:
+            results = {
+                name: self._run_mode(user, engine, user_timeout, options["iterations"])
+                for name, engine, user_timeout in MODES
+            }
+
+        self._print(results)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+
+    def routes(self, user):
+        task_id = Task.objects.filter(owner=user).values_list("pk", flat=True).first()
+        return {
+            "task_list": (reverse("task_list"), {}),
+            "task_list q": (reverse("task_list"), {"q": "отчёт"}),
+            "task_detail": (reverse("task_detail", args=[task_id]), {}),
+            "task_create": (reverse("task_create"), {}),
+            "task_dashboard": (reverse("task_dashboard"), {}),
+            "task_api_list": (reverse("task_api_list"), {}),
+            "task_api_detail": (reverse("task_api_detail", args=[task_id]), {}),
+            "task_sync": (reverse("task_sync"), {}),
+        }
+
+    def _run_mode(self, user, engine, user_timeout, iterations):
+        self.stdout.write(f"Режим {engine}, кэш пользователя {user_timeout} с")
+        with override_settings(SESSION_ENGINE=engine, ACCOUNTS_USER_CACHE_TIMEOUT=user_timeout):
+            caches[settings.SESSION_CACHE_ALIAS].clear()
+            client = Client()
+            client.force_login(user)
+            return {
+                name: measure(lambda url=url, query=query: client.get(url, query), iterations)
+                for name, (url, query) in self.routes(user).items()
+            }
+
+    def _print(self, results):
+        names = list(results)
+        baseline = results[names[0]]
+
+        self.stdout.write("")
+        self.stdout.write("SQL-запросов на запрос (в скобках — разница с режимом db), p50 мс")
+        self.stdout.write(f"{'маршрут':<18}" + "".join(f"{name:>26}" for name in names))
+        for route, base in baseline.items():
+            cells = []
+            for name in names:
+                row = results[name][route]
+                delta = row["queries"] - base["queries"]
+                cells.append(f"{row['queries']:>4} ({delta:+d}) {row['p50_ms']:>9.2f} мс")
+            self.stdout.write(f"{route:<18}" + "".join(f"{cell:>26}" for cell in cells))
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from tasks.benchmarking import SCALES, bench_database, percentile, views_mode
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    """
+    Сравнение синхронных view (путь WSGI, taskmanager/wsgi.py) и async-view
+    (путь ASGI, taskmanager/asgi.py) при нескольких одновременных запросах.
+
+    WSGI: N потоков, у каждого свой django.test.Client и своё соединение с БД
+          (как у потокового WSGI-сервера).
+    ASGI: один event loop, N одновременных запросов через django.test.AsyncClient
+          и async-view (ASYNC_VIEWS=True).
+
+    Для каждого уровня конкурентности печатает пропускную способность
+    (запросов в секунду) и p50/p95/p99 задержки.
+
+    Примеры:
+        python manage.py bench_concurrency --scale 1k
+        python manage.py bench_concurrency --scale 100k --concurrency 1,16,64 --output bench/asgi.json
+
+    Фрагментный кэш списка выключен на время прогона — иначе сравнивается кэш, а не view.
+    """
+
+    help = "Сравнивает конкурентность синхронных (WSGI) и async (ASGI) view"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(SCALES), default="1k", help="Объём данных")
+        parser.add_argument(
+            "--concurrency",
+            default="1,8,32",
+            help="Уровни конкурентности через запятую",
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Запросов на уровень")
+        parser.add_argument("--db-file", help="Файл временной БД")
+        parser.add_argument("--keepdb", action="store_true", help="Не удалять БД после прогона")
+        parser.add_argument("--output", help="Куда записать результаты (JSON)")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Бенчмарк рассчитан на SQLite")
+        levels = [int(level) for level in options["concurrency"].split(",") if level.strip()]
+
+        results = {"scale": options["scale"], "requests": options["requests"], "runs": []}
+        with bench_database(
+            options["scale"], options["db_file"], options["keepdb"], stdout=self.stdout
+        ) as user, self.settings_for_bench():
+            task_ids = list(
+                Task.objects.filter(owner=user).values_list("pk", flat=True)[:100]
+            )
+            connection.close()
+
+            for mode in ("wsgi", "asgi"):
+                with views_mode(async_views=(mode == "asgi")):
+                    urls = self.build_urls(user, task_ids)
+                    for level in levels:
+                        run = self.run_level(mode, user, urls, level, options["requests"])
+                        results["runs"].append(run)
+                        self.stdout.write(
+                            f"  {mode} c={level:<4} {run['rps']:>8.1f} запр/с  "
+                            f"p50={run['p50_ms']:.1f} p95={run['p95_ms']:.1f} p99={run['p99_ms']:.1f} мс"
+                        )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Результаты записаны в {options['output']}")
+
+    def settings_for_bench(self):
+        # Без кэша фрагментов и без сэмплирования метрик — меряем сами view
+        return override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+            REQUEST_METRICS_SAMPLE_RATE=0.0,
+        )
+
+    @staticmethod
+    def build_urls(user, task_ids):
+        """
+        Смесь запросов: страницы списка, карточки задач, админский список пользователей.
+        """
+        urls = [reverse("task_list") + f"?page={page}" for page in range(1, 6)]
+        urls += [reverse("task_detail", args=[pk]) for pk in task_ids[:20]]
+        urls += [reverse("admin_user_list")]
+        return urls
+
+    def run_level(self, mode, user, urls, concurrency, total):
+        runner = self.run_wsgi if mode == "wsgi" else self.run_asgi
+        started = time.perf_counter()
+        timings, errors = runner(user, urls, concurrency, total)
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        return {
+            "mode": mode,
+            "concurrency": concurrency,
+            "rps": round(len(timings) / elapsed, 1),
+            "p50_ms": round(percentile(timings, 0.50), 3),
+            "p95_ms": round(percentile(timings, 0.95), 3),
+            "p99_ms": round(percentile(timings, 0.99), 3),
+            "errors": errors,
+        }
+
+    @staticmethod
+    def run_wsgi(user, urls, concurrency, total):
+        timings, errors = [], []
+        lock = threading.Lock()
+        counter = iter(range(total))
+
+        def worker():
+            client = Client()
+            client.force_login(user)
+            try:
+                while True:
+                    with lock:
+                        i = next(counter, None)
+                    if i is None:
+                        return
+                    started = time.perf_counter()
+                    response = client.get(urls[i % len(urls)])
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        timings.append(elapsed)
+                        if response.status_code != 200:
+                            errors.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return timings, len(errors)
+
+    @staticmethod
+    def run_asgi(user, urls, concurrency, total):
+        client = AsyncClient()
+        client.force_login(user)
+        connection.close()
+        timings, errors = [], []
+
+        async def one(i, semaphore):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(urls[i % len(urls)])
+                timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+
+        async def main():
+            semaphore = asyncio.Semaphore(concurrency)
+            await asyncio.gather(*(one(i, semaphore) for i in range(total)))
+
+        asyncio.run(main())
+        return timings, len(errors)
@@ -0,0 +1,111 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import Context, Engine, engines
+from django.utils import timezone
+
+from tasks.cards import list_context, status_links
+from tasks.models import Task
+
+TEMPLATE = "tasks/task_list_items.html"
+
+# Загрузчики без кэша: шаблон читается с диска и разбирается при каждом рендере
+UNCACHED_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+
+def fake_tasks(count):
+    """
+    Задачи в памяти (без БД) с заполненными полями карточки.
+    """
+    now = timezone.now()
+    statuses, priorities = Task.Status.values, Task.Priority.values
+    return [
+        Task(
+            pk=i + 1,
+            owner_id=1,
+            title=f"Задача {i}",
+            description="Описание задачи " * 5,
+            status=statuses[i % len(statuses)],
+            priority=priorities[i % len(priorities)],
+            due_date=(now + timedelta(days=i % 30)).date() if i % 3 else None,
+            created_at=now - timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Микробенчмарк рендера карточек списка задач (tasks/task_list_items.html)
+    на 10 / 100 / 1000 карточках, без БД и HTTP: только подготовка контекста
+    (list_context из tasks/cards.py) и рендер шаблона.
+
+    Два режима загрузчика:
+    - cached   — шаблон из настроенного движка (кэширующий загрузчик, скомпилирован один раз)
+    - uncached — файл читается и разбирается при каждом рендере
+
+    Печатает медиану мс на рендер и мкс на карточку.
+
+        python manage.py bench_render
+        python manage.py bench_render --sizes 10 100 1000 5000 --iterations 100
+    """
+
+    help = "Замеряет время рендера карточек задач на 10/100/1000 карточках"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Числа карточек")
+        parser.add_argument("--iterations", type=int, default=30, help="Рендеров на замер")
+        parser.add_argument("--output", help="Записать результаты в JSON-файл")
+
+    def handle(self, *args, **options):
+        base = engines["django"].engine
+        uncached = Engine(
+            dirs=base.dirs,
+            loaders=UNCACHED_LOADERS,
+            libraries=base.libraries,
+            autoescape=base.autoescape,
+        )
+        loaders = {
+            "cached": lambda: base.get_template(TEMPLATE),
+            "uncached": lambda: uncached.get_template(TEMPLATE),
+        }
+
+        results = {}
+        for size in options["sizes"]:
+            tasks = fake_tasks(size)
+            page = Paginator(tasks, size).page(1)
+            histogram = status_links([(code, label, size) for code, label in Task.Status.choices], {})
+
+            results[size] = {}
+            for mode, get_template in loaders.items():
+                def render():
+                    context = list_context(page, {}, keyset=False)
+                    context["status_histogram"] = histogram
+                    return get_template().render(Context(context))
+
+                render()
+                timings = []
+                for _ in range(options["iterations"]):
+                    started = time.perf_counter()
+                    render()
+                    timings.append((time.perf_counter() - started) * 1000)
+                median = statistics.median(timings)
+                results[size][mode] = {"ms": round(median, 3), "us_per_card": round(median * 1000 / size, 2)}
+
+        self.stdout.write(f"{'карточек':>9}{'cached мс':>12}{'мкс/карт.':>11}{'uncached мс':>13}{'мкс/карт.':>11}")
+        for size, row in results.items():
+            self.stdout.write(
+                f"{size:>9}{row['cached']['ms']:>12.2f}{row['cached']['us_per_card']:>11.1f}"
+                f"{row['uncached']['ms']:>13.2f}{row['uncached']['us_per_card']:>11.1f}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
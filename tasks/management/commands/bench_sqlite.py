@@ -0,0 +1,166 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from taskmanager.sqlite import apply_pragmas
+
+SCHEMA = """
+CREATE TABLE bench_task (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner_id INTEGER NOT NULL,
+    title VARCHAR(200) NOT NULL,
+    status VARCHAR(4) NOT NULL,
+    priority INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX bench_task_owner ON bench_task(owner_id, created_at);
+"""
+
+
+def _worker(args):
+    """
+    Один процесс-«воркер»: чередует короткие транзакции записи и чтения,
+    как это делают запросы веб-приложения. Возвращает (коммитов, чтений, ошибок блокировки).
+    """
+    path, pragmas, begin, timeout, seconds, worker_id, reads_per_write = args
+
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    apply_pragmas(conn.cursor(), pragmas)
+
+    commits = reads = locked = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            conn.execute(begin)
+            conn.execute(
+                "INSERT INTO bench_task(owner_id, title, status, priority, created_at) "
+                "VALUES (?, ?, 'TODO', 2, datetime('now'))",
+                (worker_id, f"task {commits}"),
+            )
+            conn.execute("COMMIT")
+            commits += 1
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+
+        for _ in range(reads_per_write):
+            try:
+                conn.execute(
+                    "SELECT id, title FROM bench_task WHERE owner_id = ? "
+                    "ORDER BY created_at DESC LIMIT 10",
+                    (worker_id,),
+                ).fetchall()
+                reads += 1
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                locked += 1
+
+    conn.close()
+    return commits, reads, locked
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк конкурентной записи в SQLite: настройки по умолчанию против
+    профиля из settings.SQLITE_PRAGMAS (WAL, synchronous=NORMAL, busy_timeout...)
+    с транзакциями как в профиле tuned (BEGIN IMMEDIATE, OPTIONS["transaction_mode"]).
+
+    Каждый профиль запускается на отдельном временном файле БД, несколько
+    процессов одновременно пишут и читают короткими транзакциями.
+
+        python manage.py bench_sqlite --workers 8 --seconds 5
+    """
+
+    help = "Сравнивает пропускную способность конкурентной записи в SQLite до и после настройки"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Число процессов")
+        parser.add_argument("--seconds", type=float, default=5.0, help="Длительность прогона профиля")
+        parser.add_argument(
+            "--reads-per-write", type=int, default=4, help="Сколько чтений на одну запись"
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=5.0,
+            help="Таймаут ожидания блокировки драйвером, с (для профиля по умолчанию; "
+            "5 с — значение по умолчанию у sqlite3 и Django)",
+        )
+        parser.add_argument("--output", help="Записать результаты в JSON-файл")
+
+    def handle(self, *args, **options):
+        tuned = settings.SQLITE_PRAGMAS or {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+        }
+        transaction_mode = settings.DATABASES["default"].get("OPTIONS", {}).get(
+            "transaction_mode", "IMMEDIATE"
+        )
+        profiles = [
+            ("default", {}, "BEGIN", options["timeout"]),
+            ("tuned", tuned, f"BEGIN {transaction_mode}", tuned.get("busy_timeout", 5000) / 1000),
+        ]
+
+        results = {}
+        for name, pragmas, begin, timeout in profiles:
+            results[name] = self._run(name, pragmas, begin, timeout, options)
+
+        self.stdout.write("")
+        self.stdout.write(f"{'профиль':<10}{'коммитов/с':>12}{'чтений/с':>12}{'locked':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<10}{result['commits_per_sec']:>12.0f}"
+                f"{result['reads_per_sec']:>12.0f}{result['locked_errors']:>10}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+
+    def _run(self, name, pragmas, begin, timeout, options):
+        workers, seconds = options["workers"], options["seconds"]
+        self.stdout.write(
+            f"Профиль {name}: {workers} процессов, {seconds} с, {begin}, PRAGMA {pragmas or '—'}"
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.sqlite3")
+            conn = sqlite3.connect(path)
+            apply_pragmas(conn.cursor(), pragmas)
+            conn.executescript(SCHEMA)
+            conn.close()
+
+            jobs = [
+                (path, pragmas, begin, timeout, seconds, worker_id, options["reads_per_write"])
+                for worker_id in range(workers)
+            ]
+            started = time.monotonic()
+            with multiprocessing.Pool(workers) as pool:
+                stats = pool.map(_worker, jobs)
+            elapsed = time.monotonic() - started
+
+        commits = sum(s[0] for s in stats)
+        reads = sum(s[1] for s in stats)
+        locked = sum(s[2] for s in stats)
+        return {
+            "pragmas": pragmas,
+            "begin": begin,
+            "workers": workers,
+            "seconds": round(elapsed, 2),
+            "commits": commits,
+            "reads": reads,
+            "locked_errors": locked,
+            "commits_per_sec": commits / elapsed,
+            "reads_per_sec": reads / elapsed,
+        }
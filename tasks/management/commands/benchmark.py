@@ -0,0 +1,214 @@
+import json
+import os
+import subprocess
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+import accounts.urls
+import tasks.urls
+from tasks.benchmarking import SCALES, bench_database, measure
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк задержек всех маршрутов tasks/urls.py и accounts/urls.py.
+
+    1) создаёт отдельную временную БД (рабочая база не затрагивается),
+    2) заполняет её синтетическими пользователями и задачами нужного масштаба,
+    3) прогоняет каждый маршрут через django.test.Client,
+    4) печатает p50/p95/p99, число SQL-запросов и RSS и пишет всё в JSON.
+
+    Примеры:
+        python manage.py benchmark --scale 1k
+        python manage.py benchmark --scale 100k --output bench/100k.json
+        python manage.py benchmark --scale 100k --db-file /tmp/bench.sqlite3 --keepdb
+        python manage.py benchmark --scale 1k --compare bench/before.json
+
+    JSON двух прогонов (например, до и после коммита) сравнивается через --compare.
+    """
+
+    help = "Замеряет задержки и число запросов всех маршрутов на синтетических данных"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(SCALES), default="1k", help="Объём данных")
+        parser.add_argument("--iterations", type=int, default=30, help="Замеров на маршрут")
+        parser.add_argument(
+            "--db-file",
+            help="Файл временной БД (по умолчанию — во временном каталоге)",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Не удалять БД после прогона и не заполнять повторно",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Очищать кэш перед каждым запросом (замер «холодного» пути)",
+        )
+        parser.add_argument("--only", help="Только маршруты, в имени которых есть подстрока")
+        parser.add_argument("--output", help="Куда записать результаты (JSON)")
+        parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Бенчмарк рассчитан на SQLite")
+
+        with bench_database(
+            options["scale"], options["db_file"], options["keepdb"], stdout=self.stdout
+        ) as user:
+            results = self._run(user, options)
+
+        self._print(results, options["compare"])
+        if options["output"]:
+            os.makedirs(os.path.dirname(os.path.abspath(options["output"])), exist_ok=True)
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Результаты записаны в {options['output']}")
+
+    def route_specs(self, user):
+        """
+        Варианты запросов для каждого именованного маршрута: имя -> [(метка, вызов)].
+        Маршрут без описания здесь попадёт в отчёт как непокрытый.
+        """
+        own = Task.objects.filter(owner=user).order_by("-created_at", "-id")
+        task_id = own.values_list("pk", flat=True)[0]
+        bulk_ids = list(own.values_list("pk", flat=True)[:100])
+        some_word = "отчёт"
+
+        def get(name, args=None, query=None, anonymous=False):
+            url = reverse(name, args=args)
+            client = self.anonymous if anonymous else self.client
+            return lambda: client.get(url, query or {})
+
+        def post(name, data, args=None):
+            url = reverse(name, args=args)
+            return lambda: self.client.post(url, data)
+
+        return {
+            "task_list": [
+                ("", get("task_list")),
+                ("page=5", get("task_list", query={"page": 5})),
+                ("q", get("task_list", query={"q": some_word})),
+                ("status+priority", get("task_list", query={"status": "TODO", "priority": 3})),
+            ],
+            "task_create": [("", get("task_create"))],
+            "task_detail": [("", get("task_detail", args=[task_id]))],
+            "task_edit": [("", get("task_edit", args=[task_id]))],
+            "task_delete": [("", get("task_delete", args=[task_id]))],
+            "task_bulk": [
+                ("set_priority x100", post("task_bulk", {"ids": bulk_ids, "action": "set_priority", "priority": 2})),
+            ],
+            "task_export": [("jsonl status=DONE", get("task_export", query={"format": "jsonl", "status": "DONE"}))],
+            "task_api_list": [
+                ("", get("task_api_list")),
+                ("fields=id,title,status limit=200", get("task_api_list", query={"fields": "id,title,status", "limit": 200})),
+            ],
+            "task_api_detail": [("", get("task_api_detail", args=[task_id]))],
+            "task_dashboard": [("", get("task_dashboard"))],
+            "task_api_dashboard": [("top=20", get("task_api_dashboard", query={"top": 20}))],
+            "task_sync": [("initial limit=500", get("task_sync"))],
+            "register": [("anonymous", get("register", anonymous=True))],
+            "profile": [("", get("profile"))],
+            "admin_user_list": [
+                ("", get("admin_user_list")),
+                ("q", get("admin_user_list", query={"q": "user_1"})),
+            ],
+            "admin_user_detail": [("", get("admin_user_detail", args=[user.pk]))],
+            "admin_task_export": [
+                ("owner jsonl", get("admin_task_export", query={"format": "jsonl", "owner": user.pk})),
+            ],
+            "admin_metrics": [("", get("admin_metrics"))],
+        }
+
+    # --- прогон ---
+
+    def _run(self, user, options):
+        self.client = Client()
+        self.client.force_login(user)
+        self.anonymous = Client()
+
+        cache = caches["default"]
+        before_each = cache.clear if options["no_cache"] else None
+
+        specs = self.route_specs(user)
+        route_names = [
+            p.name for p in tasks.urls.urlpatterns + accounts.urls.urlpatterns if p.name
+        ]
+        uncovered = [name for name in route_names if name not in specs]
+
+        routes = {}
+        for name in route_names:
+            for label, call in specs.get(name, []):
+                key = f"{name} {label}".strip()
+                if options["only"] and options["only"] not in key:
+                    continue
+                routes[key] = measure(call, options["iterations"], before_each=before_each)
+                self.stdout.write(
+                    f"  {key:<40} p50={routes[key]['p50_ms']:>8.2f} мс  "
+                    f"queries={routes[key]['queries']}"
+                )
+
+        return {
+            "meta": {
+                "commit": self._git_commit(),
+                "scale": options["scale"],
+                "tasks": Task.objects.count(),
+                "iterations": options["iterations"],
+                "no_cache": options["no_cache"],
+                "django": django.get_version(),
+                "created_at": datetime.now(dt_timezone.utc).isoformat(),
+                "uncovered_routes": uncovered,
+            },
+            "routes": routes,
+        }
+
+    @staticmethod
+    def _git_commit():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    # --- отчёт ---
+
+    def _print(self, results, compare_path):
+        baseline = {}
+        if compare_path:
+            with open(compare_path, encoding="utf-8") as f:
+                baseline = json.load(f).get("routes", {})
+
+        self.stdout.write("")
+        header = f"{'маршрут':<40}{'p50':>9}{'p95':>9}{'p99':>9}{'SQL':>5}{'RSS МиБ':>9}"
+        if baseline:
+            header += f"{'Δp95':>9}"
+        self.stdout.write(header)
+
+        for key, row in results["routes"].items():
+            line = (
+                f"{key:<40}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+                f"{row['queries']:>5}{row['rss_kb'] / 1024:>9.1f}"
+            )
+            if key in baseline and baseline[key].get("p95_ms"):
+                delta = (row["p95_ms"] - baseline[key]["p95_ms"]) / baseline[key]["p95_ms"] * 100
+                line += f"{delta:>+8.0f}%"
+            self.stdout.write(line)
+
+        if results["meta"]["uncovered_routes"]:
+            self.stderr.write(
+                "Маршруты без сценария: " + ", ".join(results["meta"]["uncovered_routes"])
+            )
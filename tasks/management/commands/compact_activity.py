@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from tasks import activity
+
+
+class Command(BaseCommand):
+    """
+    Обслуживание журнала изменений задач (TaskActivity, tasks/activity.py):
+    - записи старше TASKS_ACTIVITY_COMPACT_AFTER_DAYS схлопываются до одной на задачу за день
+    - записи старше TASKS_ACTIVITY_RETENTION_DAYS удаляются
+
+    Примеры:
+        python manage.py compact_activity
+        python manage.py compact_activity --compact-after-days 7 --retention-days 180
+    """
+
+    help = "Схлопывает старые записи журнала изменений задач и удаляет записи старше срока хранения"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--compact-after-days", type=int, help="Схлопывать записи старше N дней")
+        parser.add_argument("--retention-days", type=int, help="Удалять записи старше N дней")
+        parser.add_argument("--batch-size", type=int, default=10_000, help="Строк за один проход")
+
+    def handle(self, *args, **options):
+        compact_after = options["compact_after_days"]
+        retention_days = options["retention_days"]
+
+        deleted = activity.purge(
+            timedelta(days=retention_days) if retention_days is not None else None,
+            batch_size=options["batch_size"],
+        )
+        merged, dropped = activity.compact(
+            timedelta(days=compact_after) if compact_after is not None else None,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Удалено по сроку хранения: {deleted}; схлопнуто: {merged} записей, удалено при схлопывании: {dropped}"
+        ))
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from tasks import sync
+
+
+class Command(BaseCommand):
+    """
+    Удаление старых надгробий удалённых задач (TaskTombstone).
+
+    Надгробия нужны клиентам синхронизации, чтобы узнать об удалениях.
+    Клиент с курсором старше срока хранения всё равно получит 410 и
+    синхронизируется заново, поэтому более старые записи можно удалять.
+
+    Примеры:
+        python manage.py compact_tombstones              # старше TASKS_TOMBSTONE_RETENTION_DAYS
+        python manage.py compact_tombstones --days 7
+    """
+
+    help = "Удаляет надгробия удалённых задач старше срока хранения"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Срок хранения в днях (по умолчанию из настроек)")
+        parser.add_argument("--batch-size", type=int, default=10_000, help="Строк за один DELETE")
+
+    def handle(self, *args, **options):
+        older_than = timedelta(days=options["days"]) if options["days"] is not None else None
+        deleted = sync.compact(older_than, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Удалено надгробий: {deleted}"))
@@ -0,0 +1,328 @@
+import csv
+import json
+import os
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from tasks import activity
+from tasks.cache import bump_owner_version
+from tasks.forms import TaskForm
+from tasks.models import Task
+
+User = get_user_model()
+
+# Поля, которые проверяем правилами полей TaskForm
+FORM_FIELDS = TaskForm._meta.fields
+
+# Какие колонки могут задавать владельца (как в выгрузках CSV/JSONL)
+OWNER_USERNAME_COLUMNS = ("owner", "owner__username", "owner_username")
+
+
+class Command(BaseCommand):
+    """
+    Массовый импорт задач из CSV или JSON Lines.
+
+    Файл читается потоково (строка за строкой), каждая строка проверяется
+    правилами полей TaskForm (длина названия, допустимые статус/приоритет,
+    формат даты) без создания формы и модели на каждую строку.
+    Прошедшие проверку строки вставляются через bulk_create пачками,
+    каждая пачка — в своей транзакции.
+
+    Примеры:
+        python manage.py import_tasks tasks.csv --owner oleg
+        python manage.py import_tasks all.jsonl --batch-size 10000 --rejects bad.jsonl
+        cat tasks.csv | python manage.py import_tasks - --format csv --owner oleg
+        python manage.py import_tasks /data/tasks.csv --owner oleg --background
+
+    Колонки: title, description, status, priority, due_date (как в TaskForm),
+    необязательно created_at и владелец (owner / owner__username / owner_id).
+    Формат совпадает с выгрузкой /export/ и /accounts/admin/tasks/export/.
+    """
+
+    help = "Импортирует задачи из CSV/JSONL пачками через bulk_create"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу или '-' для stdin")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Формат файла (по умолчанию — по расширению)",
+        )
+        parser.add_argument(
+            "--owner",
+            help="username владельца для строк без колонки владельца",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Сколько строк вставлять одной пачкой (по умолчанию 5000)",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="Куда записать отклонённые строки (JSONL с номером строки и ошибками)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только проверить строки, ничего не записывая",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Поставить импорт фоновым заданием (файл должен быть доступен воркерам)",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or self._guess_format(path)
+
+        if options["background"]:
+            return self._enqueue(path, fmt, options)
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size должен быть положительным")
+
+        default_owner_id = None
+        if options["owner"]:
+            default_owner_id = (
+                User.objects.filter(username=options["owner"]).values_list("pk", flat=True).first()
+            )
+            if default_owner_id is None:
+                raise CommandError(f"Пользователь {options['owner']} не найден")
+
+        self._owner_cache = {}
+        # id пользователей, существование которых уже проверено (--owner, username, owner_id)
+        self._known_owner_ids = {default_owner_id} if default_owner_id is not None else set()
+        self._fields = {name: TaskForm.base_fields[name] for name in FORM_FIELDS}
+
+        source = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        rejects = open(options["rejects"], "w", encoding="utf-8") if options["rejects"] else None
+
+        started = time.monotonic()
+        imported = rejected = 0
+        batch = []
+
+        try:
+            for line_no, row in self._read(source, fmt):
+                try:
+                    batch.append((line_no, row, self._build_task(row, default_owner_id)))
+                except ValidationError as e:
+                    rejected += 1
+                    self._reject(rejects, line_no, row, e)
+                    continue
+
+                if len(batch) >= batch_size:
+                    rejected += self._reject_unknown_owners(batch, rejects)
+                    imported += self._flush(batch, options["dry_run"])
+                    batch = []
+                    self._progress(imported, rejected, started)
+
+            rejected += self._reject_unknown_owners(batch, rejects)
+            imported += self._flush(batch, options["dry_run"])
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if rejects:
+                rejects.close()
+
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else 0
+        verb = "Проверено" if options["dry_run"] else "Импортировано"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb}: {imported}, отклонено: {rejected}, "
+            f"время: {elapsed:.1f} с, скорость: {rate:.0f} строк/с"
+        ))
+
+    def _enqueue(self, path, fmt, options):
+        from tasks import jobs
+
+        if path == "-":
+            raise CommandError("Из stdin нельзя импортировать в фоне")
+        job = jobs.enqueue("import_tasks", {
+            "path": os.path.abspath(path),
+            "options": {
+                "format": fmt,
+                "owner": options["owner"],
+                "batch_size": options["batch_size"],
+                "rejects": os.path.abspath(options["rejects"]) if options["rejects"] else None,
+                "dry_run": options["dry_run"],
+            },
+        # Повтор после ошибки вставил бы уже импортированные пачки второй раз
+        }, max_attempts=1)
+        self.stdout.write(self.style.SUCCESS(f"Задание #{job.pk} поставлено в очередь."))
+
+    # --- чтение ---
+
+    @staticmethod
+    def _guess_format(path):
+        if path.endswith(".csv"):
+            return "csv"
+        if path.endswith((".jsonl", ".ndjson")):
+            return "jsonl"
+        raise CommandError("Не удалось определить формат, укажите --format")
+
+    @staticmethod
+    def _read(source, fmt):
+        """
+        Генератор (номер строки, словарь колонок). Файл целиком в память не читается.
+        """
+        if fmt == "csv":
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        for line_no, line in enumerate(source, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                # Битая строка JSON — тоже отклонённая строка, а не падение импорта
+                yield line_no, {"__invalid__": line}
+                continue
+            yield line_no, row
+
+    # --- проверка ---
+
+    def _owner_id(self, row, default_owner_id):
+        # Существование owner_id проверяется позже, одним запросом на пачку
+        # (_reject_unknown_owners); username ищется сразу, с кэшем
+        owner_id = row.get("owner_id")
+        if owner_id not in (None, ""):
+            return int(owner_id)
+
+        for column in OWNER_USERNAME_COLUMNS:
+            username = row.get(column)
+            if username:
+                if username not in self._owner_cache:
+                    self._owner_cache[username] = (
+                        User.objects.filter(username=username).values_list("pk", flat=True).first()
+                    )
+                owner_id = self._owner_cache[username]
+                if owner_id is None:
+                    raise ValidationError({"owner": f"Пользователь {username} не найден"})
+                self._known_owner_ids.add(owner_id)
+                return owner_id
+
+        if default_owner_id is None:
+            raise ValidationError({"owner": "Не указан владелец (колонка owner или --owner)"})
+        return default_owner_id
+
+    def _build_task(self, row, default_owner_id):
+        """
+        Проверяет строку правилами полей TaskForm и возвращает несохранённый Task.
+        Все ошибки строки собираются вместе, как в форме.
+        """
+        if "__invalid__" in row:
+            raise ValidationError({"__all__": "Некорректная строка JSON"})
+
+        values, errors = {}, {}
+        for name, field in self._fields.items():
+            raw = row.get(name)
+            if raw is None:
+                raw = ""
+            try:
+                values[name] = field.clean(raw if isinstance(raw, str) else str(raw))
+            except ValidationError as e:
+                errors[name] = e.messages
+
+        # Пустой статус/приоритет — значения по умолчанию модели, как в форме создания
+        if "status" in errors and not row.get("status"):
+            values["status"] = Task.Status.TODO
+            del errors["status"]
+        if "priority" in errors and row.get("priority") in (None, ""):
+            values["priority"] = Task.Priority.MEDIUM
+            del errors["priority"]
+
+        try:
+            values["owner_id"] = self._owner_id(row, default_owner_id)
+        except (ValueError, TypeError):
+            errors["owner"] = ["Некорректный owner_id"]
+        except ValidationError as e:
+            errors.update(e.message_dict)
+
+        created_at = row.get("created_at")
+        if created_at:
+            parsed = parse_datetime(str(created_at))
+            if parsed is None:
+                errors["created_at"] = ["Некорректная дата создания"]
+            else:
+                if timezone.is_naive(parsed):
+                    parsed = timezone.make_aware(parsed)
+                values["created_at"] = parsed
+
+        if errors:
+            raise ValidationError(errors)
+        return Task(**values)
+
+    def _reject_unknown_owners(self, batch, rejects):
+        """
+        Проверяет owner_id строк пачки одним запросом (уже известные id не запрашиваются)
+        и убирает из пачки строки с несуществующим владельцем — они уходят в отклонённые,
+        а не роняют bulk_create ошибкой внешнего ключа. Возвращает число отклонённых.
+        """
+        unknown = {task.owner_id for _, _, task in batch} - self._known_owner_ids
+        if not unknown:
+            return 0
+        self._known_owner_ids.update(User.objects.filter(pk__in=unknown).values_list("pk", flat=True))
+
+        rejected = 0
+        for line_no, row, task in batch:
+            if task.owner_id not in self._known_owner_ids:
+                rejected += 1
+                self._reject(rejects, line_no, row, ValidationError(
+                    {"owner": f"Пользователь с id {task.owner_id} не найден"}
+                ))
+        if rejected:
+            batch[:] = [item for item in batch if item[2].owner_id in self._known_owner_ids]
+        return rejected
+
+    # --- запись ---
+
+    @staticmethod
+    def _flush(batch, dry_run):
+        if not batch:
+            return 0
+        tasks = [task for _, _, task in batch]
+        if not dry_run:
+            with transaction.atomic():
+                Task.objects.bulk_create(tasks)
+                # bulk_create сигналов не шлёт — выполненные задачи пишем в журнал
+                # (для отчётов) и сбрасываем кэш списков владельцев явно
+                activity.record([
+                    (task.owner_id, task.pk, {"status": (None, task.status)})
+                    for task in tasks
+                    if task.status == Task.Status.DONE
+                ])
+            # буфер журнала сбрасывается после каждой пачки, а не при выходе процесса
+            activity.flush()
+            for owner_id in {task.owner_id for task in tasks}:
+                bump_owner_version(owner_id)
+        return len(tasks)
+
+    @staticmethod
+    def _reject(rejects, line_no, row, error):
+        if rejects is None:
+            return
+        rejects.write(json.dumps(
+            {"line": line_no, "errors": error.message_dict, "row": row},
+            ensure_ascii=False,
+            default=str,
+        ) + "\n")
+
+    def _progress(self, imported, rejected, started):
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(f"  {imported} строк, отклонено {rejected}, {rate:.0f} строк/с")
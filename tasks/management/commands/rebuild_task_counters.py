@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import counters, jobs
+
+
+class Command(BaseCommand):
+    """
+    Пересчёт и проверка денормализованных счётчиков задач (TaskCounter).
+
+    Примеры:
+        python manage.py rebuild_task_counters            # пересчитать и проверить
+        python manage.py rebuild_task_counters --check    # только проверить
+        python manage.py rebuild_task_counters --background  # поставить в очередь run_workers
+    """
+
+    help = "Пересчитывает счётчики задач по владельцам и проверяет их по таблице задач"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только сверить счётчики с таблицей задач, ничего не меняя",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Не пересчитывать здесь, а поставить фоновое задание (manage.py run_workers)",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Алиас базы данных (по умолчанию default)",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+
+        if not counters.enabled(using):
+            raise CommandError("Счётчики поддерживаются только на SQLite")
+
+        if options["background"]:
+            job = jobs.enqueue("rebuild_counters")
+            self.stdout.write(self.style.SUCCESS(f"Задание #{job.pk} поставлено в очередь."))
+            return
+
+        if not options["check"]:
+            counters.rebuild(using)
+            self.stdout.write("Счётчики пересчитаны.")
+
+        mismatches = counters.verify(using)
+        if mismatches:
+            for owner_id, status, priority, stored, actual in mismatches[:50]:
+                self.stderr.write(
+                    f"owner={owner_id} status={status} priority={priority}: "
+                    f"хранится {stored}, на самом деле {actual}"
+                )
+            raise CommandError(f"Расхождений: {len(mismatches)}")
+
+        self.stdout.write(self.style.SUCCESS("Счётчики совпадают с таблицей задач."))
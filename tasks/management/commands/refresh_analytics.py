@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from tasks import analytics, jobs
+
+
+class Command(BaseCommand):
+    """
+    Обновление сводки отчётов TaskWeeklyStats (tasks/analytics.py).
+
+    По умолчанию дописывает только новые задачи и записи журнала изменений
+    после прошлого обновления — запускать можно часто (cron, раз в несколько минут).
+
+    Примеры:
+        python manage.py refresh_analytics
+        python manage.py refresh_analytics --rebuild        # полный пересчёт
+        python manage.py refresh_analytics --background     # поставить в очередь run_workers
+    """
+
+    help = "Инкрементально обновляет недельную сводку по задачам для отчётов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Пересчитать сводку с нуля (с архивом и задачами, выполненными до журнала)",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Не обновлять здесь, а поставить фоновое задание (manage.py run_workers)",
+        )
+        parser.add_argument("--batch-size", type=int, help="Диапазон id на одну транзакцию")
+
+    def handle(self, *args, **options):
+        if options["background"]:
+            job = jobs.enqueue("refresh_analytics", {"rebuild": options["rebuild"]}, max_attempts=1)
+            self.stdout.write(self.style.SUCCESS(f"Задание #{job.pk} поставлено в очередь."))
+            return
+
+        run = analytics.rebuild if options["rebuild"] else analytics.refresh
+        result = run(step=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Сводка обновлена: задач {result['tasks']}, записей журнала {result['activity']}"
+        ))
@@ -0,0 +1,94 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _worker_main(slot, stop_event, poll_interval):
+    """
+    Точка входа процесса-воркера. Django настраивается заново (при запуске через
+    spawn процесс стартует с чистого интерпретатора), модели импортируются после этого.
+    """
+    import django
+
+    django.setup()
+    from tasks import jobs
+
+    # Ctrl+C получает вся группа процессов: воркер доделывает текущее задание
+    # и выходит по stop_event, который выставляет главный процесс
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    jobs.worker_loop(jobs.worker_name(slot), stop_event, poll_interval)
+
+
+class Command(BaseCommand):
+    """
+    Пул процессов-воркеров для фоновых заданий (tasks/jobs.py).
+
+    Главный процесс запускает --processes воркеров, перезапускает упавшие
+    и раз в минуту возвращает в очередь задания «зависших» воркеров.
+    SIGTERM / Ctrl+C — мягкая остановка: воркеры доделывают текущие задания.
+
+    Примеры:
+        python manage.py run_workers                  # TASKS_JOBS_WORKERS процессов
+        python manage.py run_workers --processes 4
+        python manage.py run_workers --once           # выполнить очередь в этом процессе и выйти
+    """
+
+    help = "Запускает воркеры фоновых заданий (очередь Job в БД)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, help="Сколько воркеров (по умолчанию TASKS_JOBS_WORKERS)")
+        parser.add_argument("--poll-interval", type=float, help="Пауза пустого воркера, секунд")
+        parser.add_argument("--once", action="store_true", help="Выполнить готовые задания здесь же и выйти")
+
+    def handle(self, *args, **options):
+        from tasks import jobs
+
+        jobs.requeue_stale()
+
+        if options["once"]:
+            done = jobs.run_pending(jobs.worker_name())
+            self.stdout.write(self.style.SUCCESS(f"Выполнено заданий: {done}"))
+            return
+
+        processes = options["processes"] or getattr(settings, "TASKS_JOBS_WORKERS", 2)
+        poll_interval = options["poll_interval"] or getattr(settings, "TASKS_JOBS_POLL_INTERVAL", 1.0)
+
+        stop_event = multiprocessing.Event()
+        # Обработчик сигнала только ставит флаг: Event.set() из обработчика,
+        # прервавшего stop_event.wait() этого же процесса, зависает на блокировке Event
+        stopping = []
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stopping.append(signum))
+
+        # Соединения с БД не должны переходить в дочерние процессы при fork
+        connections.close_all()
+
+        workers = {}
+        self.stdout.write(f"Воркеров: {processes}, Ctrl+C — остановка")
+        ticks = 0
+        while not stopping:
+            for slot in range(processes):
+                process = workers.get(slot)
+                if process is None or not process.is_alive():
+                    if process is not None:
+                        self.stderr.write(f"Воркер {slot} завершился (код {process.exitcode}), перезапуск")
+                    process = multiprocessing.Process(
+                        target=_worker_main, args=(slot, stop_event, poll_interval), daemon=True
+                    )
+                    process.start()
+                    workers[slot] = process
+
+            time.sleep(1)
+            ticks += 1
+            if ticks % 60 == 0:
+                jobs.requeue_stale()
+                connections.close_all()
+
+        stop_event.set()
+        for process in workers.values():
+            process.join()
+        self.stdout.write(self.style.SUCCESS("Воркеры остановлены"))
@@ -0,0 +1,159 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Выполняется в дочернем интерпретаторе: импорт точки входа (wsgi / asgi) целиком,
+# включая django.setup() и прогрев (taskmanager/startup.py)
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+__import__(sys.argv[1])
+total_ms = (time.perf_counter() - started) * 1000
+from taskmanager import startup
+print(json.dumps({"import_ms": total_ms, "prewarm": startup.TIMINGS}))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Вывод python -X importtime -> [(модуль, собственное время мкс, накопленное мкс)].
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[0].isdigit():
+            # Заголовок «self [us] | cumulative | imported package»
+            continue
+        rows.append((parts[2], int(parts[0]), int(parts[1])))
+    return rows
+
+
+def module_group(name):
+    """
+    Группа для сводки: django.contrib.<app>, django.<подпакет> или пакет верхнего уровня.
+    """
+    parts = name.split(".")
+    if parts[0] == "django" and len(parts) > 1:
+        return ".".join(parts[:3] if parts[1] == "contrib" and len(parts) > 2 else parts[:2])
+    return parts[0]
+
+
+class Command(BaseCommand):
+    """
+    Профиль холодного старта процесса-воркера.
+
+    Точка входа (taskmanager.wsgi или taskmanager.asgi) импортируется в отдельном
+    чистом интерпретаторе — так, как её загружает gunicorn / uvicorn:
+    - несколько запусков без профилировщика: время до готового приложения
+      (медиана) и время шагов прогрева (taskmanager/startup.py);
+    - один запуск с python -X importtime: самые дорогие модули
+      и собственное время импорта по пакетам (django.contrib.admin, dotenv, tasks, ...).
+
+    --profile задаёт DJANGO_PROCESS_PROFILE дочернему процессу (full / api),
+    --compare — прогон обоих профилей и разница.
+
+        python manage.py startup_profile
+        python manage.py startup_profile --target asgi --profile api --top 30
+        python manage.py startup_profile --compare --output bench/startup.json
+    """
+
+    help = "Замеряет время импорта модулей и прогрева при старте wsgi/asgi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=["wsgi", "asgi"], default="wsgi", help="Точка входа")
+        parser.add_argument(
+            "--profile", choices=settings.PROCESS_PROFILES, help="Профиль процесса (по умолчанию текущий)"
+        )
+        parser.add_argument("--compare", action="store_true", help="Сравнить все профили")
+        parser.add_argument("--repeat", type=int, default=3, help="Запусков для медианы")
+        parser.add_argument("--top", type=int, default=20, help="Сколько модулей и пакетов показать")
+        parser.add_argument("--output", help="Записать результаты в JSON-файл")
+
+    def handle(self, *args, **options):
+        profiles = (
+            settings.PROCESS_PROFILES if options["compare"]
+            else [options["profile"] or settings.PROCESS_PROFILE]
+        )
+        results = {profile: self.profile(profile, options) for profile in profiles}
+
+        for profile, result in results.items():
+            self._print(profile, result, options["top"])
+        if len(results) > 1:
+            self.stdout.write("")
+            base = results[profiles[0]]["import_ms"]
+            for profile, result in results.items():
+                delta = (result["import_ms"] - base) / base * 100
+                self.stdout.write(f"{profile:<8}{result['import_ms']:>9.1f} мс{delta:>+8.0f}%")
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+
+    def _child(self, profile, target, importtime=False):
+        env = {**os.environ, "DJANGO_PROCESS_PROFILE": profile, "PYTHONDONTWRITEBYTECODE": "1"}
+        command = [sys.executable]
+        if importtime:
+            command += ["-X", "importtime"]
+        command += ["-c", CHILD, f"taskmanager.{target}"]
+
+        started = time.perf_counter()
+        completed = subprocess.run(command, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        process_ms = (time.perf_counter() - started) * 1000
+        if completed.returncode != 0:
+            raise CommandError(f"Процесс не запустился ({profile}):\n{completed.stderr[-2000:]}")
+        data = json.loads(completed.stdout.strip().splitlines()[-1])
+        data["process_ms"] = process_ms
+        return data, completed.stderr
+
+    def profile(self, profile, options):
+        target = options["target"]
+        runs = [self._child(profile, target)[0] for _ in range(max(1, options["repeat"]))]
+        _, stderr = self._child(profile, target, importtime=True)
+
+        modules = parse_importtime(stderr)
+        groups = {}
+        for name, self_us, _ in modules:
+            group = module_group(name)
+            groups[group] = groups.get(group, 0) + self_us
+
+        top = options["top"]
+        return {
+            "target": target,
+            "import_ms": round(statistics.median(run["import_ms"] for run in runs), 1),
+            "process_ms": round(statistics.median(run["process_ms"] for run in runs), 1),
+            "prewarm_ms": runs[-1]["prewarm"],
+            "modules": len(modules),
+            "top_modules": [
+                {"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative / 1000}
+                for name, self_us, cumulative in sorted(modules, key=lambda row: -row[2])[:top]
+            ],
+            "top_groups": [
+                {"group": group, "self_ms": self_us / 1000}
+                for group, self_us in sorted(groups.items(), key=lambda item: -item[1])[:top]
+            ],
+        }
+
+    def _print(self, profile, result, top):
+        prewarm = ", ".join(f"{step} {ms:.1f}" for step, ms in result["prewarm_ms"].items()) or "выключен"
+        self.stdout.write("")
+        self.stdout.write(
+            f"Профиль {profile}, taskmanager.{result['target']}: {result['import_ms']:.1f} мс до готового "
+            f"приложения, {result['process_ms']:.1f} мс процесс целиком; "
+            f"модулей: {result['modules']}; прогрев (мс): {prewarm}"
+        )
+
+        self.stdout.write(f"\n{'модуль (по накопленному времени)':<60}{'своё мс':>10}{'всего мс':>10}")
+        for row in result["top_modules"][:top]:
+            self.stdout.write(f"{row['module']:<60}{row['self_ms']:>10.1f}{row['cumulative_ms']:>10.1f}")
+
+        self.stdout.write(f"\n{'пакет':<60}{'своё мс':>10}")
+        for row in result["top_groups"][:top]:
+            self.stdout.write(f"{row['group']:<60}{row['self_ms']:>10.1f}")
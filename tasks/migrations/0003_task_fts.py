@@ -0,0 +1,107 @@
+from django.db import migrations
+
+# FTS5-индекс по названию и описанию задач.
+# content='tasks_task' — индекс хранит только токены, сам текст берётся из tasks_task.
+# owner_id UNINDEXED — чтобы фильтровать по владельцу внутри FTS-запроса.
+# unicode61 remove_diacritics 2 — регистр не важен (в том числе для кириллицы).
+# prefix='2 3' — отдельные префиксные индексы для коротких запросов вида "за*".
+# Триггеры и заполнение — как в tasks/triggers.py (TASK_FTS) на момент миграции;
+# текущие определения восстанавливает post_migrate (ensure_triggers).
+# В индекс кладётся текст с заменой ё -> е: unicode61 их не приравнивает.
+CREATE_SQL = """
+    CREATE VIRTUAL TABLE tasks_task_fts USING fts5(
+        title,
+        description,
+        owner_id UNINDEXED,
+        content='tasks_task',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+"""
+
+TRIGGERS = {
+    "tasks_task_fts_ai": """
+        AFTER INSERT ON tasks_task BEGIN
+            INSERT INTO tasks_task_fts(rowid, title, description, owner_id)
+            VALUES (
+                new.id,
+                replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+                replace(replace(new.description, 'ё', 'е'), 'Ё', 'Е'),
+                new.owner_id
+            );
+        END
+    """,
+    "tasks_task_fts_ad": """
+        AFTER DELETE ON tasks_task BEGIN
+            INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description, owner_id)
+            VALUES (
+                'delete',
+                old.id,
+                replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+                replace(replace(old.description, 'ё', 'е'), 'Ё', 'Е'),
+                old.owner_id
+            );
+        END
+    """,
+    "tasks_task_fts_au": """
+        AFTER UPDATE OF title, description, owner_id ON tasks_task BEGIN
+            INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description, owner_id)
+            VALUES (
+                'delete',
+                old.id,
+                replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+                replace(replace(old.description, 'ё', 'е'), 'Ё', 'Е'),
+                old.owner_id
+            );
+            INSERT INTO tasks_task_fts(rowid, title, description, owner_id)
+            VALUES (
+                new.id,
+                replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+                replace(replace(new.description, 'ё', 'е'), 'Ё', 'Е'),
+                new.owner_id
+            );
+        END
+    """,
+}
+
+FILL_SQL = """
+    INSERT INTO tasks_task_fts(rowid, title, description, owner_id)
+    SELECT
+        id,
+        replace(replace(title, 'ё', 'е'), 'Ё', 'Е'),
+        replace(replace(description, 'ё', 'е'), 'Ё', 'Е'),
+        owner_id
+    FROM tasks_task
+"""
+
+
+def create_fts(apps, schema_editor):
+    # FTS5 есть только в SQLite; на других СУБД поиск работает через icontains
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_SQL)
+        for name, body in TRIGGERS.items():
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+        cursor.execute(FILL_SQL)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute("DROP TABLE IF EXISTS tasks_task_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0002_task_owner_created_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Триггеры и заполнение — как в tasks/triggers.py (TASK_COUNTERS) на момент миграции;
+# текущие определения восстанавливает post_migrate (ensure_triggers).
+
+INCREMENT = """
+    INSERT INTO tasks_taskcounter(owner_id, status, priority, count)
+    VALUES (new.owner_id, new.status, new.priority, 1)
+    ON CONFLICT(owner_id, status, priority) DO UPDATE SET count = count + 1;
+"""
+
+DECREMENT = """
+    UPDATE tasks_taskcounter SET count = count - 1
+    WHERE owner_id = old.owner_id AND status = old.status AND priority = old.priority;
+"""
+
+TRIGGERS = {
+    "tasks_taskcounter_ai": f"AFTER INSERT ON tasks_task BEGIN {INCREMENT} END",
+    "tasks_taskcounter_ad": f"AFTER DELETE ON tasks_task BEGIN {DECREMENT} END",
+    "tasks_taskcounter_au": f"""
+        AFTER UPDATE OF owner_id, status, priority ON tasks_task
+        WHEN old.owner_id IS NOT new.owner_id
+          OR old.status IS NOT new.status
+          OR old.priority IS NOT new.priority
+        BEGIN
+            {DECREMENT}
+            {INCREMENT}
+        END
+    """,
+}
+
+FILL_SQL = """
+    INSERT INTO tasks_taskcounter(owner_id, status, priority, count)
+    SELECT owner_id, status, priority, COUNT(*) FROM tasks_task
+    GROUP BY owner_id, status, priority
+"""
+
+
+def install_counters(apps, schema_editor):
+    # Триггеры поддержки счётчиков + первичное заполнение по существующим задачам
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name, body in TRIGGERS.items():
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+        cursor.execute("DELETE FROM tasks_taskcounter")
+        cursor.execute(FILL_SQL)
+
+
+def uninstall_counters(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('TODO', 'Сделать'), ('INPR', 'В работе'), ('DONE', 'Готово')], max_length=4, verbose_name='Статус')),
+                ('priority', models.IntegerField(choices=[(1, 'Низкий'), (2, 'Средний'), (3, 'Высокий')], verbose_name='Приоритет')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_counters', to=settings.AUTH_USER_MODEL, verbose_name='Владелец')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('owner', 'status', 'priority'), name='taskcounter_owner_status_priority_uniq')],
+            },
+        ),
+        migrations.RunPython(install_counters, uninstall_counters),
+    ]
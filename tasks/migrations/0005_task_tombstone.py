@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:44
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+# Триггер — как в tasks/triggers.py (TASK_TOMBSTONES) на момент миграции;
+# текущее определение восстанавливает post_migrate (ensure_triggers).
+# Время — в формате DateTimeField Django на SQLite (UTC, "YYYY-MM-DD HH:MM:SS.ffffff").
+TRIGGER_SQL = """
+    CREATE TRIGGER IF NOT EXISTS tasks_tasktombstone_ad
+    AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_tasktombstone(task_id, owner_id, deleted_at)
+        VALUES (old.id, old.owner_id, strftime('%Y-%m-%d %H:%M:%f', 'now') || '000');
+    END
+"""
+
+
+def install_tombstones(apps, schema_editor):
+    # Триггер, записывающий надгробие при любом удалении задачи
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(TRIGGER_SQL)
+
+
+def uninstall_tombstones(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TRIGGER IF EXISTS tasks_tasktombstone_ad")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_taskcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.IntegerField(verbose_name='Задача')),
+                ('owner_id', models.IntegerField(verbose_name='Владелец')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Удалена')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'updated_at', 'id'], name='task_owner_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasktombstone',
+            index=models.Index(fields=['owner_id', 'deleted_at', 'id'], name='tombstone_owner_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasktombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+        migrations.RunPython(install_tombstones, uninstall_tombstones),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_open_due_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_owner_i_9240ec_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_owner_i_3addd0_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'status', '-created_at', '-id'], name='task_owner_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'priority', '-created_at', '-id'], name='task_owner_prio_created_idx'),
+        ),
+    ]
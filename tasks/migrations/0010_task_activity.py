@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.IntegerField(verbose_name='Задача')),
+                ('owner_id', models.IntegerField(verbose_name='Владелец')),
+                ('actor_id', models.IntegerField(blank=True, null=True, verbose_name='Автор изменения')),
+                ('at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Когда')),
+                ('changes', models.CharField(max_length=200, verbose_name='Изменения')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['task_id', 'at', 'id'], name='activity_task_at_idx'), models.Index(fields=['owner_id', 'at', 'id'], name='activity_owner_at_idx'), models.Index(fields=['at'], name='activity_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskWeeklyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_id', models.IntegerField(verbose_name='Владелец')),
+                ('week', models.DateField(verbose_name='Неделя')),
+                ('created', models.PositiveIntegerField(default=0, verbose_name='Создано')),
+                ('completed', models.PositiveIntegerField(default=0, verbose_name='Выполнено')),
+                ('completed_with_due', models.PositiveIntegerField(default=0, verbose_name='Выполнено с дедлайном')),
+                ('completed_late', models.PositiveIntegerField(default=0, verbose_name='Выполнено с опозданием')),
+                ('cycle_seconds', models.BigIntegerField(default=0, verbose_name='Суммарное время выполнения, с')),
+                ('cycle_histogram', models.JSONField(default=dict, verbose_name='Гистограмма времени выполнения')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['week', 'owner_id'], name='weeklystats_week_idx')],
+                'constraints': [models.UniqueConstraint(fields=('owner_id', 'week'), name='weeklystats_owner_week_uniq')],
+            },
+        ),
+    ]
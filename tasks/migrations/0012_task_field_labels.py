@@ -0,0 +1,49 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Подписи полей (verbose_name) и выбора статуса / приоритета: модель разошлась
+# с 0001_initial ещё до индексов, а makemigrations собрал эти правки в 0002
+# вместе с индексом для keyset-пагинации. Вынесены сюда отдельно; схему БД не
+# меняют — только состояние миграций.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_weekly_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='description',
+            field=models.TextField(blank=True, verbose_name='Описание'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='due_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Дедлайн'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to=settings.AUTH_USER_MODEL, verbose_name='Владелец'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='priority',
+            field=models.IntegerField(choices=[(1, 'Низкий'), (2, 'Средний'), (3, 'Высокий')], default=2, verbose_name='Приоритет'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='status',
+            field=models.CharField(choices=[('TODO', 'Сделать'), ('INPR', 'В работе'), ('DONE', 'Готово')], default='TODO', max_length=4, verbose_name='Статус'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='title',
+            field=models.CharField(max_length=200, verbose_name='Название'),
+        ),
+    ]
@@ -77,15 +77,53 @@ class Task(models.Model):
         """
         Настройки модели на уровне Django ORM/БД.
         """
-        # Сортировка по умолчанию: новые задачи сверху
-        ordering = ["-created_at"]
+        # Сортировка по умолчанию: новые задачи сверху.
+        # id — второй ключ, чтобы порядок был однозначным (нужно курсорной пагинации)
+        ordering = ["-created_at", "-id"]
 
-        # Индексы ускоряют частые запросы:
-        # - найти задачи конкретного владельца по статусу
-        # - найти задачи конкретного владельца по дедлайну
+        # Индексы ускоряют частые запросы (каждый запрос представлений — поиск по
+        # префиксу индекса и чтение в порядке индекса, без сортировки во временном
+        # B-дереве; это проверяет QueryPlanTests через EXPLAIN QUERY PLAN):
+        # - список задач владельца в порядке Meta.ordering (курсорная пагинация)
+        # - то же с фильтром по статусу / по приоритету
+        # - изменения задач владельца после момента X (синхронизация, tasks/sync.py)
+        # - незавершённые задачи владельца по дедлайну (дашборд, tasks/dashboard.py):
+        #   частичный индекс — в нём нет выполненных задач
+        # - выполненные задачи по времени изменения (перенос в архив, tasks/archive.py):
+        #   частичный индекс — только выполненные задачи. До архивации их в таблице
+        #   большинство, и без индекса каждая пачка archive() читала бы всю таблицу;
+        #   с ним — самые старые DONE-строки по порядку индекса. Открытые задачи,
+        #   которые меняются чаще всего, индекс не обновляют, а после регулярной
+        #   архивации в нём остаются только недавно выполненные
+        # Отдельные (owner, status) и (owner, due_date) не нужны: первый — префикс
+        # task_owner_status_created_idx, второй заменён частичным task_open_due_idx.
         indexes = [
-            models.Index(fields=["owner", "status"]),
-            models.Index(fields=["owner", "due_date"]),
+            models.Index(
+                fields=["owner", "-created_at", "-id"],
+                name="task_owner_created_idx",
+            ),
+            models.Index(
+                fields=["owner", "status", "-created_at", "-id"],
+                name="task_owner_status_created_idx",
+            ),
+            models.Index(
+                fields=["owner", "priority", "-created_at", "-id"],
+                name="task_owner_prio_created_idx",
+            ),
+            models.Index(
+                fields=["owner", "updated_at", "id"],
+                name="task_owner_updated_idx",
+            ),
+            models.Index(
+                fields=["owner", "due_date"],
+                condition=~models.Q(status="DONE"),
+                name="task_open_due_idx",
+            ),
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(status="DONE"),
+                name="task_done_updated_idx",
+            ),
         ]
 
     def __str__(self):
@@ -93,3 +131,263 @@ class Task(models.Model):
         Как объект будет отображаться в админке и в логах.
         """
         return f"{self.title} ({self.owner})"
+
+
+class TaskCounter(models.Model):
+    """
+    Денормализованный счётчик задач владельца в разрезе статуса и приоритета.
+
+    Одна строка = (владелец, статус, приоритет) -> количество задач.
+    На владельца максимум 3 * 3 = 9 строк, поэтому «сколько задач у пользователя»
+    и гистограмма по статусам читаются без COUNT/GROUP BY по таблице задач.
+
+    Счётчики обновляются SQL-триггерами на tasks_task (см. tasks/triggers.py),
+    пересчитать и проверить их можно командой manage.py rebuild_task_counters.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="task_counters",
+        verbose_name="Владелец",
+    )
+    status = models.CharField("Статус", max_length=4, choices=Task.Status.choices)
+    priority = models.IntegerField("Приоритет", choices=Task.Priority.choices)
+    count = models.IntegerField("Количество", default=0)
+
+    class Meta:
+        # Уникальность нужна триггерам для INSERT ... ON CONFLICT DO UPDATE
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "status", "priority"],
+                name="taskcounter_owner_status_priority_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id}/{self.status}/{self.priority}: {self.count}"
+
+
+class TaskTombstone(models.Model):
+    """
+    Запись об удалённой задаче для инкрементальной синхронизации (tasks/sync.py):
+    клиент, который уже скачал задачу, по надгробию узнаёт, что её нужно убрать у себя.
+
+    На SQLite строки пишет триггер на DELETE из tasks_task (tasks/triggers.py),
+    поэтому учитываются и удаления через QuerySet, и каскадные (удаление пользователя).
+    owner_id — просто число, а не внешний ключ: надгробия переживают удаление владельца
+    и вычищаются командой manage.py compact_tombstones.
+    """
+
+    task_id = models.IntegerField("Задача")
+    owner_id = models.IntegerField("Владелец")
+    deleted_at = models.DateTimeField("Удалена", default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner_id", "deleted_at", "id"], name="tombstone_owner_deleted_idx"),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id}/{self.task_id} @ {self.deleted_at}"
+
+
+class ArchivedTask(models.Model):
+    """
+    Выполненная задача, перенесённая в архив (manage.py archive_tasks, tasks/archive.py).
+
+    Старые выполненные задачи почти не читают, но они раздувают tasks_task и все
+    индексы владельца. В архиве те же поля, что у Task, в том же порядке, и тот же id:
+    задачу можно вернуть обратно без смены id (ссылки и курсоры клиентов остаются
+    валидными). Архив не попадает в счётчики, полнотекстовый индекс и синхронизацию.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_tasks",
+        verbose_name="Владелец",
+    )
+    title = models.CharField("Название", max_length=200)
+    description = models.TextField("Описание", blank=True)
+    status = models.CharField("Статус", max_length=4, choices=Task.Status.choices)
+    priority = models.IntegerField("Приоритет", choices=Task.Priority.choices)
+    due_date = models.DateField("Дедлайн", null=True, blank=True)
+    # Исходные даты задачи (updated_at не обновляется автоматически)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField("В архиве с", default=timezone.now)
+
+    class Meta:
+        # Тот же порядок, что у Task: архив читается вместе со списком задач
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(
+                fields=["owner", "-created_at", "-id"],
+                name="archived_owner_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.owner}, в архиве)"
+
+
+class Job(models.Model):
+    """
+    Фоновая задача (выгрузка, импорт, пересчёт счётчиков, массовое удаление),
+    которая выполняется не в запросе, а воркерами manage.py run_workers (tasks/jobs.py).
+
+    Очередь живёт в этой же БД: внешний брокер не нужен. Воркер забирает задание
+    одним условным UPDATE (status QUEUED -> RUNNING), поэтому одно задание не
+    достанется двум воркерам.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "В очереди"
+        RUNNING = "RUNNING", "Выполняется"
+        DONE = "DONE", "Готово"
+        FAILED = "FAILED", "Ошибка"
+
+    # Тип задания — имя обработчика из реестра tasks/jobs.py
+    kind = models.CharField("Тип", max_length=50)
+    payload = models.JSONField("Параметры", default=dict, blank=True)
+    # Кто поставил задание: только он видит его статус и результат
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="jobs",
+        null=True,
+        blank=True,
+        verbose_name="Владелец",
+    )
+    status = models.CharField("Статус", max_length=7, choices=Status.choices, default=Status.QUEUED)
+
+    # Повторы: после ошибки задание возвращается в очередь не раньше run_after
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    max_attempts = models.PositiveSmallIntegerField("Максимум попыток", default=3)
+    run_after = models.DateTimeField("Не раньше", default=timezone.now)
+
+    # Прогресс (0–100) и короткое сообщение о текущем шаге
+    progress = models.PositiveSmallIntegerField("Прогресс, %", default=0)
+    message = models.CharField("Сообщение", max_length=200, blank=True)
+    result = models.JSONField("Результат", null=True, blank=True)
+    error = models.TextField("Ошибка", blank=True)
+
+    # Какой воркер выполняет задание и когда он последний раз подавал признаки жизни:
+    # задание «зависшего» воркера возвращается в очередь (jobs.requeue_stale)
+    worker = models.CharField("Воркер", max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # Частичные индексы: в очереди и в работе заданий мало, завершённых — много
+        # - следующее задание для воркера: QUEUED по (run_after, id)
+        # - сколько заданий этого типа уже выполняется (лимит параллельности)
+        # - задания пользователя, новые сверху
+        indexes = [
+            models.Index(
+                fields=["run_after", "id"],
+                condition=models.Q(status="QUEUED"),
+                name="job_queued_idx",
+            ),
+            models.Index(
+                fields=["kind"],
+                condition=models.Q(status="RUNNING"),
+                name="job_running_idx",
+            ),
+            models.Index(fields=["owner", "-created_at"], name="job_owner_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class TaskActivity(models.Model):
+    """
+    Запись журнала изменений задачи (tasks/activity.py): кто и когда поменял
+    статус, приоритет или дедлайн. Нужна для отчётов по SLA и панели «История»
+    на странице задачи.
+
+    Журнал только дописывается; храним лишь изменившиеся поля в компактной строке
+    вида "s=TODO>DONE;p=2>3" (код поля = старое>новое), а не копию задачи.
+    task_id, owner_id и actor_id — просто числа, а не внешние ключи (как у TaskTombstone):
+    история переживает удаление и архивацию задачи, а удаление старых записей —
+    дело manage.py compact_activity (срок хранения и схлопывание).
+    """
+
+    task_id = models.IntegerField("Задача")
+    owner_id = models.IntegerField("Владелец")
+    # Кто изменил: владелец в своём интерфейсе или сотрудник в админке
+    actor_id = models.IntegerField("Автор изменения", null=True, blank=True)
+    at = models.DateTimeField("Когда", default=timezone.now)
+    changes = models.CharField("Изменения", max_length=200)
+
+    class Meta:
+        # - история одной задачи по времени (панель на странице задачи)
+        # - изменения задач владельца за период (отчёты)
+        # - старые записи для удаления и схлопывания (compact_activity)
+        indexes = [
+            models.Index(fields=["task_id", "at", "id"], name="activity_task_at_idx"),
+            models.Index(fields=["owner_id", "at", "id"], name="activity_owner_at_idx"),
+            models.Index(fields=["at"], name="activity_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} @ {self.at}: {self.changes}"
+
+
+class TaskWeeklyStats(models.Model):
+    """
+    Сводка по неделям для отчётов (tasks/analytics.py, manage.py refresh_analytics):
+    сколько задач владельца создано и выполнено за неделю, сколько выполнено
+    с дедлайном и из них с опозданием, гистограмма времени «создана -> выполнена».
+
+    Строка с owner_id = 0 — те же величины по всем пользователям: глобальный отчёт
+    читает одну строку на неделю, а не суммирует всех владельцев.
+    Таблица пополняется инкрементально (новые задачи и новые записи журнала
+    после последнего обновления), поэтому отчёт не пересчитывает tasks_task целиком.
+    """
+
+    owner_id = models.IntegerField("Владелец")
+    # Понедельник недели
+    week = models.DateField("Неделя")
+    created = models.PositiveIntegerField("Создано", default=0)
+    completed = models.PositiveIntegerField("Выполнено", default=0)
+    completed_with_due = models.PositiveIntegerField("Выполнено с дедлайном", default=0)
+    completed_late = models.PositiveIntegerField("Выполнено с опозданием", default=0)
+    # Время выполнения: сумма (для среднего) и гистограмма по корзинам (для медианы) —
+    # обе величины складываются между неделями и владельцами
+    cycle_seconds = models.BigIntegerField("Суммарное время выполнения, с", default=0)
+    cycle_histogram = models.JSONField("Гистограмма времени выполнения", default=dict)
+
+    class Meta:
+        # - сводка владельца за период: префикс (owner_id, week) уникального индекса
+        # - по всем пользователям за период (таблица отчёта для админов)
+        constraints = [
+            models.UniqueConstraint(fields=["owner_id", "week"], name="weeklystats_owner_week_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["week", "owner_id"], name="weeklystats_week_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id or 'все'} / {self.week}: +{self.created} / {self.completed}"
+
+
+class ReportWatermark(models.Model):
+    """
+    До какого id обработаны исходные таблицы при обновлении сводки TaskWeeklyStats:
+    "tasks" — tasks_task (созданные задачи), "activity" — журнал изменений (выполненные).
+    """
+
+    name = models.CharField(primary_key=True, max_length=50)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
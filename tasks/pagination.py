@@ -0,0 +1,162 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+
+
+class KeysetPage:
+    """
+    Одна страница курсорной (keyset) пагинации.
+
+    В отличие от обычной страницы Django здесь нет номера страницы и общего
+    количества — только признаки «есть ли дальше/раньше» и непрозрачные
+    токены для перехода.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Курсорный пагинатор по ключу (created_at, id).
+
+    Совпадает с Meta.ordering модели Task (["-created_at", "-id"]):
+    - не выполняет COUNT(*)
+    - не использует OFFSET: каждая страница — это диапазонный запрос
+      «строго раньше последней показанной задачи» по индексу
+      (owner, -created_at, -id)
+    - курсор — base64 от JSON, клиент не должен его разбирать
+
+    Пагинатор читает поля created_at и id у объектов страницы, поэтому
+    подходит и для QuerySet моделей, и для .values(), если эти поля выбраны.
+    """
+
+    # Поля ключа и направление сортировки (по убыванию)
+    ordering = ("-created_at", "-id")
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+
+    # --- курсоры ---
+
+    @staticmethod
+    def encode_cursor(direction, created_at, pk):
+        """
+        Упаковывает позицию в непрозрачный токен.
+        direction: "n" — следующая страница, "p" — предыдущая.
+        """
+        raw = json.dumps(
+            {"d": direction, "t": created_at.isoformat(), "i": pk},
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(token):
+        """
+        Распаковывает токен. Любой битый токен — InvalidPage
+        (ListView превращает его в 404).
+        """
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction = data["d"]
+            created_at = datetime.fromisoformat(data["t"])
+            pk = int(data["i"])
+        except (ValueError, KeyError, TypeError, binascii.Error):
+            raise InvalidPage("Некорректный курсор")
+
+        # Курсоры выдаёт только encode_cursor — всегда с часовым поясом;
+        # время без пояса — подделанный токен (и сравнение с aware-полем)
+        if direction not in ("n", "p") or created_at.tzinfo is None:
+            raise InvalidPage("Некорректный курсор")
+
+        return direction, created_at, pk
+
+    # --- выборка страницы ---
+
+    @staticmethod
+    def _key(obj):
+        if isinstance(obj, dict):
+            return obj["created_at"], obj["id"]
+        return obj.created_at, obj.pk
+
+    def _page_query(self, cursor):
+        """
+        Запрос страницы (на одну запись больше, чтобы без COUNT понять,
+        есть ли продолжение) и направление: None — первая страница, "n" или "p".
+        """
+        qs = self.queryset
+
+        if not cursor:
+            return qs.order_by(*self.ordering)[: self.per_page + 1], None
+
+        direction, created_at, pk = self.decode_cursor(cursor)
+
+        if direction == "n":
+            # Всё, что «старше» курсора: created_at меньше, либо равен и id меньше
+            qs = qs.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            ).order_by(*self.ordering)
+        else:
+            # direction == "p": идём назад по возрастанию, результат потом переворачиваем
+            qs = qs.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+            ).order_by("created_at", "id")
+        return qs[: self.per_page + 1], direction
+
+    def _page_from_rows(self, rows, direction):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if direction is None:
+            return self._build(rows, has_next=has_more, has_previous=False)
+        if direction == "n":
+            return self._build(rows, has_next=has_more, has_previous=True)
+
+        rows.reverse()
+        return self._build(rows, has_next=True, has_previous=has_more)
+
+    def page(self, cursor=None):
+        """
+        Возвращает KeysetPage для курсора (None — первая страница).
+        """
+        qs, direction = self._page_query(cursor)
+        return self._page_from_rows(list(qs), direction)
+
+    async def apage(self, cursor=None):
+        """
+        То же, что page(), для async-view (строки читаются через async ORM).
+        """
+        qs, direction = self._page_query(cursor)
+        return self._page_from_rows([row async for row in qs], direction)
+
+    def _build(self, rows, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor("n", *self._key(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor("p", *self._key(rows[0]))
+        return KeysetPage(rows, next_cursor=next_cursor, previous_cursor=previous_cursor)
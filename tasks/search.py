@@ -0,0 +1,193 @@
+"""
+Полнотекстовый поиск на SQLite FTS5.
+
+Вместо Q(title__icontains=q) | Q(description__icontains=q) (полный просмотр
+всех задач владельца) ищем по FTS5-таблице — инвертированному индексу,
+который SQLite держит рядом с обычной таблицей.
+
+- FTS-таблицы создаются миграциями (tasks 0003_task_fts, accounts 0001_user_search),
+  триггеры синхронизации описаны в tasks/triggers.py:
+  AFTER INSERT/UPDATE/DELETE обновляют индекс при любом сохранении
+  и удалении, включая bulk_create / QuerySet.update / каскадное удаление
+- если FTS5 недоступен (другая СУБД или SQLite без FTS5), бэкенд
+  прозрачно откатывается на icontains по тем же полям
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Слова запроса: буквы/цифры в любом алфавите
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_CYRILLIC_RE = re.compile(r"[а-яё]", re.IGNORECASE)
+
+# Окончания для «лёгкого» русского стемминга запроса (длинные — первыми).
+# Отрезаем окончание и ищем по префиксу: "задачи" -> "задач*"
+# найдёт и "задача", и "задачу", и "задачами".
+_RU_ENDINGS = sorted(
+    [
+        "иями", "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими",
+        "ах", "ях", "ов", "ев", "ей", "ой", "ий", "ый", "ая", "яя",
+        "ое", "ее", "ую", "юю", "ом", "ем", "ам", "ям", "ия", "ие",
+        "а", "я", "о", "е", "ы", "и", "у", "ю", "ь",
+    ],
+    key=len,
+    reverse=True,
+)
+
+
+def stem_ru(word):
+    """
+    Отрезает типичное русское окончание, оставляя основу не короче 4 символов.
+    Для нерусских слов возвращает слово без изменений.
+    """
+    if not _CYRILLIC_RE.search(word):
+        return word
+    for ending in _RU_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 4:
+            return word[: -len(ending)]
+    return word
+
+
+class FTSSearchBackend:
+    """
+    Поиск по FTS5-таблице с внешним содержимым (content=...).
+
+    table          — имя FTS5-таблицы
+    fallback_fields — поля модели для icontains, если FTS недоступен
+    prefix         — искать по префиксу слова ("слово*")
+    stem           — применять stem_ru к словам запроса
+    min_length     — минимальная длина слова (для trigram — 3)
+    split          — разбивать запрос на слова; для trigram не разбиваем,
+                     а ищем строку целиком как подстроку
+    """
+
+    # Кэш проверки «есть ли FTS-таблица» на (alias, имя БД, таблица)
+    _available = {}
+
+    def __init__(self, table, fallback_fields, prefix=True, stem=True, min_length=1, split=True):
+        self.table = table
+        self.fallback_fields = fallback_fields
+        self.prefix = prefix
+        self.stem = stem
+        self.min_length = min_length
+        self.split = split
+
+    def is_available(self, using="default"):
+        connection = connections[using]
+        if connection.vendor != "sqlite":
+            return False
+
+        key = (using, str(connection.settings_dict["NAME"]), self.table)
+        if key not in self._available:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [self.table],
+                )
+                self._available[key] = cursor.fetchone() is not None
+        return self._available[key]
+
+    def build_match(self, q):
+        """
+        Превращает пользовательскую строку в безопасное выражение FTS5 MATCH.
+        Каждое слово берём в кавычки (никакого синтаксиса FTS от пользователя),
+        слова объединяются через AND.
+        Возвращает None, если искать нечего.
+        """
+        # ё -> е: в индексе текст нормализован так же (см. tasks/triggers.py)
+        q = q.lower().replace("ё", "е")
+        words = _WORD_RE.findall(q) if self.split else [q.strip()]
+
+        terms = []
+        for word in words:
+            if self.stem:
+                word = stem_ru(word)
+            if len(word) < self.min_length:
+                return None
+            term = '"%s"' % word.replace('"', '""')
+            if self.prefix:
+                term += "*"
+            terms.append(term)
+        return " ".join(terms) or None
+
+    def match_sql(self, expression, **unindexed):
+        """
+        SQL подзапроса, возвращающего rowid совпавших строк.
+        unindexed — фильтры по UNINDEXED-колонкам FTS-таблицы (например owner_id),
+        чтобы отсекать чужие строки прямо внутри индекса.
+        """
+        sql = f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s"
+        params = [expression]
+        for column, value in unindexed.items():
+            sql += f" AND {column} = %s"
+            params.append(value)
+        return sql, params
+
+    def _fallback_q(self, q):
+        condition = Q()
+        for field in self.fallback_fields:
+            condition |= Q(**{f"{field}__icontains": q})
+        return condition
+
+    def search_q(self, q, using="default", **unindexed):
+        """
+        Условие для .filter(): pk входит в результат полнотекстового поиска.
+        """
+        expression = self.build_match(q)
+        if expression is None or not self.is_available(using):
+            return self._fallback_q(q)
+        sql, params = self.match_sql(expression, **unindexed)
+        return Q(pk__in=RawSQL(sql, params))
+
+    def filter(self, queryset, q, **unindexed):
+        """
+        Применяет поиск к QuerySet (порядок сортировки не меняется).
+        """
+        return queryset.filter(self.search_q(q, using=queryset.db, **unindexed))
+
+    def rank_expression(self, q, model, using="default"):
+        """
+        Релевантность строки модели (bm25 из FTS5: чем меньше, тем релевантнее)
+        коррелированным подзапросом по rowid. Без FTS возвращает None.
+        """
+        expression = self.build_match(q)
+        if expression is None or not self.is_available(using):
+            return None
+        meta = model._meta
+        sql = (
+            f"SELECT rank FROM {self.table} WHERE {self.table} MATCH %s"
+            f' AND rowid = "{meta.db_table}"."{meta.pk.column}"'
+        )
+        return RawSQL(sql, [expression])
+
+    def order_by_rank(self, queryset, q):
+        """
+        Сортирует результаты поиска по релевантности; при равной релевантности
+        (и без FTS — целиком) остаётся прежний порядок QuerySet.
+        """
+        rank = self.rank_expression(q, queryset.model, using=queryset.db)
+        if rank is None:
+            return queryset
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        return queryset.annotate(search_rank=rank).order_by("search_rank", *ordering)
+
+
+# Задачи: слова из названия и описания, поиск по префиксу с русским стеммингом.
+# owner_id хранится в индексе как UNINDEXED, чтобы фильтровать по владельцу внутри FTS.
+task_search = FTSSearchBackend(
+    table="tasks_task_fts",
+    fallback_fields=["title", "description"],
+)
+
+# Пользователи: триграммы по username, то есть поиск подстроки (как icontains),
+# но по индексу. Триграммному индексу нужно минимум 3 символа.
+user_search = FTSSearchBackend(
+    table="accounts_user_fts",
+    fallback_fields=["username"],
+    prefix=False,
+    stem=False,
+    min_length=3,
+    split=False,
+)
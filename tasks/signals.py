@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import activity, events, sync
+from .cache import bump_owner_version
+from .models import Task, TaskTombstone
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_owner_fragments(sender, instance, **kwargs):
+    """
+    Любое сохранение или удаление задачи делает кэш списка владельца устаревшим.
+    (bulk_create / QuerySet.update сигналов не шлют — там версия меняется явно.)
+    """
+    bump_owner_version(instance.owner_id)
+
+
+@receiver(post_delete, sender=Task)
+def write_tombstone(sender, instance, using, **kwargs):
+    """
+    Надгробие удалённой задачи для синхронизации (tasks/sync.py).
+    Обычно его пишет триггер TASK_TOMBSTONES (tasks/triggers.py), здесь — только
+    если триггера нет (другая СУБД или триггер потерян).
+    """
+    if not sync.enabled(using):
+        TaskTombstone.objects.using(using).create(task_id=instance.pk, owner_id=instance.owner_id)
+
+
+@receiver(post_init, sender=Task)
+def remember_snapshots(sender, instance, **kwargs):
+    """
+    Значения полей при загрузке — старые значения без отдельного SELECT перед сохранением:
+    - для событий (tasks/events.py) — чтобы отдать только изменившиеся поля
+    - для журнала изменений (tasks/activity.py) — статус / приоритет / дедлайн
+
+    Один обработчик на оба снимка: post_init срабатывает на каждую строку списков,
+    API и админки, и каждый лишний обработчик — это стоимость на строку.
+    """
+    if events.enabled():
+        instance._event_snapshot = events.snapshot(instance)
+    if activity.enabled():
+        instance._activity_snapshot = activity.snapshot(instance)
+
+
+@receiver(post_save, sender=Task)
+def record_created_done(sender, instance, created, using, **kwargs):
+    """
+    Задача, созданная сразу выполненной (форма, API, админка), получает в журнале
+    переход "s=>DONE" — иначе отчёты (tasks/analytics.py) не видят её выполнения.
+    """
+    if created and instance.status == Task.Status.DONE:
+        activity.record([(instance.owner_id, instance.pk, {"status": (None, instance.status)})], using=using)
+
+
+@receiver(post_save, sender=Task)
+def publish_saved(sender, instance, created, using, **kwargs):
+    """
+    Событие «создана / изменена» подписчикам владельца (tasks/events.py) — после коммита.
+    """
+    if not events.enabled():
+        return
+    event = events.saved_event(instance, created)
+    instance._event_snapshot = events.snapshot(instance)
+
+    broker = events.get_broker()
+    owner_id = instance.owner_id
+    if event is not None and broker.has_subscribers(owner_id):
+        transaction.on_commit(lambda: broker.publish(owner_id, event), using=using)
+
+
+@receiver(post_delete, sender=Task)
+def publish_deleted(sender, instance, using, **kwargs):
+    if not events.enabled():
+        return
+    broker = events.get_broker()
+    owner_id = instance.owner_id
+    if broker.has_subscribers(owner_id):
+        event = {"type": "deleted", "id": instance.pk}
+        transaction.on_commit(lambda: broker.publish(owner_id, event), using=using)
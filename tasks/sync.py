@@ -0,0 +1,182 @@
+"""
+Инкрементальная синхронизация задач: что изменилось у владельца после курсора.
+
+Клиент хранит непрозрачный курсор и при каждом опросе получает только:
+- changed — задачи, созданные или изменённые после курсора (по updated_at),
+- deleted — id задач, удалённых после курсора (по надгробиям TaskTombstone),
+и новый курсор. Первый запрос без курсора отдаёт все задачи (пачками по limit).
+
+Обе выборки — диапазонные запросы по индексам (owner, updated_at, id)
+и (owner_id, deleted_at, id), объём ответа зависит только от числа изменений.
+
+Две тонкости:
+- updated_at выставляется до коммита транзакции, поэтому свежайшие изменения
+  (моложе TASKS_SYNC_SETTLE_SECONDS) не отдаются: иначе долгая транзакция могла бы
+  закоммитить задачу с updated_at «позади» уже выданного курсора
+- надгробия хранятся TASKS_TOMBSTONE_RETENTION_DAYS дней (manage.py compact_tombstones);
+  курсор старше этого срока — CursorExpired, клиенту нужна полная пересинхронизация
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Task, TaskTombstone
+from .triggers import TASK_TOMBSTONES
+
+
+class CursorExpired(Exception):
+    """
+    Курсор старше срока хранения надгробий — часть удалений могла быть уже вычищена.
+    """
+
+
+# (alias, имя БД), где триггеры TASK_TOMBSTONES уже найдены
+_trigger_databases = set()
+
+
+def enabled(using="default"):
+    """
+    Пишет ли надгробия триггер TASK_TOMBSTONES (tasks/triggers.py) на этой БД.
+    Если нет (другая СУБД, триггер потерян), надгробие пишет сигнал post_delete.
+
+    Найденные триггеры запоминаются на процесс; пока их нет, проверка повторяется
+    при каждом удалении — чтобы не пропустить надгробие и не записать его дважды.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+
+    key = (using, str(connection.settings_dict["NAME"]))
+    if key not in _trigger_databases:
+        with connection.cursor() as cursor:
+            if not TASK_TOMBSTONES.is_ready(cursor) or TASK_TOMBSTONES.missing(cursor):
+                return False
+        _trigger_databases.add(key)
+    return True
+
+
+def settle_delay():
+    return timedelta(seconds=getattr(settings, "TASKS_SYNC_SETTLE_SECONDS", 1))
+
+
+def retention():
+    return timedelta(days=getattr(settings, "TASKS_TOMBSTONE_RETENTION_DAYS", 30))
+
+
+def encode_cursor(moment, task_id=0, tombstone_id=0):
+    """
+    Позиция в ленте изменений: момент времени и последние выданные
+    в этот момент id задачи и надгробия (для однозначного порядка при равном времени).
+    """
+    raw = json.dumps(
+        {"t": moment.isoformat(), "i": task_id, "d": tombstone_id},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        moment = datetime.fromisoformat(data["t"])
+        task_id = int(data["i"])
+        tombstone_id = int(data["d"])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise InvalidPage("Некорректный курсор")
+    if timezone.is_naive(moment):
+        raise InvalidPage("Некорректный курсор")
+    return moment, task_id, tombstone_id
+
+
+def changes(owner, cursor=None, fields=("id", "updated_at"), limit=500):
+    """
+    Изменения задач владельца после курсора:
+    {"changed": [{поле: значение}], "deleted": [id], "cursor": "...", "has_more": bool}
+
+    Если has_more — нужно сразу запросить следующую порцию с новым курсором.
+    """
+    now = timezone.now()
+    horizon = now - settle_delay()
+
+    since, last_task, last_tombstone = decode_cursor(cursor) if cursor else (None, 0, 0)
+    if since is not None and since < now - retention():
+        raise CursorExpired("Курсор устарел, нужна полная синхронизация")
+
+    columns = list(dict.fromkeys([*fields, "id", "updated_at"]))
+    tasks = Task.objects.filter(owner=owner, updated_at__lte=horizon)
+    if since is not None:
+        tasks = tasks.filter(
+            Q(updated_at__gt=since) | Q(updated_at=since, id__gt=last_task)
+        )
+    events = [
+        (row["updated_at"], 0, row["id"], row)
+        for row in tasks.order_by("updated_at", "id").values(*columns)[: limit + 1]
+    ]
+
+    # При первой синхронизации у клиента ничего нет — удалять нечего
+    if since is not None:
+        tombstones = TaskTombstone.objects.filter(
+            owner_id=owner.pk, deleted_at__lte=horizon
+        ).filter(Q(deleted_at__gt=since) | Q(deleted_at=since, id__gt=last_tombstone))
+        events += [
+            (deleted_at, 1, pk, task_id)
+            for pk, task_id, deleted_at in tombstones.order_by("deleted_at", "id").values_list(
+                "id", "task_id", "deleted_at"
+            )[: limit + 1]
+        ]
+
+    # Общий порядок: по времени, при равном времени сначала изменения, потом удаления
+    events.sort(key=lambda event: event[:3])
+    has_more = len(events) > limit
+    events = events[:limit]
+
+    if has_more or (events and events[-1][0] >= horizon):
+        # Продолжаем ровно с последнего выданного события
+        moment = events[-1][0]
+        task_id = last_task if moment == since else 0
+        tombstone_id = last_tombstone if moment == since else 0
+        for when, kind, pk, _ in events:
+            if when == moment:
+                if kind == 0:
+                    task_id = pk
+                else:
+                    tombstone_id = pk
+        next_cursor = encode_cursor(moment, task_id, tombstone_id)
+    else:
+        # Всё до horizon выдано — следующий опрос начинается с него
+        next_cursor = encode_cursor(max(horizon, since) if since else horizon)
+
+    return {
+        "changed": [
+            {name: payload[name] for name in fields} for _, kind, _, payload in events if kind == 0
+        ],
+        "deleted": [payload for _, kind, _, payload in events if kind == 1],
+        "cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+
+def compact(older_than=None, batch_size=10_000):
+    """
+    Удаляет надгробия старше срока хранения (пачками, чтобы не держать долгую блокировку).
+    Возвращает число удалённых строк.
+    """
+    cutoff = timezone.now() - (older_than if older_than is not None else retention())
+    deleted = 0
+    while True:
+        ids = list(
+            TaskTombstone.objects.filter(deleted_at__lt=cutoff)
+            .order_by("deleted_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += TaskTombstone.objects.filter(id__in=ids).delete()[0]
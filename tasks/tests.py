@@ -1,3 +1,2013 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from datetime import date, datetime, timedelta
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
+
+from taskmanager import startup
+
+from . import cache as fragment_cache
+from .benchmarking import views_mode
+from .explain import QueryPlanAssertionsMixin, plan_problems
+from .export import ADMIN_EXPORT_FIELDS, TASK_EXPORT_FIELDS
+from .models import (
+    ArchivedTask, Job, ReportWatermark, Task, TaskActivity, TaskCounter, TaskTombstone, TaskWeeklyStats,
+)
+from . import activity, analytics, archive, cards, counters, dashboard, events, jobs, sync
+from .search import stem_ru, task_search, user_search
+from .triggers import TASK_TOMBSTONES
+from .pagination import KeysetPaginator
+from .views import TaskDetailView
+from .management.commands.startup_profile import module_group, parse_importtime
+
+User = get_user_model()
+
+# Авторизация запроса: сессия и пользователь. С кэшем "sessions" на locmem (как в тестах)
+# по умолчанию сессии в БД и пользователь без кэша — по запросу на каждое
+# (с общим кэшем — 0, см. accounts/sessions.py, accounts/auth.py)
+AUTH_QUERIES = 2
+
+
+class TaskViewQueryCountTests(TestCase):
+    """
+    Регрессионные тесты числа SQL-запросов для всех view из tasks/views.py.
+
+    Число запросов на запрос должно быть фиксированным и не зависеть от
+    количества задач: если тест упал — где-то появился N+1 или лишняя загрузка.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.other = User.objects.create_user("other", password="pass")
+        cls.tasks = [
+            Task.objects.create(owner=cls.user, title=f"Задача {i}") for i in range(25)
+        ]
+        cls.task = cls.tasks[0]
+        cls.foreign = Task.objects.create(owner=cls.other, title="Чужая задача")
+
+        # Проверки наличия FTS-таблиц и триггера надгробий кэшируются на процесс —
+        # прогреваем заранее, чтобы они не попадали в подсчёт запросов
+        task_search.is_available()
+        user_search.is_available()
+        sync.enabled()
+
+    def setUp(self):
+        # Кэш фрагментов живёт в памяти процесса между тестами
+        fragment_cache.get_cache().clear()
+        self.client.force_login(self.user)
+
+    def assertViewQueries(self, num, method, url, data=None, status=200):
+        with self.assertNumQueries(AUTH_QUERIES + num):
+            response = getattr(self.client, method)(url, data or {})
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def test_list(self):
+        # COUNT для пагинатора + счётчики по статусам + сама страница
+        self.assertViewQueries(3, "get", reverse("task_list"))
+
+    def test_list_does_not_grow_with_page_size(self):
+        Task.objects.bulk_create(Task(owner=self.user, title=f"Ещё {i}") for i in range(50))
+        self.assertViewQueries(3, "get", reverse("task_list"))
+
+    def test_list_with_filters(self):
+        self.assertViewQueries(
+            3, "get", reverse("task_list"), {"q": "задача", "status": "TODO", "priority": "2"}
+        )
+
+    @override_settings(TASKS_PAGINATION="keyset")
+    def test_list_keyset(self):
+        # Без COUNT: счётчики + страница
+        response = self.assertViewQueries(2, "get", reverse("task_list"))
+        cursor = response.context["page_obj"].next_cursor
+        self.assertViewQueries(2, "get", reverse("task_list"), {"cursor": cursor})
+
+    def test_detail(self):
+        # Задача + панель «История» (журнал изменений)
+        self.assertViewQueries(2, "get", reverse("task_detail", args=[self.task.pk]))
+
+    def test_detail_foreign_task(self):
+        # Один запрос по своим задачам + проверка существования
+        self.assertViewQueries(
+            2, "get", reverse("task_detail", args=[self.foreign.pk]), status=403
+        )
+
+    def test_detail_missing_task(self):
+        self.assertViewQueries(2, "get", reverse("task_detail", args=[10**9]), status=404)
+
+    def test_create(self):
+        self.assertViewQueries(0, "get", reverse("task_create"))
+        self.assertViewQueries(
+            1,
+            "post",
+            reverse("task_create"),
+            {"title": "Новая", "status": "TODO", "priority": 2},
+            status=302,
+        )
+
+    def test_update(self):
+        url = reverse("task_edit", args=[self.task.pk])
+        self.assertViewQueries(1, "get", url)
+        self.assertViewQueries(
+            2, "post", url, {"title": "Изменено", "status": "DONE", "priority": 3}, status=302
+        )
+
+    def test_update_foreign_task(self):
+        url = reverse("task_edit", args=[self.foreign.pk])
+        self.assertViewQueries(2, "post", url, {"title": "x", "status": "DONE", "priority": 3}, status=403)
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.title, "Чужая задача")
+
+    def test_delete(self):
+        url = reverse("task_delete", args=[self.task.pk])
+        self.assertViewQueries(1, "get", url)
+        self.assertViewQueries(2, "post", url, status=302)
+        self.assertFalse(Task.objects.filter(pk=self.task.pk).exists())
+
+    def test_delete_foreign_task(self):
+        url = reverse("task_delete", args=[self.foreign.pk])
+        self.assertViewQueries(2, "post", url, status=403)
+        self.assertTrue(Task.objects.filter(pk=self.foreign.pk).exists())
+
+    def test_bulk(self):
+        ids = [task.pk for task in self.tasks[:20]]
+        # SAVEPOINT + проверка владения + UPDATE + RELEASE — не зависит от числа задач
+        self.assertViewQueries(
+            4,
+            "post",
+            reverse("task_bulk"),
+            {"ids": ids, "action": "set_status", "status": "DONE"},
+            status=302,
+        )
+        self.assertEqual(Task.objects.filter(pk__in=ids, status="DONE").count(), 20)
+
+    def test_bulk_foreign_task(self):
+        ids = [self.task.pk, self.foreign.pk]
+        self.client.post(reverse("task_bulk"), {"ids": ids, "action": "delete"})
+        self.assertEqual(Task.objects.filter(pk__in=ids).count(), 2)
+
+    def test_export(self):
+        self.assertViewQueries(1, "get", reverse("task_export"), {"format": "jsonl"})
+
+
+@override_settings(TASKS_PAGINATION="keyset")
+class KeysetPaginationTests(TestCase):
+    """
+    Курсорная пагинация (tasks/pagination.py): проход вперёд и назад даёт те же
+    задачи в порядке Meta.ordering, битый курсор — 404.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        now = timezone.now()
+        # Пары задач с одинаковым created_at — порядок решает id
+        Task.objects.bulk_create(
+            Task(owner=cls.user, title=f"Задача {i}", created_at=now - timedelta(minutes=i // 2))
+            for i in range(25)
+        )
+        cls.expected = list(Task.objects.filter(owner=cls.user).values_list("pk", flat=True))
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+        self.client.force_login(self.user)
+
+    def page(self, cursor=None):
+        response = self.client.get(reverse("task_list"), {"cursor": cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200)
+        page = response.context["page_obj"]
+        return [task.pk for task in page.object_list], page
+
+    def test_cursors_round_trip(self):
+        pages, cursor = [], None
+        while True:
+            ids, page = self.page(cursor)
+            pages.append(ids)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual([pk for ids in pages for pk in ids], self.expected)
+        self.assertEqual([len(ids) for ids in pages], [10, 10, 5])
+
+        # Назад с последней страницы — те же страницы в обратном порядке
+        for expected_ids in reversed(pages[:-1]):
+            ids, page = self.page(page.previous_cursor)
+            self.assertEqual(ids, expected_ids)
+        self.assertFalse(page.has_previous())
+
+    def test_invalid_cursor_is_404(self):
+        naive = KeysetPaginator.encode_cursor("n", datetime(2026, 1, 1), 1)
+        wrong_direction = KeysetPaginator.encode_cursor("x", timezone.now(), 1)
+        for cursor in ("мусор", "e30", naive, wrong_direction, self.page()[1].next_cursor[:-3]):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(reverse("task_list"), {"cursor": cursor}).status_code, 404)
+
+
+class TaskSearchTests(TestCase):
+    """
+    Полнотекстовый поиск задач (tasks/search.py): префиксы, ё/е, стемминг,
+    синхронизация индекса триггерами и сортировка по релевантности.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.other = User.objects.create_user("other", password="pass")
+        cls.report = Task.objects.create(
+            owner=cls.user, title="Годовой отчёт", description="Отчёт для отчётности"
+        )
+        cls.tasks = Task.objects.create(owner=cls.user, title="Разобрать задачами почту")
+        cls.mention = Task.objects.create(
+            owner=cls.user, title="Позвонить бухгалтеру", description="про отчёт"
+        )
+        cls.foreign = Task.objects.create(owner=cls.other, title="Чужой отчёт")
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+
+    def search(self, q, owner=None):
+        owner = owner or self.user
+        qs = task_search.filter(Task.objects.filter(owner=owner), q, owner_id=owner.pk)
+        return set(qs.values_list("pk", flat=True))
+
+    def test_prefix_and_yo(self):
+        expected = {self.report.pk, self.mention.pk}
+        for q in ("отч", "отчёт", "ОТЧЕТ", "Отчет"):
+            with self.subTest(q=q):
+                self.assertEqual(self.search(q), expected)
+        # Все слова запроса обязательны
+        self.assertEqual(self.search("годовой отчет"), {self.report.pk})
+        self.assertEqual(self.search("отчёт", owner=self.other), {self.foreign.pk})
+
+    def test_stemmer(self):
+        self.assertEqual(stem_ru("задачи"), "задач")
+        self.assertEqual(stem_ru("годовой"), "годов")
+        self.assertEqual(stem_ru("дом"), "дом")
+        self.assertEqual(stem_ru("reports"), "reports")
+        # "задача" -> "задач*" находит "задачами"
+        self.assertEqual(self.search("задача"), {self.tasks.pk})
+
+    def test_index_follows_update_and_delete(self):
+        Task.objects.filter(pk=self.tasks.pk).update(title="Разобрать входящие")
+        self.assertEqual(self.search("задача"), set())
+        self.assertEqual(self.search("входящие"), {self.tasks.pk})
+
+        self.report.title = "Квартальная сводка"
+        self.report.description = ""
+        self.report.save()
+        self.assertEqual(self.search("отчёт"), {self.mention.pk})
+        self.assertEqual(self.search("сводка"), {self.report.pk})
+
+        self.mention.delete()
+        self.assertEqual(self.search("отчёт"), set())
+
+    def test_list_sorted_by_rank(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("task_list"), {"q": "отчёт"})
+        # Без поиска новые задачи сверху; с поиском — сначала самая релевантная
+        self.assertEqual(
+            [task.pk for task in response.context["page_obj"].object_list],
+            [self.report.pk, self.mention.pk],
+        )
+
+    def test_admin_sorted_by_rank(self):
+        admin_user = User.objects.create_superuser("admin", password="pass")
+        self.client.force_login(admin_user)
+        url = reverse("admin:tasks_task_changelist")
+        response = self.client.get(url, {"q": "отчёт"})
+        self.assertEqual(
+            [task.pk for task in response.context["cl"].result_list],
+            [self.report.pk, self.foreign.pk, self.mention.pk],
+        )
+        # Выбранная сортировка по колонке важнее релевантности
+        response = self.client.get(url, {"q": "отчёт", "o": "-1"})
+        self.assertEqual(
+            [task.pk for task in response.context["cl"].result_list],
+            [self.foreign.pk, self.mention.pk, self.report.pk],
+        )
+
+    @override_settings(TASKS_PAGINATION="keyset")
+    def test_keyset_list_keeps_time_order(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("task_list"), {"q": "отчёт"})
+        self.assertEqual(
+            [task.pk for task in response.context["page_obj"].object_list],
+            [self.mention.pk, self.report.pk],
+        )
+
+
+class TaskCounterTests(TestCase):
+    """
+    Счётчики задач (tasks/counters.py) после любых изменений совпадают
+    с настоящим COUNT по таблице задач.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.other = User.objects.create_user("other", password="pass")
+
+    def assertCountersMatch(self):
+        self.assertEqual(counters.verify(), [])
+        for owner in (self.user, self.other):
+            tasks = Task.objects.filter(owner=owner)
+            histogram = counters.owner_histogram(owner)
+            self.assertEqual(histogram["total"], tasks.count())
+            for status in Task.Status.values:
+                self.assertEqual(histogram["status"][status], tasks.filter(status=status).count())
+            for priority in Task.Priority.values:
+                self.assertEqual(histogram["priority"][priority], tasks.filter(priority=priority).count())
+
+    def test_single_row_changes(self):
+        task = Task.objects.create(owner=self.user, title="Задача")
+        Task.objects.create(owner=self.other, title="Чужая", status=Task.Status.DONE)
+        self.assertCountersMatch()
+
+        task.status = Task.Status.IN_PROGRESS
+        task.priority = 3
+        task.save()
+        self.assertCountersMatch()
+
+        # Смена владельца переносит задачу между счётчиками
+        task.owner = self.other
+        task.save()
+        self.assertCountersMatch()
+
+        task.delete()
+        self.assertCountersMatch()
+
+    def test_bulk_changes(self):
+        Task.objects.bulk_create(
+            Task(owner=self.user, title=f"Задача {i}", priority=i % 3 + 1) for i in range(30)
+        )
+        self.assertCountersMatch()
+
+        Task.objects.filter(owner=self.user, priority=1).update(status=Task.Status.DONE)
+        self.assertCountersMatch()
+
+        Task.objects.filter(owner=self.user, priority=2).delete()
+        self.assertCountersMatch()
+
+        # Каскадное удаление вместе с владельцем
+        self.user.delete()
+        self.assertEqual(counters.verify(), [])
+        self.assertFalse(TaskCounter.objects.filter(owner_id=self.user.pk, count__gt=0).exists())
+
+    def test_rebuild_command(self):
+        Task.objects.bulk_create(Task(owner=self.user, title=f"Задача {i}") for i in range(5))
+        out = StringIO()
+        call_command("rebuild_task_counters", "--check", stdout=out)
+        self.assertIn("совпадают", out.getvalue())
+
+        # Испорченный счётчик: --check сообщает и ничего не меняет
+        TaskCounter.objects.filter(owner=self.user).update(count=99)
+        err = StringIO()
+        with self.assertRaisesMessage(CommandError, "Расхождений: 1"):
+            call_command("rebuild_task_counters", "--check", stdout=StringIO(), stderr=err)
+        self.assertIn("хранится 99, на самом деле 5", err.getvalue())
+        self.assertEqual(TaskCounter.objects.get(owner=self.user).count, 99)
+
+        # Без --check — пересчитывает
+        call_command("rebuild_task_counters", stdout=StringIO())
+        self.assertCountersMatch()
+
+    def test_status_links_keep_filters(self):
+        Task.objects.create(owner=self.user, title="Отчёт", priority=3)
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse("task_list"), {"q": "отчёт", "priority": "3", "status": "TODO", "page": "1"}
+        )
+        # Статус заменён, остальные фильтры сохранены, страница сброшена
+        links = [query for _, _, _, query in response.context["status_histogram"]]
+        self.assertEqual(links[-1], "?q=%D0%BE%D1%82%D1%87%D1%91%D1%82&status=DONE&priority=3")
+        self.assertContains(response, 'href="?q=%D0%BE%D1%82%D1%87%D1%91%D1%82&amp;status=INPR&amp;priority=3"')
+
+
+class TaskBulkActionTests(TestCase):
+    """
+    Массовые действия (POST /bulk/): изменения, проверка владения и ошибки формы.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.other = User.objects.create_user("other", password="pass")
+        cls.tasks = [Task.objects.create(owner=cls.user, title=f"Задача {i}") for i in range(4)]
+        cls.foreign = Task.objects.create(owner=cls.other, title="Чужая задача")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.ids = [task.pk for task in self.tasks[:3]]
+
+    def post(self, data, **extra):
+        return self.client.post(reverse("task_bulk"), data, **extra)
+
+    def values(self, field):
+        return list(Task.objects.filter(pk__in=self.ids).order_by().values_list(field, flat=True).distinct())
+
+    def test_actions(self):
+        response = self.post(
+            {"ids": self.ids, "action": "set_status", "status": "DONE"}, HTTP_ACCEPT="application/json"
+        )
+        self.assertEqual(response.json(), {"action": "set_status", "count": 3})
+        self.assertEqual(self.values("status"), ["DONE"])
+        # Остальные задачи не тронуты
+        self.assertEqual(Task.objects.get(pk=self.tasks[3].pk).status, "TODO")
+
+        self.post({"ids": self.ids, "action": "set_priority", "priority": 3})
+        self.assertEqual(self.values("priority"), [3])
+
+        self.post({"ids": self.ids, "action": "set_due_date", "due_date": "2026-05-01"})
+        self.assertEqual(self.values("due_date"), [date(2026, 5, 1)])
+        self.post({"ids": self.ids, "action": "set_due_date", "due_date": ""})
+        self.assertEqual(self.values("due_date"), [None])
+
+        before = Task.objects.get(pk=self.tasks[3].pk).updated_at
+        self.assertTrue(all(updated > before for updated in self.values("updated_at")))
+
+        response = self.post({"ids": self.ids, "action": "delete"})
+        self.assertRedirects(response, reverse("task_list"), fetch_redirect_response=False)
+        self.assertEqual(list(Task.objects.filter(owner=self.user).values_list("pk", flat=True)), [self.tasks[3].pk])
+
+    def test_foreign_task_is_404(self):
+        response = self.post({"ids": [*self.ids, self.foreign.pk], "action": "set_status", "status": "DONE"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.values("status"), ["TODO"])
+        self.assertEqual(Task.objects.get(pk=self.foreign.pk).status, "TODO")
+
+    def test_redirects_to_next(self):
+        data = {"ids": self.ids, "action": "set_priority", "priority": 1}
+        response = self.post({**data, "next": "/?status=TODO&page=2"})
+        self.assertRedirects(response, "/?status=TODO&page=2", fetch_redirect_response=False)
+        response = self.post({**data, "next": "https://evil.example/"})
+        self.assertRedirects(response, reverse("task_list"), fetch_redirect_response=False)
+
+    def test_invalid_form(self):
+        data = {"ids": self.ids, "action": "set_status"}
+        response = self.post(data, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("status", response.json()["errors"])
+
+        # Форма со страницы: обратно на список с сообщением, ничего не меняется
+        response = self.post({**data, "next": "/?status=TODO"}, follow=True)
+        self.assertEqual(response.redirect_chain, [("/?status=TODO", 302)])
+        self.assertContains(response, "Действие не выполнено: Выберите статус")
+        self.assertEqual(self.values("status"), ["TODO"])
+
+
+class TaskExportTests(TestCase):
+    """
+    Выгрузка задач (tasks/export.py): содержимое CSV / JSON Lines и фильтры.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.other = User.objects.create_user("other", password="pass")
+        cls.staff = User.objects.create_user("staff", password="pass", is_staff=True)
+        cls.first = Task.objects.create(
+            owner=cls.user, title='Отчёт, "квартал"', description="строка 1\nстрока 2",
+            status="DONE", priority=3, due_date=date(2026, 3, 1),
+        )
+        cls.second = Task.objects.create(owner=cls.user, title="Позвонить")
+        cls.foreign = Task.objects.create(owner=cls.other, title="Чужой отчёт")
+
+    def export(self, url_name="task_export", **params):
+        response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv(self):
+        self.client.force_login(self.user)
+        response, content = self.export(format="csv")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="tasks.csv"')
+        self.assertTrue(content.startswith("\ufeff"))
+
+        rows = list(csv.reader(StringIO(content[1:])))
+        self.assertEqual(rows[0], TASK_EXPORT_FIELDS)
+        # Свои задачи в порядке списка (новые сверху), кавычки и переводы строк сохраняются
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.second.pk), str(self.first.pk)])
+        self.assertEqual(
+            rows[2][:7],
+            [str(self.first.pk), 'Отчёт, "квартал"', "строка 1\nстрока 2", "DONE", "3",
+             "2026-03-01", self.first.created_at.isoformat()],
+        )
+
+    def test_csv_formulas_are_text(self):
+        formulas = ["=HYPERLINK(\"http://x\")", "+1", "-2+3", "@SUM(A1)"]
+        Task.objects.bulk_create(Task(owner=self.user, title=title, description=title) for title in formulas)
+        self.client.force_login(self.user)
+
+        _, content = self.export(format="csv", status="TODO")
+        rows = list(csv.reader(StringIO(content[1:])))
+        self.assertCountEqual([row[1] for row in rows[1:]], ["'" + title for title in formulas] + ["Позвонить"])
+        self.assertCountEqual([row[2] for row in rows[1:]], ["'" + title for title in formulas] + [""])
+
+        # В JSON Lines значения как есть
+        _, content = self.export(format="jsonl", status="TODO")
+        self.assertIn("=HYPERLINK(\"http://x\")", [json.loads(line)["title"] for line in content.splitlines()])
+
+    def test_jsonl(self):
+        self.client.force_login(self.user)
+        response, content = self.export(format="jsonl")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="tasks.jsonl"')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.second.pk, self.first.pk])
+        self.assertEqual(list(rows[1]), TASK_EXPORT_FIELDS)
+        self.assertEqual(rows[1]["title"], 'Отчёт, "квартал"')
+        self.assertEqual(rows[1]["due_date"], "2026-03-01")
+        self.assertIsNone(rows[0]["due_date"])
+
+    def test_filters(self):
+        self.client.force_login(self.user)
+        for params, expected in (
+            ({"status": "DONE"}, [self.first.pk]),
+            ({"priority": "3"}, [self.first.pk]),
+            ({"q": "отчет"}, [self.first.pk]),
+            ({"q": "позвонить", "status": "DONE"}, []),
+        ):
+            with self.subTest(params=params):
+                _, content = self.export(format="jsonl", **params)
+                self.assertEqual([json.loads(line)["id"] for line in content.splitlines()], expected)
+
+        response = self.client.get(reverse("task_export"), {"format": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_export(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("admin_task_export")).status_code, 403)
+
+        self.client.force_login(self.staff)
+        response, content = self.export("admin_task_export", format="jsonl")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="tasks_all.jsonl"')
+        rows = [json.loads(line) for line in content.splitlines()]
+        # Все пользователи, в порядке id, с владельцем
+        self.assertEqual([row["id"] for row in rows], [self.first.pk, self.second.pk, self.foreign.pk])
+        self.assertEqual(rows[2]["owner_username"], "other")
+
+        _, content = self.export("admin_task_export", format="csv", owner=self.other.pk)
+        rows = list(csv.reader(StringIO(content[1:])))
+        self.assertEqual(rows[0], ADMIN_EXPORT_FIELDS)
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.foreign.pk)])
+
+        _, content = self.export("admin_task_export", format="jsonl", q="отчёт")
+        self.assertEqual(
+            [json.loads(line)["id"] for line in content.splitlines()], [self.first.pk, self.foreign.pk]
+        )
+
+
+class ImportTasksTests(TestCase):
+    """
+    Команда import_tasks: разбор CSV / JSONL, отклонённые строки, --dry-run и владельцы.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.other = User.objects.create_user("other", password="pass")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = f"{self.tmp.name}/{name}"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def run_import(self, path, *args):
+        rejects = f"{self.tmp.name}/rejects.jsonl"
+        out = StringIO()
+        call_command("import_tasks", path, "--rejects", rejects, *args, stdout=out)
+        with open(rejects, encoding="utf-8") as f:
+            return out.getvalue(), [json.loads(line) for line in f]
+
+    def test_csv(self):
+        path = self.write("tasks.csv", (
+            "title,description,status,priority,due_date\n"
+            'Отчёт,"Первая, вторая",DONE,3,2026-03-01\n'
+            "Позвонить,,,,\n"
+            ",без названия,TODO,1,\n"
+            "Плохая,,LATER,7,вчера\n"
+        ))
+        with self.captureOnCommitCallbacks(execute=True):
+            out, rejects = self.run_import(path, "--owner", "owner")
+        activity.flush()
+        self.assertIn("Импортировано: 2, отклонено: 2", out)
+
+        report, call = Task.objects.filter(owner=self.user).order_by("id")
+        self.assertEqual(
+            (report.title, report.description, report.status, report.priority, report.due_date),
+            ("Отчёт", "Первая, вторая", "DONE", 3, date(2026, 3, 1)),
+        )
+        # Пустые статус и приоритет — значения по умолчанию
+        self.assertEqual((call.status, call.priority, call.due_date), ("TODO", 2, None))
+        # Импортированная выполненной попадает в журнал — для отчётов
+        self.assertEqual(
+            list(TaskActivity.objects.values_list("task_id", "changes")), [(report.pk, "s=>DONE")]
+        )
+
+        self.assertEqual([reject["line"] for reject in rejects], [4, 5])
+        self.assertEqual(list(rejects[0]["errors"]), ["title"])
+        self.assertEqual(set(rejects[1]["errors"]), {"status", "priority", "due_date"})
+        self.assertEqual(rejects[1]["row"]["title"], "Плохая")
+
+    def test_jsonl(self):
+        path = self.write("tasks.jsonl", "\n".join([
+            json.dumps({"title": "Задача владельца", "owner__username": "owner", "priority": 1}),
+            "{битая строка",
+            "",
+            json.dumps({"title": "Чужая", "owner_username": "other", "created_at": "2026-01-05T10:00:00+03:00"}),
+            json.dumps({"title": "Без часового пояса", "owner": "owner", "created_at": "2026-01-05T10:00:00"}),
+            json.dumps({"title": "Плохая дата", "owner": "owner", "created_at": "вчера"}),
+            json.dumps({"title": "Без владельца"}),
+        ]) + "\n")
+        out, rejects = self.run_import(path)
+        self.assertIn("Импортировано: 3, отклонено: 3", out)
+
+        tasks = {task.title: task for task in Task.objects.all()}
+        self.assertEqual(tasks["Задача владельца"].owner_id, self.user.pk)
+        self.assertEqual(tasks["Задача владельца"].priority, 1)
+        self.assertEqual(tasks["Чужая"].owner_id, self.other.pk)
+        self.assertEqual(
+            tasks["Чужая"].created_at, datetime(2026, 1, 5, 7, 0, tzinfo=timezone.get_fixed_timezone(0))
+        )
+        # Дата без часового пояса — в текущем часовом поясе
+        self.assertEqual(
+            tasks["Без часового пояса"].created_at,
+            timezone.make_aware(datetime(2026, 1, 5, 10, 0)),
+        )
+
+        self.assertEqual([reject["line"] for reject in rejects], [2, 6, 7])
+        self.assertEqual(rejects[0]["errors"], {"__all__": ["Некорректная строка JSON"]})
+        self.assertEqual(list(rejects[1]["errors"]), ["created_at"])
+        self.assertEqual(list(rejects[2]["errors"]), ["owner"])
+
+    def test_owner_resolution_order(self):
+        # owner_id важнее username, username важнее --owner
+        path = self.write("tasks.jsonl", "\n".join([
+            json.dumps({"title": "По id", "owner_id": self.other.pk, "owner__username": "owner"}),
+            json.dumps({"title": "По имени", "owner__username": "other"}),
+            json.dumps({"title": "По умолчанию"}),
+            json.dumps({"title": "Нет такого", "owner__username": "nobody"}),
+        ]))
+        out, rejects = self.run_import(path, "--owner", "owner")
+        self.assertIn("Импортировано: 3, отклонено: 1", out)
+        self.assertEqual(
+            dict(Task.objects.values_list("title", "owner__username")),
+            {"По id": "other", "По имени": "other", "По умолчанию": "owner"},
+        )
+        self.assertEqual(rejects[0]["errors"], {"owner": ["Пользователь nobody не найден"]})
+
+    def test_unknown_owner_id_is_rejected(self):
+        missing = self.other.pk + 100
+        rows = [{"title": f"Задача {i}", "owner_id": self.user.pk} for i in range(4)]
+        rows[1]["owner_id"] = missing
+        rows[3]["owner_id"] = "abc"
+        path = self.write("tasks.jsonl", "\n".join(json.dumps(row) for row in rows))
+
+        # Пачки по 2 строки: несуществующий владелец отклоняется, остальная пачка вставляется
+        out, rejects = self.run_import(path, "--batch-size", "2")
+        self.assertIn("Импортировано: 2, отклонено: 2", out)
+        self.assertEqual(sorted(Task.objects.values_list("title", flat=True)), ["Задача 0", "Задача 2"])
+        self.assertEqual(
+            {reject["line"]: reject["errors"] for reject in rejects},
+            {
+                2: {"owner": [f"Пользователь с id {missing} не найден"]},
+                4: {"owner": ["Некорректный owner_id"]},
+            },
+        )
+
+    def test_dry_run(self):
+        path = self.write("tasks.csv", "title,owner_id\nЗадача,%d\nЧужая,%d\n" % (self.user.pk, 0))
+        out, rejects = self.run_import(path, "--dry-run")
+        self.assertIn("Проверено: 1, отклонено: 1", out)
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual([reject["line"] for reject in rejects], [3])
+
+
+class OwnerOnlyMixinTests(TestCase):
+
+    def test_object_is_loaded_once(self):
+        user = User.objects.create_user("owner", password="pass")
+        task = Task.objects.create(owner=user, title="Задача")
+
+        request = RequestFactory().get("/")
+        request.user = user
+        view = TaskDetailView()
+        view.setup(request, pk=task.pk)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(view.get_object(), task)
+            self.assertEqual(view.get_object(), task)
+
+
+@override_settings(TASKS_FRAGMENT_CACHE_ENABLED=True)
+class TaskListFragmentCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.task = Task.objects.create(owner=cls.user, title="Задача")
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+        fragment_cache.stats.reset()
+        self.client.force_login(self.user)
+
+    def test_repeat_view_does_not_query_tasks(self):
+        self.client.get(reverse("task_list"))
+        with self.assertNumQueries(AUTH_QUERIES):
+            response = self.client.get(reverse("task_list"))
+        self.assertContains(response, "Задача")
+        self.assertEqual(fragment_cache.stats.as_dict()["hits"], 1)
+
+    def test_filters_are_part_of_the_key(self):
+        self.client.get(reverse("task_list"))
+        response = self.client.get(reverse("task_list"), {"status": "DONE"})
+        self.assertNotContains(response, "Задача</a>")
+        self.assertEqual(fragment_cache.stats.as_dict()["misses"], 2)
+
+    def test_save_invalidates(self):
+        self.client.get(reverse("task_list"))
+        self.task.title = "Переименована"
+        self.task.save()
+        self.assertContains(self.client.get(reverse("task_list")), "Переименована")
+
+    def test_bulk_update_invalidates(self):
+        self.client.get(reverse("task_list"))
+        self.client.post(
+            reverse("task_bulk"), {"ids": [self.task.pk], "action": "set_status", "status": "DONE"}
+        )
+        self.assertContains(self.client.get(reverse("task_list")), "Статус: Готово")
+
+    @override_settings(TASKS_FRAGMENT_CACHE_ENABLED=False)
+    def test_disabled(self):
+        # Как в другом процессе с locmem: версия владельца здесь не меняется,
+        # но выключенный кэш всё равно отдаёт свежий список
+        self.client.get(reverse("task_list"))
+        Task.objects.filter(pk=self.task.pk).update(title="Переименована")
+        self.assertContains(self.client.get(reverse("task_list")), "Переименована")
+        self.assertEqual(fragment_cache.stats.as_dict(), {"hits": 0, "misses": 0, "hit_ratio": None})
+
+
+class AsyncViewsTests(TestCase):
+    """
+    Async-версии view (ASYNC_VIEWS=True): то же поведение и то же число запросов.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.enterClassContext(views_mode(async_views=True))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass", is_staff=True)
+        cls.other = User.objects.create_user("other", password="pass")
+        cls.task = Task.objects.create(owner=cls.user, title="Своя задача")
+        cls.foreign = Task.objects.create(owner=cls.other, title="Чужая задача")
+        task_search.is_available()
+        user_search.is_available()
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+        self.async_client.force_login(self.user)
+
+    def get(self, url, data=None):
+        # assertNumQueries работает только в синхронном тесте: запрос гоняем через async_to_sync,
+        # ORM-вызовы async-view возвращаются в этот же поток (thread_sensitive)
+        return async_to_sync(self.async_client.get)(url, data or {})
+
+    def test_list(self):
+        with self.assertNumQueries(AUTH_QUERIES + 3):
+            response = self.get(reverse("task_list"))
+        self.assertContains(response, "Своя задача")
+        self.assertNotContains(response, "Чужая задача")
+
+    @override_settings(TASKS_PAGINATION="keyset")
+    def test_list_keyset(self):
+        with self.assertNumQueries(AUTH_QUERIES + 2):
+            response = self.get(reverse("task_list"), {"q": "своя"})
+        self.assertContains(response, "Своя задача")
+
+    def test_list_with_archived(self):
+        task = Task.objects.create(owner=self.user, title="Старая задача", status="DONE")
+        archive.archive(older_than=timedelta(seconds=-1))
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+
+        for mode in ("offset", "keyset"):
+            with self.subTest(mode=mode), override_settings(TASKS_PAGINATION=mode):
+                response = self.get(reverse("task_list"), {"archived": "1"})
+                self.assertContains(response, "Своя задача")
+                self.assertContains(response, "Старая задача")
+
+    def test_detail(self):
+        with self.assertNumQueries(AUTH_QUERIES + 2):
+            response = self.get(reverse("task_detail", args=[self.task.pk]))
+        self.assertContains(response, "Своя задача")
+
+        self.assertEqual(self.get(reverse("task_detail", args=[self.foreign.pk])).status_code, 403)
+        self.assertEqual(self.get(reverse("task_detail", args=[10**9])).status_code, 404)
+
+    async def test_create_update_delete(self):
+        response = await self.async_client.post(
+            reverse("task_create"), {"title": "Новая", "status": "TODO", "priority": 2}
+        )
+        self.assertRedirects(response, reverse("task_list"), fetch_redirect_response=False)
+        task = await Task.objects.aget(title="Новая")
+        self.assertEqual(task.owner_id, self.user.pk)
+
+        await self.async_client.post(
+            reverse("task_edit", args=[task.pk]), {"title": "Изменена", "status": "DONE", "priority": 3}
+        )
+        await task.arefresh_from_db()
+        self.assertEqual(task.status, "DONE")
+
+        await self.async_client.post(reverse("task_delete", args=[task.pk]))
+        self.assertFalse(await Task.objects.filter(pk=task.pk).aexists())
+
+    async def test_login_required(self):
+        await self.async_client.alogout()
+        response = await self.async_client.get(reverse("task_list"))
+        self.assertEqual(response.status_code, 302)
+
+    async def test_admin_views(self):
+        response = await self.async_client.get(reverse("admin_user_list"), {"q": "own"})
+        self.assertContains(response, "owner")
+        response = await self.async_client.get(reverse("admin_user_detail", args=[self.user.pk]))
+        self.assertContains(response, "Своя задача")
+
+        await self.async_client.aforce_login(self.other)
+        response = await self.async_client.get(reverse("admin_user_list"))
+        self.assertEqual(response.status_code, 403)
+
+
+class TaskApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.other = User.objects.create_user("other", password="pass")
+        cls.tasks = [
+            Task.objects.create(owner=cls.user, title=f"Задача {i}", status="TODO") for i in range(5)
+        ]
+        cls.foreign = Task.objects.create(owner=cls.other, title="Чужая задача")
+        task_search.is_available()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_fields_and_scoping(self):
+        response = self.client.get(reverse("task_api_list"), {"fields": "id,title"})
+        results = response.json()["results"]
+        self.assertEqual(len(results), 5)
+        self.assertEqual(set(results[0]), {"id", "title"})
+        self.assertNotIn(self.foreign.pk, [row["id"] for row in results])
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse("task_api_list"), {"fields": "id,owner_id"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pagination(self):
+        first = self.client.get(reverse("task_api_list"), {"limit": 3, "fields": "id"}).json()
+        second = self.client.get(
+            reverse("task_api_list"), {"limit": 3, "fields": "id", "cursor": first["next_cursor"]}
+        ).json()
+        ids = [row["id"] for row in first["results"] + second["results"]]
+        self.assertEqual(ids, [task.pk for task in reversed(self.tasks)])
+        self.assertIsNone(second["next_cursor"])
+
+    def test_not_modified(self):
+        url = reverse("task_api_list")
+        etag = self.client.get(url)["ETag"]
+
+        # Состояние владельца (3 запроса: задачи, надгробия, счётчики), сами задачи не читаются
+        with self.assertNumQueries(AUTH_QUERIES + 3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.tasks[0].delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_last_modified_after_delete(self):
+        url = reverse("task_api_list")
+        Task.objects.filter(owner=self.user).update(updated_at=timezone.now() - timedelta(hours=1))
+        last_modified = self.client.get(url)["Last-Modified"]
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        # Удаление не меняет updated_at остальных задач, но время надгробия двигает Last-Modified
+        self.tasks[0].delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(parse_http_date(response["Last-Modified"]), parse_http_date(last_modified))
+
+    def test_detail(self):
+        url = reverse("task_api_detail", args=[self.tasks[0].pk])
+        response = self.client.get(url, {"fields": "title,status"})
+        self.assertEqual(response.json(), {"title": "Задача 0", "status": "TODO"})
+        repeat = self.client.get(url, {"fields": "title,status"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(repeat.status_code, 304)
+
+        foreign = self.client.get(reverse("task_api_detail", args=[self.foreign.pk]))
+        self.assertEqual(foreign.status_code, 403)
+
+    def test_anonymous(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("task_api_list")).status_code, 403)
+
+
+@override_settings(TASKS_SYNC_SETTLE_SECONDS=0)
+class TaskSyncTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.tasks = [Task.objects.create(owner=cls.user, title=f"Задача {i}") for i in range(3)]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params["cursor"] = cursor
+        response = self.client.get(reverse("task_sync"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changes_and_deletions(self):
+        initial = self.sync(fields="id,title")
+        self.assertEqual(len(initial["changed"]), 3)
+        self.assertEqual(initial["deleted"], [])
+
+        self.tasks[0].title = "Изменена"
+        self.tasks[0].save()
+        self.client.post(reverse("task_delete", args=[self.tasks[1].pk]))
+        created = Task.objects.create(owner=self.user, title="Новая")
+
+        delta = self.sync(initial["cursor"], fields="id,title")
+        self.assertEqual(
+            delta["changed"],
+            [{"id": self.tasks[0].pk, "title": "Изменена"}, {"id": created.pk, "title": "Новая"}],
+        )
+        self.assertEqual(delta["deleted"], [self.tasks[1].pk])
+
+        self.assertEqual(self.sync(delta["cursor"])["changed"], [])
+
+    def test_paging(self):
+        first = self.sync(limit=2)
+        self.assertTrue(first["has_more"])
+        second = self.sync(first["cursor"], limit=2)
+        self.assertFalse(second["has_more"])
+        ids = [row["id"] for row in first["changed"] + second["changed"]]
+        self.assertEqual(ids, [task.pk for task in self.tasks])
+
+    def test_bulk_and_cascade_deletes_leave_tombstones(self):
+        Task.objects.filter(pk=self.tasks[0].pk).delete()
+        self.user.delete()
+        self.assertEqual(
+            sorted(TaskTombstone.objects.values_list("task_id", flat=True)),
+            [task.pk for task in self.tasks],
+        )
+
+    def test_expired_cursor_and_compaction(self):
+        cursor = self.sync()["cursor"]
+        self.tasks[0].delete()
+
+        with override_settings(TASKS_TOMBSTONE_RETENTION_DAYS=0):
+            response = self.client.get(reverse("task_sync"), {"cursor": cursor})
+            self.assertEqual(response.status_code, 410)
+            self.assertEqual(sync.compact(), 1)
+        self.assertFalse(TaskTombstone.objects.exists())
+
+    def test_tombstone_written_once_with_or_without_trigger(self):
+        self.addCleanup(sync._trigger_databases.clear)
+        ids = [task.pk for task in self.tasks[:2]]
+        self.assertTrue(sync.enabled())
+        self.tasks[0].delete()
+
+        # Без триггера (откатится вместе с транзакцией теста) надгробие пишет сигнал
+        sync._trigger_databases.clear()
+        with connection.cursor() as cursor:
+            TASK_TOMBSTONES.uninstall(cursor)
+        self.assertFalse(sync.enabled())
+        self.tasks[1].delete()
+
+        self.assertEqual(sorted(TaskTombstone.objects.values_list("task_id", flat=True)), ids)
+
+
+class RecordingBroker:
+    """
+    Брокер для тестов: просто запоминает опубликованные события.
+    """
+
+    def __init__(self):
+        self.published = []
+
+    def has_subscribers(self, owner_id):
+        return True
+
+    def publish(self, owner_id, event):
+        self.published.append((owner_id, event))
+
+
+@override_settings(TASKS_EVENTS=True, TASKS_EVENTS_BROKER="tasks.tests.RecordingBroker")
+class TaskEventsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.task = Task.objects.create(owner=cls.user, title="Задача")
+
+    def setUp(self):
+        events.get_broker.cache_clear()
+        self.addCleanup(events.get_broker.cache_clear)
+        self.broker = events.get_broker()
+        self.client.force_login(self.user)
+
+    def test_changed_fields_only(self):
+        task = Task.objects.get(pk=self.task.pk)
+        task.status = "DONE"
+        with self.captureOnCommitCallbacks(execute=True):
+            task.save()
+
+        owner_id, event = self.broker.published[-1]
+        self.assertEqual(owner_id, self.user.pk)
+        self.assertEqual(event["type"], "updated")
+        self.assertEqual(set(event["fields"]), {"status", "updated_at"})
+
+    def test_rolled_back_changes_are_not_published(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.task.delete()
+        self.assertEqual(self.broker.published, [])
+        self.assertEqual(len(callbacks), 1)
+
+    def test_bulk_action(self):
+        self.client.post(
+            reverse("task_bulk"), {"ids": [self.task.pk], "action": "set_priority", "priority": 3}
+        )
+        event = self.broker.published[-1][1]
+        self.assertEqual(event["ids"], [self.task.pk])
+        self.assertEqual(event["fields"]["priority"], 3)
+
+
+@override_settings(TASKS_EVENTS=True, TASKS_EVENTS_POLL_TIMEOUT=5)
+class TaskEventsStreamTests(TestCase):
+    """
+    Поток GET /events/ — только вместе с async-view (ASGI).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.enterClassContext(views_mode(async_views=True))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+
+    def setUp(self):
+        events.get_broker.cache_clear()
+        self.addCleanup(events.get_broker.cache_clear)
+        self.async_client.force_login(self.user)
+
+    async def test_long_poll(self):
+        broker = events.get_broker()
+        request = asyncio.ensure_future(self.async_client.get(reverse("task_events"), {"poll": 1}))
+        while not broker.has_subscribers(self.user.pk):
+            await asyncio.sleep(0.01)
+
+        broker.publish(self.user.pk, {"type": "deleted", "id": 1})
+        response = await request
+        self.assertEqual(response.json(), {"events": [{"type": "deleted", "id": 1}]})
+        self.assertFalse(broker.has_subscribers(self.user.pk))
+
+    @override_settings(TASKS_EVENTS=False)
+    async def test_disabled(self):
+        response = await self.async_client.get(reverse("task_events"))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_list_subscribes(self):
+        response = await self.async_client.get(reverse("task_list"))
+        self.assertContains(response, 'new EventSource("/events/")')
+
+    def test_not_routed_under_wsgi(self):
+        with views_mode(async_views=False):
+            with self.assertRaises(NoReverseMatch):
+                reverse("task_events")
+            self.client.force_login(self.user)
+            self.assertEqual(self.client.get("/events/").status_code, 404)
+            # Страница списка не открывает поток, который некому обслужить
+            self.assertNotContains(self.client.get(reverse("task_list")), "EventSource")
+
+
+class DeadlineDashboardTests(QueryPlanAssertionsMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        # Среда: до конца недели ещё 4 дня
+        cls.today = date(2026, 10, 14)
+        due = {
+            "overdue": cls.today - timedelta(days=3),
+            "today": cls.today,
+            "week": cls.today + timedelta(days=2),
+            "later": cls.today + timedelta(days=30),
+            "none": None,
+        }
+        for code, due_date in due.items():
+            Task.objects.create(owner=cls.user, title=code, due_date=due_date)
+            Task.objects.create(owner=cls.user, title=f"{code} готово", due_date=due_date, status="DONE")
+        Task.objects.create(owner=cls.user, title="overdue 2", due_date=cls.today - timedelta(days=1))
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+
+    def test_buckets(self):
+        data = dashboard.build_dashboard(self.user, self.today)
+        buckets = {bucket["code"]: bucket for bucket in data["buckets"]}
+        self.assertEqual(
+            {code: bucket["count"] for code, bucket in buckets.items()},
+            {"overdue": 2, "today": 1, "week": 1, "later": 1, "none": 1},
+        )
+        # Сначала самый давний дедлайн
+        self.assertEqual([t["title"] for t in buckets["overdue"]["tasks"]], ["overdue", "overdue 2"])
+
+    def test_query_plans_use_partial_index(self):
+        with self.assertQueryPlans() as plans:
+            dashboard.build_dashboard(self.user, self.today)
+
+        self.assertEqual(len(plans), 6)
+        for sql, plan in plans:
+            self.assertIn("task_open_due_idx", " ".join(plan), sql)
+
+    def test_cached_and_invalidated(self):
+        self.client.force_login(self.user)
+        url = reverse("task_api_dashboard")
+        self.client.get(url)
+        with self.assertNumQueries(AUTH_QUERIES):
+            self.client.get(url)
+
+        Task.objects.create(owner=self.user, title="ещё одна")
+        data = self.client.get(url).json()
+        self.assertEqual(data["buckets"][-1]["count"], 2)
+
+    def test_page(self):
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(reverse("task_dashboard")), "Просрочено")
+
+
+class QueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """
+    Регрессионные тесты планов запросов: каждый запрос каждого view прогоняется
+    через EXPLAIN QUERY PLAN (tasks/explain.py). Полный проход по таблице или
+    сортировка во временном B-дереве — ошибка: значит, пропал или не подходит индекс.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass", is_staff=True)
+        Task.objects.bulk_create(
+            Task(owner=cls.user, title=f"Отчёт {i}", status=status, priority=priority)
+            for i, (status, priority) in enumerate(
+                [("TODO", 1), ("IN_PROGRESS", 2), ("DONE", 3)] * 10
+            )
+        )
+        cls.task = Task.objects.filter(owner=cls.user).first()
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+        self.client.force_login(self.user)
+
+    def get(self, name, *args, **params):
+        response = self.client.get(reverse(name, args=args), params)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        self.assertIn(response.status_code, (200, 304), name)
+        return response
+
+    def test_task_views(self):
+        cursor = self.get("task_api_list", limit=5).json()["next_cursor"]
+        requests = [
+            ("task_list", (), {}),
+            ("task_list", (), {"status": "DONE"}),
+            ("task_list", (), {"priority": "2"}),
+            ("task_list", (), {"page": "2"}),
+            ("task_detail", (self.task.pk,), {}),
+            ("task_edit", (self.task.pk,), {}),
+            ("task_delete", (self.task.pk,), {}),
+            ("task_export", (), {"format": "jsonl"}),
+            ("task_dashboard", (), {}),
+            ("task_api_list", (), {"cursor": cursor, "limit": "5"}),
+            ("task_api_list", (), {"status": "TODO", "priority": "1"}),
+            ("task_api_detail", (self.task.pk,), {}),
+            ("task_api_dashboard", (), {}),
+            ("task_sync", (), {}),
+            ("task_list", (), {"archived": "1"}),
+            ("task_api_list", (), {"archived": "1", "status": "DONE"}),
+        ]
+        for name, args, params in requests:
+            with self.subTest(name=name, params=params), self.assertQueryPlans():
+                self.get(name, *args, **params)
+
+    def test_search_results_sorted_by_rank(self):
+        # Найденные задачи сортируются по релевантности после FTS — их немного
+        with self.assertQueryPlans(allow_temp_sort=True):
+            self.get("task_list", q="отчёт")
+
+    def test_filtered_list_uses_composite_index(self):
+        with self.assertQueryPlans() as plans:
+            self.get("task_list", status="DONE")
+        # Страница задач читается по составному индексу (порядок запросов не важен)
+        self.assertTrue(any("task_owner_status_created_idx" in " ".join(plan) for _, plan in plans))
+
+    def test_bulk_action(self):
+        ids = list(Task.objects.filter(owner=self.user).values_list("id", flat=True)[:3])
+        with self.assertQueryPlans():
+            response = self.client.post(
+                reverse("task_bulk"),
+                {"ids": ids, "action": "set_status", "status": "DONE"},
+                HTTP_ACCEPT="application/json",
+            )
+        self.assertEqual(response.json()["count"], 3)
+
+    def test_admin_views(self):
+        # Число пользователей для пагинатора — COUNT(*) по всей таблице, это ожидаемо;
+        # сортировка по дате регистрации должна идти по индексу
+        with self.assertQueryPlans(allow_scans={"auth_user"}):
+            self.get("admin_user_list")
+        # Найденные поиском пользователи сортируются после FTS — их немного
+        with self.assertQueryPlans(allow_temp_sort=True):
+            self.get("admin_user_list", q="own")
+        with self.assertQueryPlans():
+            self.get("admin_user_detail", self.user.pk)
+            self.get("admin_task_export", format="jsonl", owner=self.user.pk)
+        # Выгрузка всех задач — осознанный полный проход
+        with self.assertQueryPlans(allow_scans={"tasks_task"}):
+            self.get("admin_task_export", format="jsonl")
+
+    def test_plan_problems(self):
+        self.assertEqual(
+            plan_problems(["SCAN tasks_task", "USE TEMP B-TREE FOR ORDER BY"]),
+            ["SCAN tasks_task", "USE TEMP B-TREE FOR ORDER BY"],
+        )
+        self.assertEqual(plan_problems(["SCAN tasks_task_fts VIRTUAL TABLE INDEX 0:M3"]), [])
+        self.assertEqual(plan_problems(["SCAN tasks_task"], allow_scans={"tasks_task"}), [])
+
+
+class ArchiveTests(QueryPlanAssertionsMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.other = User.objects.create_user("other", password="pass")
+        for i in range(6):
+            Task.objects.create(owner=cls.user, title=f"Задача {i}", status="DONE" if i % 2 else "TODO")
+        Task.objects.create(owner=cls.other, title="Чужая", status="DONE")
+        # Выполненные задачи «давно не менялись» (QuerySet.update не трогает auto_now)
+        Task.objects.filter(status="DONE").update(updated_at=timezone.now() - timedelta(days=100))
+        Task.objects.create(owner=cls.user, title="Свежая выполненная", status="DONE")
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+        self.client.force_login(self.user)
+
+    def test_archive_moves_old_done_tasks(self):
+        before = set(Task.objects.filter(status="DONE", title__startswith="Задача").values_list("id", flat=True))
+
+        with self.assertQueryPlans():
+            moved = archive.archive(older_than=timedelta(days=90), batch_size=2)
+
+        self.assertEqual(moved, 4)
+        self.assertEqual(set(ArchivedTask.objects.filter(owner=self.user).values_list("id", flat=True)), before)
+        self.assertTrue(Task.objects.filter(title="Свежая выполненная").exists())
+        # Счётчики и надгробия обновились триггерами, как при обычном удалении
+        self.assertEqual(counters.owner_histogram(self.user)["total"], 4)
+        self.assertEqual(TaskTombstone.objects.filter(owner_id=self.user.pk).count(), 3)
+        self.assertEqual(counters.verify(), [])
+
+    def test_list_toggle(self):
+        archive.archive()
+        response = self.client.get(reverse("task_list"))
+        self.assertNotContains(response, "Задача 1")
+
+        response = self.client.get(reverse("task_list"), {"archived": "1"})
+        self.assertContains(response, "Задача 1 <span class=\"muted\">(в архиве)</span>", html=False)
+        self.assertContains(response, "Задача 0")
+        self.assertNotContains(response, "Чужая")
+
+        response = self.client.get(reverse("task_list"), {"archived": "1", "q": "Задача 3"})
+        self.assertContains(response, "Задача 3")
+        self.assertNotContains(response, "Задача 1")
+
+    def test_api_merges_in_list_order(self):
+        expected = list(Task.objects.filter(owner=self.user).values_list("id", flat=True))
+        archive.archive()
+
+        ids, archived, cursor = [], set(), None
+        while True:
+            params = {"archived": "1", "limit": "2", "fields": "id"}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.client.get(reverse("task_api_list"), params).json()
+            ids += [row["id"] for row in data["results"]]
+            archived |= {row["id"] for row in data["results"] if row["archived"]}
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+
+        self.assertEqual(ids, expected)
+        self.assertEqual(archived, set(ArchivedTask.objects.filter(owner=self.user).values_list("id", flat=True)))
+
+    def test_offset_pages(self):
+        expected = list(Task.objects.filter(owner=self.user).values_list("id", flat=True))
+        archive.archive()
+        qs = archive.with_archived(Task.objects.filter(owner=self.user), {}, self.user)
+
+        self.assertEqual(qs.count(), len(expected))
+        self.assertEqual([task.pk for task in qs[2:5]], expected[2:5])
+        self.assertEqual([task.pk for task in qs[2:][1:2]], expected[3:4])
+
+    def test_restore(self):
+        archive.archive()
+        own = list(ArchivedTask.objects.filter(owner=self.user).values_list("id", flat=True))
+        foreign = ArchivedTask.objects.get(owner=self.other).pk
+
+        response = self.client.post(
+            reverse("task_restore"), {"ids": own[:2] + [foreign]}, HTTP_ACCEPT="application/json"
+        )
+        self.assertEqual(response.json(), {"count": 2})
+        restored = Task.objects.filter(pk__in=own[:2])
+        self.assertEqual(restored.count(), 2)
+        # Для синхронизации вернувшаяся задача — свежее изменение
+        self.assertTrue(all(t.updated_at > timezone.now() - timedelta(minutes=1) for t in restored))
+        self.assertTrue(ArchivedTask.objects.filter(pk=foreign).exists())
+
+        self.assertEqual(archive.restore(batch_size=1), 2)
+        self.assertFalse(ArchivedTask.objects.exists())
+        self.assertEqual(counters.verify(), [])
+
+    def test_restore_invalid_form(self):
+        response = self.client.post(reverse("task_restore"), {"ids": ""}, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ids", response.json()["errors"])
+
+        # Форма со страницы архива: обратно на неё с сообщением, а не JSON
+        response = self.client.post(reverse("task_restore"), {"ids": "", "next": "/?archived=1"}, follow=True)
+        self.assertEqual(response.redirect_chain, [("/?archived=1", 302)])
+        self.assertContains(response, "Задачи не восстановлены:")
+
+
+class TaskAdminTests(QueryPlanAssertionsMixin, TestCase):
+    """
+    Список задач в /admin/: число запросов не зависит от числа задач и владельцев,
+    количества берутся из счётчиков, страница читается без сортировки таблицы.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("root", password="pass")
+        for i in range(5):
+            owner = User.objects.create_user(f"user{i}", password="pass")
+            for status in ("TODO", "INPR", "DONE"):
+                Task.objects.create(owner=owner, title=f"Задача {status} {i}", status=status)
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:tasks_task_changelist")
+
+    def test_queries_do_not_grow_with_owners(self):
+        self.client.get(self.url)
+        # Сессия, пользователь, 15 задач с владельцами одним JOIN; счётчики — из кэша
+        with self.assertNumQueries(AUTH_QUERIES + 1):
+            response = self.client.get(self.url)
+        self.assertContains(response, "user4")
+        self.assertEqual(response.context["cl"].result_count, 15)
+
+    def test_filters_show_counter_totals(self):
+        response = self.client.get(self.url, {"status": "DONE"})
+        self.assertContains(response, "Готово (5)")
+        self.assertContains(response, "Средний (15)")
+        self.assertEqual(response.context["cl"].result_count, 5)
+        self.assertEqual(len(response.context["cl"].result_list), 5)
+
+    @override_settings(TASKS_ADMIN_COUNT_LIMIT=4)
+    def test_search_count_is_capped(self):
+        response = self.client.get(self.url, {"q": "user1"})
+        self.assertEqual(response.context["cl"].result_count, 3)
+        response = self.client.get(self.url, {"q": "задача"})
+        self.assertEqual(response.context["cl"].result_count, 4)
+
+    def test_query_plans(self):
+        # Сумма счётчиков (GROUP BY по маленькой таблице счётчиков) кэшируется заранее;
+        # страница — обратный проход по rowid с LIMIT, без временного B-дерева
+        counters.global_counts()
+        with self.assertQueryPlans(allow_scans={"tasks_task"}):
+            self.client.get(self.url)
+            self.client.get(self.url, {"status": "DONE", "priority": "2"})
+
+
+class JobQueueTests(TestCase):
+    """
+    Фоновые задания (tasks/jobs.py): постановка, забор, повторы, лимит параллельности,
+    выгрузка и массовое удаление через очередь, опрос состояния через API.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.other = User.objects.create_user("other", password="pass")
+        cls.tasks = [Task.objects.create(owner=cls.user, title=f"Задача {i}") for i in range(6)]
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+        self.client.force_login(self.user)
+        self.jobs_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.jobs_dir.cleanup)
+        overrides = override_settings(TASKS_JOBS_DIR=self.jobs_dir.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def register(self, kind, func, concurrency=None):
+        jobs.handler(kind, concurrency)(func)
+        self.addCleanup(jobs.HANDLERS.pop, kind)
+
+    def test_enqueue_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue("no_such_job")
+
+    def test_run_pending(self):
+        job = jobs.enqueue("rebuild_counters")
+        self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DONE)
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.result, {"mismatches": 0})
+
+    def test_retry_then_fail(self):
+        def broken(job):
+            raise RuntimeError("сломалось")
+
+        self.register("broken", broken)
+        job = jobs.enqueue("broken", max_attempts=2)
+
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertGreater(job.run_after, timezone.now())
+        # Повтор ещё не наступил
+        self.assertIsNone(jobs.claim())
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(jobs.job_state(job)["error"], "RuntimeError: сломалось")
+
+    def test_concurrency_limit(self):
+        self.register("single", lambda job: None, concurrency=1)
+        first = jobs.enqueue("single")
+        second = jobs.enqueue("single")
+        other = jobs.enqueue("rebuild_counters")
+
+        self.assertEqual(jobs.claim("w1").pk, first.pk)
+        # Второе задание того же типа ждёт, задания других типов — нет
+        self.assertEqual(jobs.claim("w2").pk, other.pk)
+        self.assertIsNone(jobs.claim("w3"))
+
+        jobs.run_job(Job.objects.get(pk=first.pk))
+        self.assertEqual(jobs.claim("w3").pk, second.pk)
+
+    def test_requeue_stale(self):
+        job = jobs.enqueue("rebuild_counters")
+        jobs.claim("w1")
+        self.assertEqual(jobs.requeue_stale(), 0)
+        self.assertEqual(jobs.requeue_stale(older_than=timedelta(seconds=-1)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertEqual(job.worker, "")
+
+    def test_heartbeat_while_handler_runs(self):
+        beats = []
+        handler_done = threading.Event()
+
+        def slow(job):
+            # Прогресс не сообщается — жив ли воркер, видно только по потоку Heartbeat
+            handler_done.wait(5)
+            return {}
+
+        def beat(heartbeat):
+            beats.append(heartbeat.job.pk)
+            handler_done.set()
+            return True
+
+        self.register("slow", slow)
+        job = jobs.enqueue("slow")
+        with override_settings(TASKS_JOBS_HEARTBEAT_SECONDS=0.01), \
+                mock.patch.object(jobs.Heartbeat, "beat", beat):
+            jobs.run_pending()
+        self.assertEqual(beats[0], job.pk)
+        self.assertFalse(any(thread.name == f"job-{job.pk}-heartbeat" for thread in threading.enumerate()))
+
+        # Сам UPDATE: только пока задание за этим воркером
+        job = jobs.enqueue("slow")
+        claimed = jobs.claim("w1")
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertTrue(jobs.Heartbeat(claimed).beat())
+        job.refresh_from_db()
+        self.assertGreater(job.heartbeat_at, timezone.now() - timedelta(minutes=1))
+        jobs.requeue_stale(older_than=timedelta(seconds=-1))
+        self.assertFalse(jobs.Heartbeat(claimed).beat())
+
+    def test_requeued_job_result_is_not_saved(self):
+        def hijacked(job):
+            # Пока обработчик работал, задание признали зависшим и забрал другой воркер
+            jobs.requeue_stale(older_than=timedelta(seconds=-1))
+            jobs.claim("w2")
+            return {"from": "w1"}
+
+        self.register("hijacked", hijacked)
+        job = jobs.enqueue("hijacked")
+        jobs.run_job(jobs.claim("w1"))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), (Job.Status.RUNNING, "w2", 2))
+        self.assertIsNone(job.result)
+
+    def test_background_export(self):
+        response = self.client.get(reverse("task_export"), {"background": "1", "format": "jsonl"})
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()["status_url"]
+        self.assertEqual(self.client.get(status_url).json()["status"], Job.Status.QUEUED)
+
+        call_command("run_workers", once=True, stdout=StringIO())
+
+        state = self.client.get(status_url).json()
+        self.assertEqual(state["status"], Job.Status.DONE)
+        self.assertEqual(state["result"]["rows"], 6)
+        download = self.client.get(state["download_url"])
+        self.assertEqual(download.status_code, 200)
+        lines = b"".join(download.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(json.loads(lines[0])["title"], "Задача 5")
+
+    def test_foreign_job(self):
+        job = jobs.enqueue("rebuild_counters", owner=self.other)
+        self.assertEqual(self.client.get(reverse("job_status", args=[job.pk])).status_code, 403)
+        self.assertEqual(self.client.get(reverse("job_status", args=[10**9])).status_code, 404)
+        self.assertEqual(self.client.get(reverse("job_download", args=[job.pk])).status_code, 403)
+
+    @override_settings(TASKS_JOBS_BULK_DELETE_THRESHOLD=3, TASKS_JOBS_DELETE_BATCH_SIZE=2)
+    def test_large_bulk_delete_goes_to_queue(self):
+        ids = [task.pk for task in self.tasks[:5]]
+        response = self.client.post(
+            reverse("task_bulk"), {"ids": ids, "action": "delete"}, HTTP_ACCEPT="application/json"
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 6)
+
+        jobs.run_pending()
+        job = Job.objects.get(pk=response.json()["job"])
+        self.assertEqual(job.result, {"deleted": 5})
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 1)
+        self.assertEqual(counters.verify(), [])
+
+        # Маленькое удаление — как раньше, сразу
+        response = self.client.post(
+            reverse("task_bulk"), {"ids": [self.tasks[5].pk], "action": "delete"},
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(response.json()["count"], 1)
+
+
+class SQLiteProfileTests(TestCase):
+    """
+    Профили SQLite (DJANGO_SQLITE_PROFILE в settings.py) и бенчмарк bench_sqlite.
+    """
+
+    def database_settings(self, **env):
+        # Настройки читаются при импорте модуля — проверяем в отдельном процессе
+        code = (
+            "import json, taskmanager.settings as s; db = s.DATABASES['default']; "
+            "print(json.dumps([db.get('CONN_MAX_AGE'), db.get('OPTIONS', {}), s.SQLITE_PRAGMAS]))"
+        )
+        base = {name: value for name, value in os.environ.items() if not name.startswith("DJANGO_")}
+        result = subprocess.run(
+            [sys.executable, "-c", code], env={**base, "DJANGO_SECRET_KEY": "x", **env},
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+        return json.loads(result.stdout)
+
+    def test_tuned_profile(self):
+        conn_max_age, options, pragmas = self.database_settings()
+        self.assertEqual(conn_max_age, 60)
+        self.assertEqual(options, {"timeout": 5.0, "transaction_mode": "IMMEDIATE"})
+        self.assertEqual(pragmas["journal_mode"], "WAL")
+
+    def test_default_profile_is_original_configuration(self):
+        self.assertEqual(self.database_settings(DJANGO_SQLITE_PROFILE="default"), [None, {}, {}])
+
+    def test_bench_uses_profile_transactions(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        output = f"{tmp.name}/bench.json"
+        call_command(
+            "bench_sqlite", workers=2, seconds=0.2, reads_per_write=1, output=output, stdout=StringIO()
+        )
+        with open(output, encoding="utf-8") as f:
+            results = json.load(f)
+        self.assertEqual(results["default"]["begin"], "BEGIN")
+        self.assertEqual(results["tuned"]["begin"], "BEGIN IMMEDIATE")
+        self.assertGreater(results["tuned"]["commits"], 0)
+
+
+class StartupTests(TestCase):
+    """
+    Старт процесса (taskmanager/startup.py, профиль api, manage.py startup_profile).
+    """
+
+    def test_prewarm_fills_template_cache(self):
+        names = startup.project_template_names()
+        self.assertIn("tasks/task_list.html", names)
+        self.assertIn("registration/login.html", names)
+        self.assertFalse(any(name.startswith("admin/") for name in names))
+
+        timings = startup.prewarm()
+        self.assertEqual(set(timings), {"urls", "translations", "templates"})
+        loader = engines["django"].engine.template_loaders[0]
+        self.assertIn("tasks/task_list.html", loader.get_template_cache)
+
+    @override_settings(ROOT_URLCONF="taskmanager.urls_api")
+    def test_api_urlconf(self):
+        user = User.objects.create_user("owner", password="pass")
+        Task.objects.create(owner=user, title="Задача")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/api/tasks/").json()["results"][0]["title"], "Задача")
+        self.assertEqual(self.client.get("/").status_code, 404)
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   dotenv.main\n"
+            "import time:        30 |        150 | dotenv\n"
+            "import time:       500 |        900 | django.contrib.admin.sites\n"
+        )
+        rows = parse_importtime(stderr)
+        self.assertEqual(rows[0], ("dotenv.main", 120, 120))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(module_group("django.contrib.admin.sites"), "django.contrib.admin")
+        self.assertEqual(module_group("django.db.models.query"), "django.db")
+        self.assertEqual(module_group("dotenv.main"), "dotenv")
+
+    def test_api_profile_boots(self):
+        output = StringIO()
+        call_command("startup_profile", profile="api", repeat=1, top=5, stdout=output)
+        self.assertIn("Профиль api", output.getvalue())
+        self.assertNotIn("django.contrib.admin", output.getvalue())
+
+
+class TaskCardTests(TestCase):
+    """
+    Карточки списка (tasks/cards.py): готовые подписи, ссылки и строки пагинации.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.tasks = [
+            Task.objects.create(
+                owner=cls.user, title=f"Отчёт {i}", status="INPR", priority=3,
+                due_date=date(2026, 1, 15) if i % 2 else None,
+            )
+            for i in range(12)
+        ]
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+        self.client.force_login(self.user)
+
+    def test_card_values(self):
+        task = self.tasks[1]
+        card = cards.task_cards([task])[0]
+        self.assertEqual(card["url"], reverse("task_detail", args=[task.pk]))
+        self.assertEqual(card["status_label"], task.get_status_display())
+        self.assertEqual(card["priority_label"], task.get_priority_display())
+        self.assertEqual(cards.task_cards([self.tasks[0]])[0]["due_label"], "—")
+
+    def test_list_reverses_once_per_page(self):
+        with mock.patch("tasks.cards.reverse", wraps=reverse) as reverse_mock:
+            response = self.client.get(reverse("task_list"))
+        self.assertEqual(reverse_mock.call_count, 1)
+        # 10 карточек + строка гистограммы
+        self.assertContains(response, "В работе", count=11)
+        self.assertContains(response, f'href="{reverse("task_detail", args=[self.tasks[-1].pk])}"')
+
+    def test_pagination_links_keep_filters(self):
+        response = self.client.get(reverse("task_list"), {"q": "отчёт", "status": "INPR"})
+        links = response.context["page_links"]
+        self.assertNotIn("previous", links)
+        self.assertEqual(links["next"], "?page=2&q=%D0%BE%D1%82%D1%87%D1%91%D1%82&status=INPR")
+        self.assertContains(response, 'href="?page=2&amp;q=%D0%BE%D1%82%D1%87%D1%91%D1%82&amp;status=INPR"')
+
+    def test_bench_render(self):
+        output = StringIO()
+        call_command("bench_render", sizes=[10], iterations=1, stdout=output)
+        self.assertIn("10", output.getvalue().splitlines()[-1])
+
+
+class TaskActivityTests(QueryPlanAssertionsMixin, TestCase):
+    """
+    Журнал изменений (tasks/activity.py): пишется из редактирования, админки и массовых
+    действий только после коммита, хранит лишь изменившиеся поля, схлопывается и чистится.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", password="pass")
+        cls.admin = User.objects.create_superuser("root", password="pass")
+        cls.tasks = [
+            Task.objects.create(owner=cls.user, title=f"Задача {i}", status="TODO", priority=2)
+            for i in range(3)
+        ]
+        cls.task = cls.tasks[0]
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+        activity._buffer.clear()
+        self.client.force_login(self.user)
+
+    def post_committed(self, url, data, **extra):
+        # Записи журнала попадают в буфер только после коммита транзакции
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data, **extra)
+        activity.flush()
+        return response
+
+    def test_encoding(self):
+        changes = {"status": ("TODO", "DONE"), "priority": (2, 3), "due_date": (None, date(2026, 1, 15))}
+        text = activity.encode(changes)
+        self.assertEqual(text, "s=TODO>DONE;p=2>3;d=>2026-01-15")
+        self.assertEqual(activity.decode(text), changes)
+        self.assertEqual(
+            activity.merge([{"status": ("TODO", "INPR")}, {"status": ("INPR", "DONE"), "priority": (2, 2)}]),
+            {"status": ("TODO", "DONE")},
+        )
+
+    def test_update_view_records_changed_fields(self):
+        url = reverse("task_edit", args=[self.task.pk])
+        self.post_committed(url, {"title": "Новое название", "status": "DONE", "priority": 2})
+        entry = TaskActivity.objects.get()
+        self.assertEqual((entry.task_id, entry.owner_id, entry.actor_id), (self.task.pk, self.user.pk, self.user.pk))
+        # Название не отслеживается, приоритет не менялся
+        self.assertEqual(entry.changes, "s=TODO>DONE")
+
+        # Сохранение без изменений отслеживаемых полей журнал не пишет
+        self.post_committed(url, {"title": "Ещё раз", "status": "DONE", "priority": 2})
+        self.assertEqual(TaskActivity.objects.count(), 1)
+
+    def test_rolled_back_change_is_not_recorded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    activity.record([(self.user.pk, self.task.pk, {"status": ("TODO", "DONE")})])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(activity.flush(), 0)
+
+    def test_bulk_action_records_old_values(self):
+        self.tasks[1].status = "DONE"
+        self.tasks[1].save()
+        ids = [task.pk for task in self.tasks]
+        self.post_committed(reverse("task_bulk"), {"ids": ids, "action": "set_status", "status": "DONE"})
+        # Уже выполненная задача не изменилась — записи о ней нет
+        self.assertEqual(
+            sorted(TaskActivity.objects.values_list("task_id", "changes")),
+            sorted((pk, "s=TODO>DONE") for pk in (self.tasks[0].pk, self.tasks[2].pk)),
+        )
+
+    def test_admin_change_records_actor(self):
+        self.client.force_login(self.admin)
+        self.post_committed(
+            reverse("admin:tasks_task_change", args=[self.task.pk]),
+            {"owner": self.user.pk, "title": self.task.title, "description": "",
+             "status": "TODO", "priority": 3, "due_date": ""},
+        )
+        entry = TaskActivity.objects.get()
+        self.assertEqual((entry.actor_id, entry.changes), (self.admin.pk, "p=2>3"))
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("task_detail", args=[self.task.pk]))
+        self.assertEqual(
+            response.context["history"][0]["changes"], [("Приоритет", "Средний", "Высокий")]
+        )
+        self.assertContains(response, "администратор")
+
+    def test_history_queries_use_indexes(self):
+        activity.record([(self.user.pk, self.task.pk, {"status": ("TODO", "INPR")})])
+        activity.flush()
+        with self.assertQueryPlans():
+            list(activity.task_history(self.task.pk))
+            list(activity.owner_history(self.user.pk, timezone.now() - timedelta(days=7), timezone.now()))
+            self.client.get(reverse("task_detail", args=[self.task.pk]))
+
+    def test_compact_and_purge(self):
+        now = timezone.now()
+        day = now - timedelta(days=60)
+        other_day = now - timedelta(days=59)
+        TaskActivity.objects.bulk_create([
+            # Один день: TODO -> INPR -> DONE схлопывается в TODO -> DONE
+            TaskActivity(task_id=1, owner_id=1, at=day, changes="s=TODO>INPR"),
+            TaskActivity(task_id=1, owner_id=1, at=day + timedelta(minutes=1), changes="s=INPR>DONE;p=2>3"),
+            # Другой день: статус вернулся к исходному — записей не остаётся
+            TaskActivity(task_id=1, owner_id=1, at=other_day, changes="s=DONE>TODO"),
+            TaskActivity(task_id=1, owner_id=1, at=other_day + timedelta(minutes=1), changes="s=TODO>DONE"),
+            # Свежая запись и запись старше срока хранения
+            TaskActivity(task_id=2, owner_id=1, at=now, changes="p=1>2"),
+            TaskActivity(task_id=2, owner_id=1, at=now - timedelta(days=400), changes="p=2>1"),
+        ])
+
+        output = StringIO()
+        call_command("compact_activity", batch_size=2, stdout=output)
+        self.assertIn("Удалено по сроку хранения: 1", output.getvalue())
+        self.assertEqual(
+            sorted(TaskActivity.objects.values_list("task_id", "changes")),
+            [(1, "s=TODO>DONE;p=2>3"), (2, "p=1>2")],
+        )
+        # Повторный запуск ничего не меняет
+        self.assertEqual(activity.compact(), (0, 0))
+
+
+class AnalyticsTests(QueryPlanAssertionsMixin, TestCase):
+    """
+    Отчёты (tasks/analytics.py): сводка TaskWeeklyStats дописывается инкрементально
+    от водяных знаков и не считает дважды; страница и API читают только сводку.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("root", password="pass")
+        cls.alice = User.objects.create_user("alice", password="pass")
+        cls.bob = User.objects.create_user("bob", password="pass")
+        cls.now = timezone.now()
+        cls.week = analytics.week_start(timezone.localdate(cls.now))
+
+        # Две задачи alice выполнены через 2 и 4 часа, одна из них после дедлайна
+        cls.tasks = [
+            Task.objects.create(owner=cls.alice, title="Отчёт", created_at=cls.now - timedelta(hours=4),
+                                due_date=timezone.localdate(cls.now) - timedelta(days=1)),
+            Task.objects.create(owner=cls.alice, title="План", created_at=cls.now - timedelta(hours=2),
+                                due_date=timezone.localdate(cls.now) + timedelta(days=1)),
+            Task.objects.create(owner=cls.bob, title="Звонок", created_at=cls.now),
+        ]
+        for task in cls.tasks[:2]:
+            TaskActivity.objects.create(
+                task_id=task.pk, owner_id=cls.alice.pk, at=cls.now, changes="s=TODO>DONE"
+            )
+        # Смена приоритета выполнением не считается
+        TaskActivity.objects.create(task_id=cls.tasks[2].pk, owner_id=cls.bob.pk, at=cls.now, changes="p=2>3")
+
+    def setUp(self):
+        fragment_cache.get_cache().clear()
+
+    def stats(self, owner_id):
+        return TaskWeeklyStats.objects.get(owner_id=owner_id, week=self.week)
+
+    def test_histogram_median(self):
+        histogram = Counter({analytics.cycle_bin(3600): 3, analytics.cycle_bin(60 * 60 * 24): 1})
+        self.assertAlmostEqual(analytics.histogram_median(histogram), 3600, delta=3600 * 0.25)
+        self.assertIsNone(analytics.histogram_median(Counter()))
+        self.assertEqual(analytics.cycle_bin(10), 0)
+
+    def test_refresh_is_incremental(self):
+        self.assertEqual(analytics.refresh(), {"tasks": self.tasks[-1].pk, "activity": TaskActivity.objects.last().pk})
+        alice, total = self.stats(self.alice.pk), self.stats(analytics.GLOBAL)
+        self.assertEqual((alice.created, alice.completed, alice.completed_with_due, alice.completed_late), (2, 2, 2, 1))
+        self.assertEqual((total.created, total.completed), (3, 2))
+        self.assertEqual(alice.cycle_seconds, 6 * 3600)
+
+        # Повторный запуск без новых данных ничего не меняет
+        self.assertEqual(analytics.refresh(), {"tasks": 0, "activity": 0})
+        self.assertEqual(self.stats(analytics.GLOBAL).created, 3)
+
+        # Новые задача и выполнение дописываются к тем же строкам
+        task = Task.objects.create(owner=self.bob, title="Новая", created_at=self.now)
+        TaskActivity.objects.create(task_id=task.pk, owner_id=self.bob.pk, at=self.now, changes="s=INPR>DONE")
+        analytics.refresh(step=1)
+        bob = self.stats(self.bob.pk)
+        self.assertEqual((bob.created, bob.completed, bob.completed_with_due), (2, 1, 0))
+        self.assertEqual(self.stats(analytics.GLOBAL).completed, 3)
+
+    def test_concurrent_refresh_does_not_double_count(self):
+        analytics.refresh()
+        delta = defaultdict(analytics._empty)
+        delta[(self.alice.pk, self.week)]["created"] = 5
+        # Водяной знак уже сдвинут — дельта откатывается
+        with self.assertRaises(analytics.RefreshConflict):
+            analytics._apply(delta, advance=("tasks", 0, 1))
+        self.assertEqual(self.stats(self.alice.pk).created, 2)
+
+    def test_created_done_counts_as_completed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(owner=self.bob, title="Готовая", status="DONE", created_at=self.now)
+        activity.flush()
+        self.assertEqual(TaskActivity.objects.get(task_id=task.pk).changes, "s=>DONE")
+
+        analytics.refresh()
+        self.assertEqual(self.stats(self.bob.pk).completed, 1)
+        # Повторный полный пересчёт не считает её ещё раз как «старую»
+        analytics.rebuild()
+        self.assertEqual(self.stats(self.bob.pk).completed, 1)
+
+    def test_rebuild_counts_done_tasks_without_log(self):
+        # Выполнена до появления журнала (UPDATE без сигналов); записи о других
+        # полях выполнением не считаются
+        task = Task.objects.create(owner=self.bob, title="Старая", created_at=self.now - timedelta(hours=1))
+        Task.objects.filter(pk=task.pk).update(status="DONE")
+        TaskActivity.objects.create(task_id=task.pk, owner_id=self.bob.pk, at=self.now, changes="p=2>3")
+        analytics.refresh()
+        self.assertEqual(self.stats(self.bob.pk).completed, 0)
+
+        output = StringIO()
+        call_command("refresh_analytics", rebuild=True, stdout=output)
+        self.assertIn("Сводка обновлена", output.getvalue())
+        self.assertEqual(self.stats(self.bob.pk).completed, 1)
+        self.assertEqual(self.stats(analytics.GLOBAL).completed, 3)
+
+    def test_reports(self):
+        analytics.refresh()
+        report = analytics.owner_report(self.alice.pk, weeks=4)
+        self.assertEqual(len(report["weeks"]), 4)
+        self.assertEqual(report["weeks"][-1]["week"], self.week)
+        self.assertEqual(report["summary"]["completed"], 2)
+        self.assertEqual(report["summary"]["overdue_ratio"], 0.5)
+        self.assertEqual(report["summary"]["mean_cycle_hours"], 3.0)
+
+        page, users = analytics.users_report(weeks=4)
+        self.assertEqual([row["username"] for row in users], ["alice", "bob"])
+        self.assertEqual(page.paginator.count, 2)
+
+    def test_report_queries_use_indexes(self):
+        analytics.refresh()
+        with self.assertQueryPlans():
+            analytics.owner_report(analytics.GLOBAL, weeks=12)
+        # Группировка и сортировка пользователей — по строкам сводки за период;
+        # COUNT для пагинатора читает результат этой группировки (subquery)
+        with self.assertQueryPlans(allow_scans={"subquery"}, allow_temp_sort=True):
+            analytics.users_report(weeks=12)
+
+    def test_views(self):
+        analytics.refresh()
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("admin_analytics"), {"weeks": "4"})
+        self.assertContains(response, "alice")
+        self.assertEqual(response.context["global"]["summary"]["created"], 3)
+
+        data = self.client.get(reverse("admin_analytics_api"), {"weeks": "4"}).json()
+        self.assertEqual(data["global"]["summary"]["completed"], 2)
+        self.assertEqual(data["page"], {"number": 1, "num_pages": 1})
+        self.assertEqual(self.client.get(reverse("admin_analytics_api"), {"weeks": "0"}).status_code, 400)
+
+        self.client.force_login(self.bob)
+        self.assertEqual(self.client.get(reverse("admin_analytics")).status_code, 403)
+        data = self.client.get(reverse("task_api_analytics")).json()
+        self.assertEqual(data["summary"]["created"], 1)
+        self.assertEqual(data["summary"]["completed"], 0)
+
+    def test_stale_summary_schedules_one_refresh_job(self):
+        self.client.force_login(self.alice)
+        self.client.get(reverse("task_api_analytics"))
+        self.client.get(reverse("task_api_analytics"))
+        self.assertEqual(Job.objects.filter(kind="refresh_analytics").count(), 1)
+
+        jobs.run_pending()
+        self.assertTrue(ReportWatermark.objects.filter(name="tasks").exists())
+        self.assertEqual(self.stats(self.alice.pk).completed, 2)
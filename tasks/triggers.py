@@ -0,0 +1,252 @@
+"""
+SQL-триггеры SQLite, которые поддерживают производные данные в актуальном
+состоянии при любом изменении таблицы (save, delete, bulk_create,
+QuerySet.update, каскадное удаление).
+
+Важная особенность SQLite + Django: многие изменения схемы (AlterField и т.п.)
+выполняются пересозданием таблицы, и триггеры на ней при этом теряются.
+Поэтому после каждого migrate (сигнал post_migrate, см. TasksConfig.ready)
+вызывается ensure_all(): если какого-то триггера нет — он создаётся заново,
+а производные данные пересобираются с нуля (rebuild).
+"""
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import connections
+
+
+def yo(column):
+    """
+    unicode61 не приравнивает «ё» к «е», поэтому в FTS-индекс кладём текст
+    с заменой ё -> е (запрос нормализуется так же, см. tasks/search.py).
+    """
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+class TriggerSet:
+    """
+    Набор триггеров и SQL для полной пересборки данных, которые они поддерживают.
+
+    triggers — {имя триггера: тело CREATE TRIGGER без «CREATE TRIGGER имя»}
+    rebuild  — список SQL, пересобирающих данные с нуля
+    requires — таблица, без которой набор не устанавливается
+               (например, FTS-таблица ещё не создана миграцией)
+    """
+
+    def __init__(self, name, triggers, rebuild, requires):
+        self.name = name
+        self.triggers = triggers
+        self.rebuild = rebuild
+        self.requires = requires
+
+    def _render(self, value):
+        # Имена таблиц могут зависеть от настроек (AUTH_USER_MODEL)
+        return value() if callable(value) else value
+
+    def is_ready(self, cursor):
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [self._render(self.requires)],
+        )
+        return cursor.fetchone() is not None
+
+    def missing(self, cursor):
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {row[0] for row in cursor.fetchall()}
+        return [name for name in self.triggers if name not in existing]
+
+    def install(self, cursor, rebuild=True):
+        """
+        Создаёт недостающие триггеры и (по умолчанию) пересобирает данные.
+        """
+        for name, body in self.triggers.items():
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {self._render(body)}")
+        if rebuild:
+            for sql in self._render(self.rebuild):
+                cursor.execute(sql)
+
+    def uninstall(self, cursor):
+        for name in self.triggers:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    def ensure(self, cursor):
+        """
+        Возвращает True, если триггеры пришлось восстанавливать.
+        """
+        if not self.is_ready(cursor) or not self.missing(cursor):
+            return False
+        self.uninstall(cursor)
+        self.install(cursor)
+        return True
+
+
+def _user_table():
+    return global_apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+
+
+# --- FTS5 по задачам (tasks/search.py: task_search) ---
+
+TASK_FTS = TriggerSet(
+    name="task_fts",
+    requires="tasks_task_fts",
+    triggers={
+        "tasks_task_fts_ai": f"""
+            AFTER INSERT ON tasks_task BEGIN
+                INSERT INTO tasks_task_fts(rowid, title, description, owner_id)
+                VALUES (new.id, {yo("new.title")}, {yo("new.description")}, new.owner_id);
+            END
+        """,
+        "tasks_task_fts_ad": f"""
+            AFTER DELETE ON tasks_task BEGIN
+                INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description, owner_id)
+                VALUES ('delete', old.id, {yo("old.title")}, {yo("old.description")}, old.owner_id);
+            END
+        """,
+        "tasks_task_fts_au": f"""
+            AFTER UPDATE OF title, description, owner_id ON tasks_task BEGIN
+                INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description, owner_id)
+                VALUES ('delete', old.id, {yo("old.title")}, {yo("old.description")}, old.owner_id);
+                INSERT INTO tasks_task_fts(rowid, title, description, owner_id)
+                VALUES (new.id, {yo("new.title")}, {yo("new.description")}, new.owner_id);
+            END
+        """,
+    },
+    # Индексируемый текст отличается от исходного (ё -> е), поэтому вместо
+    # команды 'rebuild' очищаем индекс и заполняем его явным INSERT ... SELECT
+    rebuild=[
+        "INSERT INTO tasks_task_fts(tasks_task_fts) VALUES ('delete-all')",
+        f"""
+        INSERT INTO tasks_task_fts(rowid, title, description, owner_id)
+        SELECT id, {yo("title")}, {yo("description")}, owner_id FROM tasks_task
+        """,
+    ],
+)
+
+
+# --- триграммный FTS5 по username (tasks/search.py: user_search) ---
+
+USER_FTS = TriggerSet(
+    name="user_fts",
+    requires="accounts_user_fts",
+    triggers={
+        "accounts_user_fts_ai": lambda: f"""
+            AFTER INSERT ON {_user_table()} BEGIN
+                INSERT INTO accounts_user_fts(rowid, username) VALUES (new.id, new.username);
+            END
+        """,
+        "accounts_user_fts_ad": lambda: f"""
+            AFTER DELETE ON {_user_table()} BEGIN
+                INSERT INTO accounts_user_fts(accounts_user_fts, rowid, username)
+                VALUES ('delete', old.id, old.username);
+            END
+        """,
+        "accounts_user_fts_au": lambda: f"""
+            AFTER UPDATE OF username ON {_user_table()} BEGIN
+                INSERT INTO accounts_user_fts(accounts_user_fts, rowid, username)
+                VALUES ('delete', old.id, old.username);
+                INSERT INTO accounts_user_fts(rowid, username) VALUES (new.id, new.username);
+            END
+        """,
+    },
+    rebuild=["INSERT INTO accounts_user_fts(accounts_user_fts) VALUES ('rebuild')"],
+)
+
+
+# --- счётчики задач по (владелец, статус, приоритет) (tasks/counters.py) ---
+#
+# Уменьшение делаем обычным UPDATE (строка гарантированно есть, раз задача была),
+# а не upsert: при удалении пользователя его счётчики могут быть удалены
+# раньше задач, и upsert создал бы строку со ссылкой на удалённого пользователя.
+
+_COUNTER_INCREMENT = """
+    INSERT INTO tasks_taskcounter(owner_id, status, priority, count)
+    VALUES (new.owner_id, new.status, new.priority, 1)
+    ON CONFLICT(owner_id, status, priority) DO UPDATE SET count = count + 1;
+"""
+
+_COUNTER_DECREMENT = """
+    UPDATE tasks_taskcounter SET count = count - 1
+    WHERE owner_id = old.owner_id AND status = old.status AND priority = old.priority;
+"""
+
+TASK_COUNTERS = TriggerSet(
+    name="task_counters",
+    requires="tasks_taskcounter",
+    triggers={
+        "tasks_taskcounter_ai": f"""
+            AFTER INSERT ON tasks_task BEGIN
+                {_COUNTER_INCREMENT}
+            END
+        """,
+        "tasks_taskcounter_ad": f"""
+            AFTER DELETE ON tasks_task BEGIN
+                {_COUNTER_DECREMENT}
+            END
+        """,
+        "tasks_taskcounter_au": f"""
+            AFTER UPDATE OF owner_id, status, priority ON tasks_task
+            WHEN old.owner_id IS NOT new.owner_id
+              OR old.status IS NOT new.status
+              OR old.priority IS NOT new.priority
+            BEGIN
+                {_COUNTER_DECREMENT}
+                {_COUNTER_INCREMENT}
+            END
+        """,
+    },
+    rebuild=[
+        "DELETE FROM tasks_taskcounter",
+        """
+        INSERT INTO tasks_taskcounter(owner_id, status, priority, count)
+        SELECT owner_id, status, priority, COUNT(*) FROM tasks_task
+        GROUP BY owner_id, status, priority
+        """,
+    ],
+)
+
+
+# --- надгробия удалённых задач (tasks/sync.py) ---
+#
+# Время — в том же формате, в котором Django хранит DateTimeField на SQLite
+# (UTC, "YYYY-MM-DD HH:MM:SS.ffffff"), чтобы сравнение строк совпадало со сравнением времени.
+# Пересобирать нечего: удалённые задачи по таблице уже не восстановить.
+
+TASK_TOMBSTONES = TriggerSet(
+    name="task_tombstones",
+    requires="tasks_tasktombstone",
+    triggers={
+        "tasks_tasktombstone_ad": """
+            AFTER DELETE ON tasks_task BEGIN
+                INSERT INTO tasks_tasktombstone(task_id, owner_id, deleted_at)
+                VALUES (old.id, old.owner_id, strftime('%Y-%m-%d %H:%M:%f', 'now') || '000');
+            END
+        """,
+    },
+    rebuild=[],
+)
+
+
+TRIGGER_SETS = [TASK_FTS, USER_FTS, TASK_COUNTERS, TASK_TOMBSTONES]
+
+
+def ensure_all(using="default"):
+    """
+    Восстанавливает потерянные триггеры во всех наборах.
+    Возвращает имена наборов, которые пришлось пересобрать.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return []
+
+    restored = []
+    with connection.cursor() as cursor:
+        for trigger_set in TRIGGER_SETS:
+            if trigger_set.ensure(cursor):
+                restored.append(trigger_set.name)
+    return restored
+
+
+def ensure_triggers(sender, using="default", **kwargs):
+    """
+    Обработчик post_migrate: после любых миграций проверяем триггеры.
+    """
+    ensure_all(using)
@@ -1,7 +1,20 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
-    TaskListView, TaskDetailView, TaskCreateView, TaskUpdateView, TaskDeleteView
+    TaskListView, TaskDetailView, TaskCreateView, TaskUpdateView, TaskDeleteView,
+    TaskBulkActionView, TaskRestoreView, TaskExportView, TaskDashboardView,
 )
+from .api_urls import urlpatterns as api_urlpatterns
+
+# Под ASGI можно включить async-версии view (DJANGO_ASYNC_VIEWS=1), см. tasks/async_views.py
+if getattr(settings, "ASYNC_VIEWS", False):
+    from .async_views import (
+        AsyncTaskListView as TaskListView,
+        AsyncTaskDetailView as TaskDetailView,
+        AsyncTaskCreateView as TaskCreateView,
+        AsyncTaskUpdateView as TaskUpdateView,
+        AsyncTaskDeleteView as TaskDeleteView,
+    )
 
 urlpatterns = [
     path("", TaskListView.as_view(), name="task_list"),
@@ -9,4 +22,17 @@ urlpatterns = [
     path("<int:pk>/", TaskDetailView.as_view(), name="task_detail"),
     path("<int:pk>/edit/", TaskUpdateView.as_view(), name="task_edit"),
     path("<int:pk>/delete/", TaskDeleteView.as_view(), name="task_delete"),
+    path("bulk/", TaskBulkActionView.as_view(), name="task_bulk"),
+    path("restore/", TaskRestoreView.as_view(), name="task_restore"),
+    path("export/", TaskExportView.as_view(), name="task_export"),
+    path("dashboard/", TaskDashboardView.as_view(), name="task_dashboard"),
 ]
+
+# Поток изменений задач (SSE или ?poll=1): /events/ — только под ASGI, вместе с async-view
+if getattr(settings, "ASYNC_VIEWS", False):
+    from .async_views import AsyncTaskEventsView
+
+    urlpatterns.append(path("events/", AsyncTaskEventsView.as_view(), name="task_events"))
+
+# JSON API (/api/tasks/..., /api/jobs/...) — см. tasks/api_urls.py
+urlpatterns += api_urlpatterns
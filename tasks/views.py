@@ -1,15 +1,43 @@
-from django.shortcuts import render
+from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Q
-from django.urls import reverse_lazy
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import InvalidPage
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.utils.safestring import mark_safe
+from django.views import View
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
 
+from . import cache as fragment_cache
+from . import activity, archive, counters, events, jobs
 from .models import Task
-from .forms import TaskForm
+from .cards import list_context, status_links
+from .forms import TaskForm, TaskBulkActionForm, TaskRestoreForm
+from .pagination import KeysetPaginator
+from .dashboard import DEFAULT_TOP, deadline_dashboard
+from .export import TASK_EXPORT_FIELDS, export_response, owner_export_queryset
+from .filters import filter_query, filter_tasks, rank_search_results
 
 
-class OwnerOnlyMixin(UserPassesTestMixin):
+def job_accepted(data, job):
+    """
+    Ответ 202 на запрос, работа по которому поставлена фоновым заданием:
+    {..., "job": id, "status_url": "/api/jobs/<id>/"}.
+    """
+    return JsonResponse(
+        {**data, "job": job.pk, "status_url": reverse("job_status", args=[job.pk])},
+        status=202,
+    )
+
+
+class OwnerOnlyMixin:
     """
     Миксин для ограничения доступа к конкретному объекту Task.
     Используется в Detail/Update/Delete, чтобы пользователь мог:
@@ -18,15 +46,34 @@ class OwnerOnlyMixin(UserPassesTestMixin):
     - удалять
     только СВОИ задачи.
 
-    UserPassesTestMixin вызывает test_func(); если он вернёт False — будет 403.
+    Владелец проверяется прямо в SQL: get_queryset() фильтрует по owner,
+    поэтому задача загружается одним запросом и без подгрузки owner.
+    Загруженный объект запоминается на view — повторный get_object() не ходит в БД.
+
+    - своя задача — 200
+    - чужая задача — 403 (дополнительный запрос только в этом случае)
+    - несуществующая — 404
     """
-    def test_func(self):
-        # self.get_object() — метод DetailView/UpdateView/DeleteView,
-        # который достаёт объект из БД по pk из URL.
-        obj = self.get_object()
+    def get_queryset(self):
+        # Базовое правило безопасности: только задачи текущего пользователя
+        return super().get_queryset().filter(owner=self.request.user)
+
+    def get_object(self, queryset=None):
+        if queryset is None and getattr(self, "_owned_object", None) is not None:
+            return self._owned_object
 
-        # Разрешаем доступ только если владелец задачи = текущий пользователь
-        return obj.owner == self.request.user
+        try:
+            obj = super().get_object(queryset)
+        except Http404:
+            # Среди своих задач нет — различаем «чужая» и «не существует»
+            pk = self.kwargs.get(self.pk_url_kwarg)
+            if Task.objects.filter(pk=pk).exists():
+                raise PermissionDenied
+            raise
+
+        if queryset is None:
+            self._owned_object = obj
+        return obj
 
 
 class TaskListView(LoginRequiredMixin, ListView):
@@ -37,6 +84,12 @@ class TaskListView(LoginRequiredMixin, ListView):
     - ListView: отдаёт список объектов и рендерит template_name
     - paginate_by = 10: по 10 задач на страницу
     - get_queryset: фильтруем и ищем по параметрам из URL (?q=...&status=...&priority=...)
+    - ?archived=1: вместе с архивными задачами (tasks/archive.py), с теми же фильтрами
+    - пагинация: обычная (?page=N) или курсорная (?cursor=...),
+      режим задаётся настройкой TASKS_PAGINATION ("offset" / "keyset")
+    - карточки, гистограмма и пагинация рендерятся во фрагмент, который
+      кэшируется по (владелец, версия данных владельца, фильтры, страница),
+      см. tasks/cache.py; при попадании в кэш БД не запрашивается вовсе
     """
     model = Task
     template_name = "tasks/task_list.html"      # шаблон списка задач
@@ -51,24 +104,82 @@ class TaskListView(LoginRequiredMixin, ListView):
         # Базовое правило безопасности: показываем только задачи текущего пользователя
         qs = Task.objects.filter(owner=self.request.user)
 
-        # Читаем параметры фильтров из строки запроса (GET-параметры)
-        q = self.request.GET.get("q", "").strip()              # строка поиска
-        status = self.request.GET.get("status", "").strip()    # статус (TODO/INPR/DONE)
-        priority = self.request.GET.get("priority", "").strip()# приоритет (1/2/3)
+        # Поиск и фильтры из строки запроса (общие со страницей экспорта)
+        qs = filter_tasks(qs, self.request.GET, owner_id=self.request.user.pk)
+
+        if archive.requested(self.request.GET):
+            return archive.with_archived(qs, self.request.GET, self.request.user)
+        return rank_search_results(qs, self.request.GET, self.get_pagination_mode())
+
+    def get(self, request, *args, **kwargs):
+        """
+        Сначала ищем готовый фрагмент списка в кэше; при промахе
+        выполняем обычный ListView-путь и кэшируем отрендеренный фрагмент.
+        """
+        key = fragment_cache.list_fragment_key(
+            request.user.pk, request.GET, self.get_pagination_mode()
+        )
+        fragment = fragment_cache.get_fragment(key)
+
+        if fragment is None:
+            self.object_list = self.get_queryset()
+            context = self.get_context_data()
+            fragment = {
+                "html": render_to_string("tasks/task_list_items.html", context, request),
+                "has_tasks": bool(context["tasks"]),
+            }
+            fragment_cache.set_fragment(key, fragment)
+        else:
+            # Пустой ленивый QuerySet: нужен ListView для имени шаблона, в БД не ходит
+            self.object_list = Task.objects.none()
+            context = {"filter_query": self.get_filter_query()}
+
+        context["task_list_html"] = mark_safe(fragment["html"])
+        context["has_tasks"] = fragment["has_tasks"]
+        # Подписка вкладки на изменения задач (tasks/events.py)
+        context["events_enabled"] = events.stream_enabled()
+        return self.render_to_response(context)
+
+    def get_filter_query(self):
+        # Текущие фильтры одной строкой — для ссылок пагинации и экспорта
+        return filter_query(self.request.GET)
+
+    def get_pagination_mode(self):
+        """
+        Режим пагинации. По умолчанию — обычная постраничная (offset),
+        курсорная включается настройкой TASKS_PAGINATION = "keyset".
+        """
+        return getattr(settings, "TASKS_PAGINATION", "offset")
 
-        # Поиск по названию или описанию (без учёта регистра)
-        if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
+    def paginate_queryset(self, queryset, page_size):
+        """
+        В режиме keyset вместо Paginator (COUNT(*) + LIMIT/OFFSET)
+        используем KeysetPaginator: диапазонный запрос по (created_at, id).
+        Возвращаем тот же кортеж, что и ListView, чтобы шаблон получил
+        page_obj / is_paginated как обычно.
+        """
+        if self.get_pagination_mode() != "keyset":
+            return super().paginate_queryset(queryset, page_size)
 
-        # Фильтр по статусу, если он передан
-        if status:
-            qs = qs.filter(status=status)
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get("cursor"))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
 
-        # Фильтр по приоритету: проверяем, что это число
-        if priority.isdigit():
-            qs = qs.filter(priority=int(priority))
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        # Готовые карточки и ссылки пагинации, см. tasks/cards.py
+        ctx.update(list_context(
+            ctx["page_obj"], self.request.GET, keyset=self.get_pagination_mode() == "keyset"
+        ))
 
-        return qs
+        # Гистограмма по статусам — из счётчиков TaskCounter, без COUNT по задачам
+        ctx["status_histogram"] = status_links(
+            counters.status_histogram(self.request.user), self.request.GET
+        )
+        return ctx
 
 
 class TaskDetailView(LoginRequiredMixin, OwnerOnlyMixin, DetailView):
@@ -78,11 +189,18 @@ class TaskDetailView(LoginRequiredMixin, OwnerOnlyMixin, DetailView):
     - LoginRequiredMixin: доступ только после входа
     - OwnerOnlyMixin: доступ только владельцу задачи
     - DetailView: достаёт объект по pk из URL (например /tasks/5/)
+    - history: панель «История» — последние изменения из журнала (tasks/activity.py)
     """
     model = Task
     template_name = "tasks/task_detail.html"
     context_object_name = "task"  # в шаблоне объект будет доступен как task
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        task = self.object
+        ctx["history"] = activity.history_rows(activity.task_history(task.pk), task.owner_id)
+        return ctx
+
 
 class TaskCreateView(LoginRequiredMixin, CreateView):
     """
@@ -111,12 +229,18 @@ class TaskUpdateView(LoginRequiredMixin, OwnerOnlyMixin, UpdateView):
     - LoginRequiredMixin: только после входа
     - OwnerOnlyMixin: редактировать можно только свои задачи
     - UpdateView: отображает форму и обновляет объект при POST
+    - изменения статуса / приоритета / дедлайна пишутся в журнал (tasks/activity.py)
     """
     model = Task
     form_class = TaskForm
     template_name = "tasks/task_form.html"   # используем тот же шаблон, что и для создания
     success_url = reverse_lazy("task_list")  # после сохранения возвращаемся на список
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        activity.record_save(self.object, actor_id=self.request.user.pk)
+        return response
+
 
 class TaskDeleteView(LoginRequiredMixin, OwnerOnlyMixin, DeleteView):
     """
@@ -129,3 +253,174 @@ class TaskDeleteView(LoginRequiredMixin, OwnerOnlyMixin, DeleteView):
     model = Task
     template_name = "tasks/task_confirm_delete.html"  # страница подтверждения удаления
     success_url = reverse_lazy("task_list")           # после удаления возвращаемся на список
+
+
+def wants_json(request):
+    # Клиент просит JSON-ответ (fetch / API), а не редирект
+    return "application/json" in request.headers.get("Accept", "")
+
+
+def redirect_back(request):
+    """
+    Редирект обратно на страницу, с которой отправили форму (параметр next);
+    чужие и небезопасные адреса заменяются списком задач.
+    """
+    next_url = request.POST.get("next", "")
+    if not url_has_allowed_host_and_scheme(
+        next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+    ):
+        next_url = "task_list"
+    return redirect(next_url)
+
+
+def invalid_form_response(request, form, message):
+    """
+    Ответ на невалидную форму массового действия: JSON 400 для JSON-клиента,
+    иначе редирект обратно (redirect_back) с сообщением об ошибке.
+    """
+    if wants_json(request):
+        return JsonResponse({"errors": form.errors}, status=400)
+    errors = "; ".join(error for field_errors in form.errors.values() for error in field_errors)
+    messages.error(request, f"{message}: {errors}", fail_silently=True)
+    return redirect_back(request)
+
+
+class TaskBulkActionView(LoginRequiredMixin, View):
+    """
+    Массовое действие над задачами одним запросом (POST /bulk/).
+
+    Параметры: ids (список id), action (set_status / set_priority / set_due_date / delete)
+    и новое значение (status / priority / due_date).
+
+    - владение проверяется одним запросом: все ids должны принадлежать пользователю,
+      иначе 404 и ничего не меняется
+    - изменение — один UPDATE (или DELETE) по всем задачам в одной транзакции,
+      без загрузки объектов и без построчного save()
+    - старые значения изменяемого поля читаются тем же запросом, что проверяет владение,
+      и изменения пишутся в журнал (tasks/activity.py)
+    - удаление больше TASKS_JOBS_BULK_DELETE_THRESHOLD задач уходит в фоновое задание:
+      JSON-клиент получает 202 и ссылку для опроса (см. job_accepted)
+    - ответ: JSON {"action": ..., "count": N}, если клиент просит application/json,
+      иначе редирект обратно на список (параметр next); ошибки формы — JSON 400
+      или тот же редирект с сообщением (django.contrib.messages)
+    """
+    http_method_names = ["post"]
+
+    def post(self, request, *args, **kwargs):
+        form = TaskBulkActionForm(request.POST)
+        if not form.is_valid():
+            return invalid_form_response(request, form, "Действие не выполнено")
+
+        ids = form.cleaned_data["ids"]
+        action = form.cleaned_data["action"]
+
+        job = None
+        changes = form.get_changes()
+        with transaction.atomic():
+            qs = Task.objects.filter(owner=request.user, pk__in=ids)
+
+            # Проверка владения: одним запросом получаем id своих задач из списка
+            # вместе со старыми значениями изменяемого поля (для журнала)
+            rows = list(qs.values_list("pk", *changes))
+            if len(rows) != len(ids):
+                raise Http404("Часть задач не найдена")
+
+            if action == TaskBulkActionForm.DELETE and len(ids) > getattr(
+                settings, "TASKS_JOBS_BULK_DELETE_THRESHOLD", 200
+            ):
+                # Большое удаление — фоновым заданием (tasks/jobs.py), запрос не ждёт
+                job = jobs.enqueue("bulk_delete", {"ids": ids}, owner=request.user)
+                count = None
+            elif action == TaskBulkActionForm.DELETE:
+                count, _ = qs.delete()
+            else:
+                activity.record(
+                    (
+                        (request.user.pk, pk, activity.diff(dict(zip(changes, old)), changes))
+                        for pk, *old in rows
+                    ),
+                    actor_id=request.user.pk,
+                )
+                # QuerySet.update() не трогает auto_now, поэтому updated_at ставим явно
+                changes = {"updated_at": timezone.now(), **changes}
+                count = qs.update(**changes)
+
+        # UPDATE в обход save() сигналов не шлёт — сбрасываем кэш списка
+        # и оповещаем открытые вкладки явно (удаления шлют сигналы сами)
+        fragment_cache.bump_owner_version(request.user.pk)
+        if action != TaskBulkActionForm.DELETE and events.enabled():
+            events.get_broker().publish(
+                request.user.pk, {"type": "updated", "ids": ids, "fields": changes}
+            )
+
+        if wants_json(request):
+            if job is not None:
+                return job_accepted({"action": action}, job)
+            return JsonResponse({"action": action, "count": count})
+        return redirect_back(request)
+
+
+class TaskRestoreView(LoginRequiredMixin, View):
+    """
+    Возврат задач из архива (POST /restore/, параметр ids).
+
+    Возвращаются только свои архивные задачи (чужие id молча пропускаются),
+    пачками, см. archive.restore(). Ответ — как у массовых действий:
+    JSON {"count": N} или редирект обратно на список (параметр next);
+    ошибки формы — JSON 400 или тот же редирект с сообщением.
+    """
+    http_method_names = ["post"]
+
+    def post(self, request, *args, **kwargs):
+        form = TaskRestoreForm(request.POST)
+        if not form.is_valid():
+            return invalid_form_response(request, form, "Задачи не восстановлены")
+
+        count = archive.restore(owner=request.user, ids=form.cleaned_data["ids"])
+
+        if wants_json(request):
+            return JsonResponse({"count": count})
+        return redirect_back(request)
+
+
+class TaskExportView(LoginRequiredMixin, View):
+    """
+    Выгрузка всех задач текущего пользователя файлом (GET /export/?format=csv|jsonl).
+
+    Фильтры те же, что у списка (?q=...&status=...&priority=...).
+    Ответ потоковый: строки читаются из БД пачками через values_list().iterator(),
+    объекты Task не создаются, память не растёт с количеством задач.
+
+    ?background=1 — файл готовит фоновое задание (tasks/jobs.py): ответ 202 со ссылкой
+    для опроса, готовый файл — по download_url из состояния задания.
+    """
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get("format", "csv")
+        if fmt not in ("csv", "jsonl"):
+            return JsonResponse({"error": "format должен быть csv или jsonl"}, status=400)
+
+        if request.GET.get("background"):
+            job = jobs.enqueue(
+                "export_tasks",
+                {"scope": "owner", "format": fmt, "params": request.GET.dict()},
+                owner=request.user,
+            )
+            return job_accepted({"format": fmt}, job)
+
+        qs = owner_export_queryset(request.user.pk, request.GET)
+        return export_response(qs, TASK_EXPORT_FIELDS, fmt, filename="tasks")
+
+
+class TaskDashboardView(LoginRequiredMixin, TemplateView):
+    """
+    Дашборд дедлайнов (GET /dashboard/): незавершённые задачи по корзинам
+    «просрочено / сегодня / на этой неделе / позже / без дедлайна» —
+    количество и первые задачи каждой корзины, см. tasks/dashboard.py.
+    """
+    template_name = "tasks/dashboard.html"
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["dashboard"] = deadline_dashboard(self.request.user, top=DEFAULT_TOP)
+        return ctx